@@ -1,5 +1,4 @@
 from django.apps import AppConfig
-from django.core import management
 
 
 class AppConfig(AppConfig):
@@ -7,20 +6,16 @@ class AppConfig(AppConfig):
     name = 'app'
 
     def ready(self) -> None:
-        """As this method runs after the Django setup is ready, it will be responsible to:
-        - makemigrations (if it was not done yet)
-        - migrate the database (as this database is configured to be InMemory, this process will
-        be repeated every time when the application initialize.)]
-        - initialize the dependency injector container for the app and script packages
-        - runs the 'import_csv_from_filesystem' script, that will import all the data from the CSV file
-        inside the folder pointed on texo.settings.py file in the constant PATH_CSV_FILES_FOLDER_PRODUCTION 
+        """As this method runs after the Django setup is ready, it will be responsible to initialize the
+        dependency injector container for the app and script packages.
+
+        The database is not migrated here, so the management commands (e.g. the tests) do not change it.
+        It is migrated by the 'start_import' script (see scripts.background_import), which is called by the
+        WSGI and ASGI applications (or by the 'import_csv' command), if MIGRATE_ON_START is True (see texo.settings), or else by the
+        'python manage.py migrate' command before the server starts.
+
+        The data of the CSV files is not imported here either, so the server does not wait for the import to
+        accept the requests.
         """
-        management.call_command("makemigrations", "app")
-        management.call_command("migrate")
         from texo.containers import application_container
-        from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem
         application_container.wire(packages=['app', 'scripts'])
-        failed_count, producers_count, row_count, _ = import_csv_from_filesystem()
-
-        print("\n\n***Server listening, please follow the README.md instructions.***\n")
-        print(f"{producers_count - failed_count} of {producers_count} producers data imported to database in {row_count} rows checked.\n\n")
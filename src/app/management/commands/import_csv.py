@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from scripts.background_import import start_import
+
+
+class Command(BaseCommand):
+    help = ("Imports the CSV files that changed since the last import and, with --watch, keeps watching "
+            "the folder, for the servers whose CSV_IMPORT_ON_START is False (see texo.settings).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watch", action="store_true", help="Ingests the changes of the folder until it is stopped.")
+
+    def handle(self, *args, **options):
+        thread = start_import(background=False, watch=options["watch"])
+        if thread is not None:
+            thread.join()
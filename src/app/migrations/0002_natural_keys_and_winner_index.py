@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='producer',
+            name='name',
+            field=models.TextField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='studios',
+            name='name',
+            field=models.TextField(unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='prize',
+            index=models.Index(condition=models.Q(('winner', True)), fields=['year'], name='prize_winner_year_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='movie',
+            constraint=models.UniqueConstraint(fields=('name', 'producer', 'studios'), name='unique_movie_producer_studios'),
+        ),
+        migrations.AddConstraint(
+            model_name='prize',
+            constraint=models.UniqueConstraint(fields=('year', 'movie', 'winner'), name='unique_prize_year_movie_winner'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_natural_keys_and_winner_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProducerGap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('producer', models.TextField()),
+                ('previous_win', models.IntegerField()),
+                ('following_win', models.IntegerField()),
+                ('interval', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['interval', 'id'], name='producer_gap_interval_idx'), models.Index(fields=['producer', 'previous_win', 'id'], name='producer_gap_producer_idx')],
+            },
+        ),
+    ]
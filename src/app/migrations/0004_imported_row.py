@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_producer_gap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importmanifest',
+            name='row_count',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.CreateModel(
+            name='ImportedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.TextField()),
+                ('year', models.TextField()),
+                ('title', models.TextField()),
+                ('row_hash', models.BigIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('path', 'year', 'title'), name='unique_imported_row_path_year_title')],
+            },
+        ),
+    ]
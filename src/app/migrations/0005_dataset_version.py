@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_dataset_version(apps, schema_editor):
+    DatasetVersion = apps.get_model('app', 'DatasetVersion')
+    DatasetVersion.objects.get_or_create(id=1, defaults={'version': 0, 'modified_at': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_imported_row'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('previous_version', models.BigIntegerField(default=0)),
+                ('modified_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_dataset_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_dataset_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prize',
+            name='source_path',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prize',
+            index=models.Index(condition=models.Q(('source_path__isnull', False)), fields=['source_path', 'year'], name='prize_source_path_year_idx'),
+        ),
+    ]
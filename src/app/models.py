@@ -5,11 +5,11 @@ from django.db import models
 
 class Producer(models.Model):
 
-    name = models.TextField()
+    name = models.TextField(unique=True)
 
 
 class Studios(models.Model):
-    name = models.TextField()
+    name = models.TextField(unique=True)
 
 
 class Movie(models.Model):
@@ -17,8 +17,97 @@ class Movie(models.Model):
     producer = models.ForeignKey(to=Producer, on_delete=models.CASCADE)
     studios = models.ForeignKey(to=Studios, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "producer", "studios"], name="unique_movie_producer_studios"),
+        ]
+
 
 class Prize(models.Model):
     year = models.IntegerField()
     movie = models.ForeignKey(to=Movie, on_delete=models.CASCADE)
     winner = models.BooleanField()
+    # The path of the CSV file whose row was imported by the delta import, so the prize is deleted
+    # when that row changes. As the prizes are not duplicated, it is the path of the first file.
+    source_path = models.TextField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "movie", "winner"], name="unique_prize_year_movie_winner"),
+        ]
+        indexes = [
+            # The winners are always read by year (all_winners and the interval filters).
+            models.Index(fields=["year"], condition=models.Q(winner=True),
+                         name="prize_winner_year_idx"),
+            models.Index(fields=["source_path", "year"], condition=models.Q(source_path__isnull=False),
+                         name="prize_source_path_year_idx"),
+        ]
+
+
+class ImportManifest(models.Model):
+    """The fingerprint of each CSV file imported to database, so the import can be skipped
+    when the files did not change since the last one."""
+    path = models.TextField()
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    content_hash = models.CharField(max_length=64)
+    # Quantity of rows (including the header) of the file imported by the delta import. The size
+    # is the byte offset where the next delta import starts to read the appended rows. If it is
+    # null, the file was imported by the full import and its rows were not hashed.
+    row_count = models.BigIntegerField(null=True)
+
+
+class ImportedRow(models.Model):
+    """The hash of the rows of each CSV file imported by the delta import, grouped by their
+    (year, title) key, so the rows that changed since the last import can be found."""
+    path = models.TextField()
+    year = models.TextField()
+    title = models.TextField()
+    row_hash = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["path", "year", "title"], name="unique_imported_row_path_year_title"),
+        ]
+
+
+class ProducerGap(models.Model):
+    """Each interval between two consecutive wins of a producer. The table is updated from the
+    winners by each import, in its transaction, so the producer intervals can be listed page by page."""
+    producer = models.TextField()
+    previous_win = models.IntegerField()
+    following_win = models.IntegerField()
+    interval = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            # One index for each ordering of the DjangoProducerGapRepository.page.
+            models.Index(fields=["interval", "id"], name="producer_gap_interval_idx"),
+            models.Index(fields=["producer", "previous_win", "id"], name="producer_gap_producer_idx"),
+        ]
+
+
+class DatasetVersion(models.Model):
+    """The version of the dataset, bumped in the same transaction of each write (see
+    infra.result_cache), so all the processes that share the database read the same version
+    and it is kept when they restart. There is only one row, with the SINGLETON_ID."""
+    SINGLETON_ID = 1
+
+    # The version is never less than the time of the bump (in nanoseconds), so the version of a
+    # rolled back transaction is not used again by the next one.
+    version = models.BigIntegerField(default=0)
+    previous_version = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField()
+
+
+class ImportJob(models.Model):
+    """The state of the import of an uploaded CSV file (see infra.import_jobs), so it can be requested
+    from all the processes that share the database, and not only from the process that imports it."""
+    job_id = models.CharField(max_length=32, unique=True)
+    state = models.CharField(max_length=16)
+    # The response of the job (see infra.import_jobs.ImportJob.dict) when it was saved.
+    data = models.JSONField()
+    started_at = models.FloatField(db_index=True)
@@ -9,5 +9,13 @@ class PrizeInfoSerializer(serializers.Serializer):
 
 
 class PrizeIntervalSerializer(serializers.Serializer):
+    """The schema of the get_prize_interval_summary response. The response data is only validated by it
+    when the PRIZE_INTERVAL_RESPONSE_RENDERING is 'serializer'."""
     min = serializers.ListField(child=PrizeInfoSerializer())
     max = serializers.ListField(child=PrizeInfoSerializer())
+
+
+class ProducerIntervalsPageSerializer(serializers.Serializer):
+    """The schema of the get_producer_intervals response (it is not used to validate the response)."""
+    results = serializers.ListField(child=PrizeInfoSerializer())
+    next = serializers.URLField(allow_null=True)
@@ -1,15 +1,50 @@
+import fcntl
 import glob
+import gzip
+import io
+import multiprocessing
 import os
+import shutil
+import tempfile
+from queue import Queue
+from threading import Thread
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler, OperationalError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.urls import reverse
 from app.views import get_prize_interval_summary
+from scripts.background_import import start_import
+from scripts.import_csv_upload import UploadTooLargeException, start_upload_import
+from scripts.watch_csv_folder import ingest_csv_folder
+from scripts import csv_file_parser
+from scripts.csv_file_parser import (
+    CSVFileStats, RejectsReport, map_columns, parse_csv_file, read_mapped_rows_mmap, read_rows, stream_csv_file)
+from scripts.refresh_producer_gaps import refresh_producer_gaps
 from scripts.upload_csv_file_from_filesystem import (
-    import_csv_from_filesystem, ImportCSVFromFileSystemException)
-from texo.settings import PATH_CSV_FILES_FOLDER_TESTS
+    import_csv_from_filesystem, import_csv_from_filesystem_delta, import_csv_from_filesystem_if_changed,
+    import_csv_from_stream, ImportCSVFromFileSystemException)
+from texo.settings import DATABASE_PROFILES, PATH_CSV_FILES_FOLDER_TESTS, SQLITE_CACHE_SIZE
 from infra.django_prize_repository import DjangoPrizeRepository
-from app.models import Movie, Prize, Producer, Studios
+from infra.result_cache import ResultCache, result_cache
+from infra.django_prize_interval_filter import DjangoWindowPrizeIntervalFilter
+from infra.django_import_manifest_repository import DjangoImportManifestRepository
+from infra.django_imported_row_repository import DjangoImportedRowRepository
+from infra.csv_folder_watcher import CSVFolderWatcher
+from infra.import_jobs import ImportJobs
+from infra.import_progress import ImportProgress
+from infra.in_memory_columnar_prize_repository import InMemoryColumnarPrizeRepository
+from infra.in_memory_producer_gap_repository import InMemoryProducerGapRepository
+from infra.metrics import operation_queries_total
+from repository.prize_repository import MovieInputDTO, PrizeInputDTO
+from repository.filters import IndexedPrizeIntervalFilter, VectorizedPrizeIntervalFilter
+from repository.interval_index import PrizeIntervalIndex, interval_index
+from app.models import Movie, Prize, Producer, ProducerGap, Studios
+from texo.containers import application_container
+from usecases.usecases import PopulatePrizeData
 
 
 def delete_all_items():
@@ -19,7 +54,20 @@ def delete_all_items():
     Studios.objects.all().delete()
 
 
-class TestScriptUploadCSVFileFromFileSystem(TestCase):
+def create_winner(repository, year: int, producer: str):
+    repository.create(year=year, winner=True, movie=MovieInputDTO(
+        _id=None, name=f"Movie {producer} {year}", producer_name=producer, studio_name="Studio"))
+
+
+class ResultCacheTestCase(APITestCase):
+    """Each test starts with a new version of the result cache, so it does not read the results cached
+    by the previous tests."""
+
+    def setUp(self):
+        result_cache.bump_version()
+
+
+class TestScriptUploadCSVFileFromFileSystem(ResultCacheTestCase):
 
     def test_if_it_returns_the_right_exception_when_folder_is_empty(self):
         folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/empty_folder/"
@@ -48,6 +96,13 @@ class TestScriptUploadCSVFileFromFileSystem(TestCase):
         self.assertEqual(str(ex.exception), "Unexpected error on row 5")
         delete_all_items()
 
+    def test_if_a_failed_import_does_not_keep_the_rows_of_the_previous_batches(self):
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/empty_studio_name/"
+        with self.assertRaises(ImportCSVFromFileSystemException):
+            import_csv_from_filesystem(
+                repository=DjangoPrizeRepository(), folder_path=folder_path, batch_size=2)
+        self.assertFalse(Prize.objects.exists())
+
     def test_if_it_returns_the_right_exception_when_missing_data(self):
         folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/missing_data/"
         with self.assertRaises(ImportCSVFromFileSystemException) as ex:
@@ -121,8 +176,287 @@ class TestScriptUploadCSVFileFromFileSystem(TestCase):
         self.assertEqual(failed_count, 0)
         delete_all_items()
 
+    def test_if_batched_import_creates_the_same_data_as_the_row_by_row_import(self):
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/default/"
+        import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=folder_path, batch_size=None)
+        row_by_row = sorted(Prize.objects.values_list(
+            "year", "movie__name", "movie__producer__name", "movie__studios__name", "winner"))
+        delete_all_items()
+
+        import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=folder_path, batch_size=7)
+        batched = sorted(Prize.objects.values_list(
+            "year", "movie__name", "movie__producer__name", "movie__studios__name", "winner"))
+        self.assertEqual(row_by_row, batched)
+        self.assertEqual(Producer.objects.count(),
+                         Producer.objects.values("name").distinct().count())
+
+        import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=folder_path, batch_size=7)
+        self.assertEqual(Prize.objects.count(), len(batched))
+        delete_all_items()
+
+    def test_if_parallel_import_returns_the_same_counts_and_data_as_the_sequential_import(self):
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/multiple_files/"
+        sequential_output = import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=folder_path, workers=1)
+        sequential_prizes = sorted(Prize.objects.values_list(
+            "year", "movie__name", "movie__producer__name", "movie__studios__name", "winner"))
+        delete_all_items()
+
+        parallel_output = import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=folder_path, workers=2)
+        parallel_prizes = sorted(Prize.objects.values_list(
+            "year", "movie__name", "movie__producer__name", "movie__studios__name", "winner"))
+        self.assertEqual(sequential_output, parallel_output)
+        self.assertEqual(sequential_prizes, parallel_prizes)
+        delete_all_items()
+
+    def test_if_the_parser_sends_the_rows_in_batches_while_the_file_is_parsed(self):
+        csv_file_name = os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "default", "movielist_default.csv")
+        parsed_batches = Queue()
+        streamed_csv_file = stream_csv_file(csv_file_name, parsed_batches, batch_size=50)
+        batches = list(iter(parsed_batches.get, None))
+        parsed_csv_file = parse_csv_file(csv_file_name)
+        self.assertGreater(len(batches), 1)
+        self.assertTrue(all(len(batch) <= 50 for batch in batches))
+        self.assertEqual([row for batch in batches for row in batch], parsed_csv_file.rows)
+        self.assertEqual(streamed_csv_file.stats.row_count, parsed_csv_file.stats.row_count)
+
+    def test_if_parallel_import_raises_the_exception_of_the_invalid_file(self):
+        with tempfile.TemporaryDirectory() as folder_path:
+            shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "default", "movielist_default.csv"),
+                        folder_path)
+            shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "year_is_text", "movielist_year_is_text.csv"),
+                        folder_path)
+            with self.assertRaises(ImportCSVFromFileSystemException) as ex:
+                import_csv_from_filesystem(
+                    repository=DjangoPrizeRepository(), folder_path=folder_path, workers=2)
+        self.assertEqual(str(ex.exception), "Unexpected error on row 5")
+        delete_all_items()
+
+    def test_if_parallel_import_shuts_down_the_parsers_when_a_write_fails(self):
+        class FailingRepository(DjangoPrizeRepository):
+            def bulk_create(self, batch, batch_size=None):
+                raise RuntimeError("write failed")
+
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/multiple_files/"
+        error = None
+        try:
+            import_csv_from_filesystem(repository=FailingRepository(), folder_path=folder_path, workers=2)
+        except ImportCSVFromFileSystemException as ex:
+            error = ex
+        # The traceback of the error keeps the frames of the import, but not its manager process.
+        self.assertIsNotNone(error.__traceback__)
+        self.assertEqual([process.name for process in multiprocessing.active_children()
+                          if "Manager" in process.name], [])
+
+    def test_if_it_reports_the_invalid_rows_instead_of_raising_when_rejects_are_collected(self):
+        with tempfile.TemporaryDirectory() as folder_path:
+            for fixture, csv_file_name in [("default", "movielist_default.csv"),
+                                           ("year_is_text", "movielist_year_is_text.csv"),
+                                           ("winner_is_not_yes_or_empty", "winner_is_not_yes_or_empty.csv")]:
+                shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, fixture, csv_file_name), folder_path)
+            for workers in (1, 2):
+                rejects = RejectsReport()
+                failed_count, producers_count, _, _ = import_csv_from_filesystem(
+                    repository=DjangoPrizeRepository(), folder_path=folder_path, workers=workers, rejects=rejects)
+                messages = sorted(row.message for row in rejects.rows)
+                self.assertIn("Unexpected error on row 5", messages)
+                self.assertIn(
+                    "on row 3, Object not Created winner field is invalid. Must be 'yes' or ''", messages)
+                self.assertEqual(failed_count, len(rejects))
+                self.assertGreater(producers_count, failed_count)
+                self.assertTrue(Prize.objects.filter(
+                    movie__producer__name="Matthew Vaughn", year=2015).exists())
+
+                report_path = os.path.join(folder_path, "rejects.txt")
+                rejects.write_csv(report_path)
+                with open(report_path) as report_file:
+                    self.assertEqual(len(report_file.readlines()), len(rejects) + 1)
+                delete_all_items()
+
+    def test_if_the_mmap_reader_parses_all_the_fixtures_as_the_csv_reader(self):
+        for csv_file_name in glob.glob(f"{PATH_CSV_FILES_FOLDER_TESTS}/*/*.csv"):
+            results = []
+            for reader in ("csv", "mmap"):
+                try:
+                    parsed_csv_file = parse_csv_file(
+                        csv_file_name, collect_rejects=True, reader=reader)
+                    results.append((
+                        parsed_csv_file.rows,
+                        parsed_csv_file.stats.producers_count,
+                        parsed_csv_file.stats.row_count,
+                        [(row.row_number, row.message) for row in parsed_csv_file.rejected_rows]))
+                except ImportCSVFromFileSystemException as ex:
+                    results.append(str(ex))
+            self.assertEqual(results[0], results[1], csv_file_name)
+
+    def test_if_the_mmap_reader_does_not_split_the_lines_between_the_blocks(self):
+        csv_file_name = os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "default", "movielist_default.csv")
+        rows = list(read_mapped_rows_mmap(csv_file_name, CSVFileStats()))
+        block_size = csv_file_parser.MMAP_BLOCK_SIZE
+        try:
+            for csv_file_parser.MMAP_BLOCK_SIZE in (1, 7, 100):
+                self.assertEqual(list(read_mapped_rows_mmap(csv_file_name, CSVFileStats())), rows)
+        finally:
+            csv_file_parser.MMAP_BLOCK_SIZE = block_size
+        self.assertEqual(rows, list(map_columns(read_rows(csv_file_name, CSVFileStats()))))
+
+    def test_if_it_skips_the_import_when_the_files_did_not_change(self):
+        with tempfile.TemporaryDirectory() as folder_path:
+            csv_file_name = os.path.join(folder_path, "movielist.csv")
+            shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS,
+                        "default", "movielist_default.csv"), csv_file_name)
+            repository = DjangoPrizeRepository()
+            manifest_repository = DjangoImportManifestRepository()
+
+            output = import_csv_from_filesystem_if_changed(
+                repository=repository, manifest_repository=manifest_repository, folder_path=folder_path)
+            self.assertIsNotNone(output)
+            self.assertEqual(len(manifest_repository.all()), 1)
+            prizes_count = Prize.objects.count()
+
+            self.assertIsNone(import_csv_from_filesystem_if_changed(
+                repository=repository, manifest_repository=manifest_repository, folder_path=folder_path))
+
+            with open(csv_file_name, "a") as csv_file:
+                csv_file.write("2030;New Movie;New Studios;New Producer;yes\n")
+            self.assertIsNotNone(import_csv_from_filesystem_if_changed(
+                repository=repository, manifest_repository=manifest_repository, folder_path=folder_path))
+            self.assertEqual(Prize.objects.count(), prizes_count + 1)
+        delete_all_items()
+
+    def test_if_the_full_import_keeps_the_previous_data_when_it_fails(self):
+        with tempfile.TemporaryDirectory() as folder_path:
+            csv_file_name = os.path.join(folder_path, "movielist.csv")
+            shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS,
+                        "default", "movielist_default.csv"), csv_file_name)
+            repository = DjangoPrizeRepository()
+            manifest_repository = DjangoImportManifestRepository()
+            import_csv_from_filesystem_if_changed(
+                repository=repository, manifest_repository=manifest_repository, folder_path=folder_path, mode="full")
+            prizes_count = Prize.objects.count()
+            manifest = [(x.path, x.size, x.content_hash) for x in manifest_repository.all()]
+
+            with open(csv_file_name, "w") as csv_file:
+                csv_file.write("year;name\n2041;Movie\n")
+            with self.assertRaises(ImportCSVFromFileSystemException):
+                import_csv_from_filesystem_if_changed(
+                    repository=repository, manifest_repository=manifest_repository, folder_path=folder_path,
+                    mode="full")
+            self.assertEqual(Prize.objects.count(), prizes_count)
+            self.assertEqual([(x.path, x.size, x.content_hash) for x in manifest_repository.all()], manifest)
+        delete_all_items()
+
+
+class TestDeltaImport(TestCase):
+
+    def setUp(self):
+        delete_all_items()
+        self.folder = tempfile.TemporaryDirectory()
+        self.csv_file_name = os.path.join(self.folder.name, "movielist.csv")
+        shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "default", "movielist_default.csv"),
+                    self.csv_file_name)
+        self.repository = DjangoPrizeRepository()
+        self.manifest_repository = DjangoImportManifestRepository()
+
+    def tearDown(self):
+        self.folder.cleanup()
+        delete_all_items()
+
+    def import_delta(self):
+        return import_csv_from_filesystem_delta(
+            repository=self.repository, manifest_repository=self.manifest_repository,
+            imported_row_repository=DjangoImportedRowRepository(), folder_path=self.folder.name)
+
+    def prizes(self) -> set:
+        return set(Prize.objects.values_list(
+            "year", "movie__name", "movie__producer__name", "movie__studios__name", "winner"))
+
+    def assert_same_prizes_as_the_full_import(self):
+        prizes = self.prizes()
+        delete_all_items()
+        import_csv_from_filesystem(repository=self.repository, folder_path=self.folder.name)
+        self.assertEqual(prizes, self.prizes())
+
+    def test_if_it_only_imports_the_appended_rows(self):
+        self.assertEqual(self.import_delta()[2], 207)
+        with open(self.csv_file_name, "a") as csv_file:
+            csv_file.write("2030;New Movie;New Studios;New Producer, Other Producer;yes\n")
+        with CaptureQueriesContext(connection) as queries:
+            failed_count, producers_count, row_count, _ = self.import_delta()
+        self.assertEqual((failed_count, producers_count, row_count), (0, 2, 2))
+        self.assertEqual(Prize.objects.filter(year=2030).count(), 2)
+        self.assertLess(len(queries), 50)
+        self.assertEqual(self.manifest_repository.all()[0].row_count, 208)
+        self.assert_same_prizes_as_the_full_import()
+
+    def test_if_it_replaces_the_prizes_of_the_changed_and_removed_rows(self):
+        self.import_delta()
+        with open(self.csv_file_name) as csv_file:
+            lines = csv_file.readlines()
+        lines[1] = lines[1].replace("Allan Carr", "Allan Carr, New Producer")
+        lines[2] = lines[2].replace("Jerry Weintraub;", "Jerry Weintraub;yes")
+        del lines[3]
+        with open(self.csv_file_name, "w") as csv_file:
+            csv_file.writelines(lines[:1] + lines[100:] + lines[1:100])
+
+        failed_count, producers_count, row_count, _ = self.import_delta()
+        self.assertEqual((failed_count, producers_count, row_count), (0, 3, 3))
+        self.assertFalse(Prize.objects.filter(movie__name="The Formula").exists())
+        self.assertTrue(Prize.objects.filter(movie__name="Cruising", winner=True).exists())
+        self.assertFalse(Prize.objects.filter(movie__name="Cruising", winner=False).exists())
+        self.assertIsNone(import_csv_from_filesystem_if_changed(
+            repository=self.repository, manifest_repository=self.manifest_repository,
+            imported_row_repository=DjangoImportedRowRepository(), folder_path=self.folder.name))
+        self.assert_same_prizes_as_the_full_import()
+
+    def test_if_it_deletes_the_prizes_of_the_removed_files(self):
+        self.import_delta()
+        other_csv_file_name = os.path.join(self.folder.name, "other.csv")
+        with open(other_csv_file_name, "w") as csv_file:
+            csv_file.write("year;title;studios;producers;winner\n2030;New Movie;New Studios;New Producer;yes\n")
+        self.import_delta()
+        self.assertTrue(Prize.objects.filter(year=2030).exists())
+        os.remove(other_csv_file_name)
+        self.import_delta()
+        self.assertFalse(Prize.objects.filter(year=2030).exists())
+        self.assert_same_prizes_as_the_full_import()
+
+    def test_if_the_read_errors_name_the_file(self):
+        csv_file_name = os.path.join(self.folder.name, "wrong_extention_file.csv")
+        shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "wrong_extention_file", "wrong_extention_file.csv"),
+                    csv_file_name)
+        with self.assertRaises(ImportCSVFromFileSystemException) as ex:
+            self.import_delta()
+        self.assertEqual(str(ex.exception), f"It was not possible to read the file {csv_file_name}")
+
+    def test_if_it_keeps_the_prizes_of_the_rows_that_are_in_other_files(self):
+        self.import_delta()
+        with open(self.csv_file_name) as csv_file:
+            lines = csv_file.readlines()
+        other_csv_file_name = os.path.join(self.folder.name, "other.csv")
+        with open(other_csv_file_name, "w") as csv_file:
+            csv_file.writelines(lines[:2])
+        self.import_delta()
+        self.assertEqual(Prize.objects.get(movie__name="Can't Stop the Music").source_path, self.csv_file_name)
+
+        with open(self.csv_file_name, "w") as csv_file:
+            csv_file.writelines(lines[:1] + lines[2:])
+        failed_count, producers_count, row_count, _ = self.import_delta()
+        self.assertEqual((failed_count, producers_count, row_count), (0, 0, 1))
+        self.assertEqual(Prize.objects.get(movie__name="Can't Stop the Music").source_path, other_csv_file_name)
+
+        os.remove(other_csv_file_name)
+        self.import_delta()
+        self.assertFalse(Prize.objects.filter(movie__name="Can't Stop the Music").exists())
+        self.assert_same_prizes_as_the_full_import()
+
+
+class TestGetPrizeIntervalView(ResultCacheTestCase):
 
-class TestGetPrizeIntervalView(APITestCase):
     def test_if_it_returns_right_values_the_file_is_valid(self):
         folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/default/"
         import_csv_from_filesystem(
@@ -167,3 +501,727 @@ class TestGetPrizeIntervalView(APITestCase):
             "error": "Database is empty. Your CSV file must be empty or with some issues, fix it and run the application later."
         }
         self.assertEqual(data, response.data)
+
+    def test_if_the_quantity_of_queries_does_not_depend_on_the_quantity_of_winners(self):
+        url = reverse('get_prize_interval_summary')
+        repository = DjangoPrizeRepository()
+        for year in (1990, 1995):
+            create_winner(repository, year, "Producer")
+        result_cache.bump_version()
+        with CaptureQueriesContext(connection) as small_dataset_queries:
+            self.client.get(url)
+        delete_all_items()
+
+        import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(),
+            folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        self.assertGreater(Prize.objects.filter(winner=True).count(), 1)
+        result_cache.bump_version()
+        with CaptureQueriesContext(connection) as default_dataset_queries:
+            self.client.get(url)
+        self.assertEqual(len(small_dataset_queries),
+                         len(default_dataset_queries))
+        delete_all_items()
+
+    def test_if_it_returns_the_cached_response_until_the_data_changes(self):
+        url = reverse('get_prize_interval_summary')
+        repository = DjangoPrizeRepository()
+        for year in (1990, 1995):
+            create_winner(repository, year, "Producer")
+        first_response = self.client.get(url)
+        self.assertEqual(first_response.data["max"][0]["interval"], 5)
+
+        with CaptureQueriesContext(connection) as cached_queries:
+            cached_response = self.client.get(url)
+        self.assertEqual(first_response.data, cached_response.data)
+        self.assertFalse(any("app_prize" in query["sql"]
+                         for query in cached_queries.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_winner(repository, 2005, "Producer")
+        response = self.client.get(url)
+        self.assertEqual(response.data["max"][0]["interval"], 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            repository.delete_all()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code,
+                         status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def test_if_the_metrics_are_exposed_in_the_prometheus_format(self):
+        import_csv_from_filesystem(
+            repository=application_container.prize_repository(),
+            folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        queries_before = operation_queries_total.value(operation="prize_repository.all_winners")
+        with application_container.config.prize_interval_response_rendering.override("serializer"):
+            self.client.get(reverse('get_prize_interval_summary'))
+        self.assertEqual(
+            operation_queries_total.value(operation="prize_repository.all_winners") - queries_before, 1)
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        content = response.content.decode()
+        for line in [
+                '# TYPE texo_operation_duration_seconds histogram',
+                'texo_operation_duration_seconds_count{operation="import"}',
+                'texo_operation_duration_seconds_count{operation="import.parse"}',
+                'texo_operation_duration_seconds_count{operation="prize_repository.bulk_create"}',
+                'texo_operation_duration_seconds_bucket{operation="prize_interval_filter.rolling.execute",le="+Inf"}',
+                'texo_operation_duration_seconds_count{operation="prize_interval_serializer.is_valid"}',
+                'texo_operation_queries_total{operation="import.write_batch"}',
+                'texo_import_producers_total{result="imported"}']:
+            self.assertIn(line, content)
+
+    def test_if_all_the_renderings_return_the_same_response(self):
+        import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        responses = {}
+        for rendering in ["serializer", "precomputed", "encoded"]:
+            with application_container.config.prize_interval_response_rendering.override(rendering):
+                responses[rendering] = self.client.get(reverse('get_prize_interval_summary'))
+            self.assertEqual(responses[rendering].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses["serializer"].json(), responses["precomputed"].json())
+        self.assertEqual(responses["serializer"].json(), responses["encoded"].json())
+        self.assertEqual(responses["encoded"]["Content-Type"], "application/json")
+        self.assertTrue(responses["encoded"].has_header("ETag"))
+
+    def test_if_it_answers_not_modified_without_executing_the_filter_until_the_data_changes(self):
+        repository = DjangoPrizeRepository()
+        import_csv_from_filesystem(
+            repository=repository, folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        url = reverse('get_prize_interval_summary')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=", response["Cache-Control"])
+        self.assertTrue(response.has_header("Last-Modified"))
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        class FilterThatMustNotRun(IndexedPrizeIntervalFilter):
+            def execute(self):
+                raise AssertionError("The filter was executed")
+
+        with application_container.prize_interval_filter.override(FilterThatMustNotRun(repository)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(
+            reverse('get_prize_interval_summary_async'), HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_winner(repository, 2020, "Bo Derek")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        # The data changed in the same second of the Last-Modified, so only the ETag tells the versions apart.
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, status.HTTP_200_OK)
+
+    async def test_if_the_async_view_returns_the_same_response(self):
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/default/"
+        await sync_to_async(import_csv_from_filesystem)(
+            repository=DjangoPrizeRepository(), folder_path=folder_path)
+        response = await self.async_client.get(reverse('get_prize_interval_summary'))
+        async_response = await self.async_client.get(reverse('get_prize_interval_summary_async'))
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json(), response.json())
+        async_response = await self.async_client.post(reverse('get_prize_interval_summary_async'))
+        self.assertEqual(async_response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_if_the_read_only_views_are_not_wrapped_in_a_transaction(self):
+        import_csv_from_filesystem(
+            repository=DjangoPrizeRepository(), folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        for url in [reverse('get_prize_interval_summary'), reverse('get_producer_intervals')]:
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # The ATOMIC_REQUESTS transaction is a savepoint inside the transaction of the test.
+            self.assertEqual([query["sql"] for query in queries.captured_queries if "SAVEPOINT" in query["sql"]], [])
+
+
+class TestPrizeIntervalIndex(ResultCacheTestCase):
+
+    def test_if_it_keeps_all_the_consecutive_gaps_when_years_are_added_out_of_order(self):
+        index = PrizeIntervalIndex()
+        for producer, year in [("A", 2000), ("A", 1990), ("B", 2001), ("A", 1991), ("B", 2003), ("A", 2020)]:
+            index.add(producer, year)
+        self.assertEqual(index.min_gaps(), [("A", 1990, 1991)])
+        self.assertEqual(index.max_gaps(), [("A", 2000, 2020)])
+
+        index.add("A", 2010)
+        self.assertEqual(index.max_gaps(), [("A", 2000, 2010), ("A", 2010, 2020)])
+
+        index.clear()
+        self.assertEqual(index.min_gaps(), [])
+        self.assertEqual(index.max_gaps(), [])
+
+    def test_if_a_repeated_gap_is_returned_once_for_each_time(self):
+        index = PrizeIntervalIndex()
+        for year in (1990, 1990, 1990, 1995):
+            index.add("A", year)
+        self.assertEqual(index.min_gaps(), [("A", 1990, 1990), ("A", 1990, 1990)])
+
+    def test_if_a_rolled_back_write_does_not_change_the_version_nor_the_index(self):
+        index = PrizeIntervalIndex()
+        repository = DjangoPrizeRepository(interval_index=index)
+        version = result_cache.version()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            create_winner(repository, 2030, "Producer")
+            raise RuntimeError
+        self.assertEqual(result_cache.version(), version)
+        self.assertIsNone(index.version)
+
+    def test_if_the_database_version_is_shared_and_bumped_with_the_transaction(self):
+        database_cache = ResultCache(version_store="database")
+        repository = DjangoPrizeRepository(result_cache=database_cache, interval_index=PrizeIntervalIndex())
+        version, modified_at = database_cache.dataset_state()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            create_winner(repository, 2030, "Producer")
+            self.assertGreater(ResultCache(version_store="database").version(), version)
+            raise RuntimeError
+        self.assertEqual(database_cache.dataset_state(), (version, modified_at))
+
+        repository.bulk_create([PrizeInputDTO(year=year, winner=True, movie=MovieInputDTO(
+            _id=None, name=f"Movie {year}", producer_name="Producer", studio_name="Studio"))
+            for year in (2030, 2035)])
+        # Another worker (or this one, after a restart) reads the same version and sends the same ETag.
+        state = database_cache.dataset_state()
+        self.assertGreater(state[0], version)
+        self.assertEqual(ResultCache(version_store="database").dataset_state(), state)
+        url = reverse('get_prize_interval_summary')
+        etags = []
+        for cache in [database_cache, ResultCache(version_store="database")]:
+            with application_container.result_cache.override(cache):
+                etags.append(self.client.get(url)["ETag"])
+        self.assertEqual(etags[0], etags[1])
+
+    def test_if_the_filter_is_updated_by_the_repository_writes_without_reading_all_winners(self):
+        index = PrizeIntervalIndex()
+        repository = DjangoPrizeRepository(result_cache=ResultCache(), interval_index=index)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_csv_from_filesystem(
+                repository=repository, folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        interval_filter = IndexedPrizeIntervalFilter(repository, index=index)
+        interval_filter.execute()
+        schema = interval_filter.get_schema()
+        self.assertEqual([x.dict() for x in schema._max], [{
+            "producer": "Matthew Vaughn", "interval": 13, "previousWin": 2002, "followingWin": 2015}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_winner(repository, 2030, "Matthew Vaughn")
+        with self.assertNumQueries(0):
+            interval_filter.execute()
+        schema = interval_filter.get_schema()
+        self.assertEqual([x.dict() for x in schema._max], [{
+            "producer": "Matthew Vaughn", "interval": 15, "previousWin": 2015, "followingWin": 2030}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            repository.delete_all()
+        with self.assertNumQueries(0):
+            interval_filter.execute()
+        self.assertEqual(interval_filter.get_schema()._min, [])
+
+
+class TestPrizeIntervalEngines(TestCase):
+
+    def test_if_it_considers_all_the_consecutive_wins_in_any_order(self):
+        repository = DjangoPrizeRepository()
+        for producer, year in [("A", 2000), ("B", 1980), ("A", 1990), ("B", 1984), ("A", 1992), ("C", 1990), ("C", 2000)]:
+            create_winner(repository, year, producer)
+        interval_filter = VectorizedPrizeIntervalFilter(repository)
+        interval_filter.execute()
+        schema = interval_filter.get_schema()
+        self.assertEqual([x.dict() for x in schema._min], [
+            {"producer": "A", "interval": 2, "previousWin": 1990, "followingWin": 1992}])
+        self.assertEqual([x.dict() for x in schema._max], [
+            {"producer": "C", "interval": 10, "previousWin": 1990, "followingWin": 2000}])
+
+    def test_if_the_winner_columns_are_read_with_one_query(self):
+        repository = DjangoPrizeRepository()
+        import_csv_from_filesystem(repository=repository, folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        with self.assertNumQueries(1):
+            producers, codes, years = repository.winner_columns()
+        self.assertEqual([(producers[code], year) for code, year in zip(codes, years)],
+                         [(x.producer, x.year) for x in repository.all_winners()])
+
+    def test_if_the_database_filter_returns_the_same_intervals(self):
+        repository = DjangoPrizeRepository()
+        for producer, year in [("A", 2000), ("B", 1980), ("A", 1990), ("B", 1984), ("A", 1992), ("C", 1990), ("C", 2000)]:
+            create_winner(repository, year, producer)
+        vectorized_filter = VectorizedPrizeIntervalFilter(repository)
+        vectorized_filter.execute()
+        database_filter = DjangoWindowPrizeIntervalFilter()
+        with self.assertNumQueries(1):
+            database_filter.execute()
+        for vectorized, database in [
+                (vectorized_filter.get_schema()._min, database_filter.get_schema()._min),
+                (vectorized_filter.get_schema()._max, database_filter.get_schema()._max)]:
+            self.assertEqual([x.dict() for x in vectorized],
+                             [x.dict() for x in database])
+
+
+class TestInMemoryColumnarPrizeRepository(ResultCacheTestCase):
+
+    def test_if_it_keeps_the_same_winners_as_the_django_repository(self):
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/default/"
+        django_repository = DjangoPrizeRepository()
+        columnar_repository = InMemoryColumnarPrizeRepository()
+        self.assertEqual(
+            import_csv_from_filesystem(repository=django_repository, folder_path=folder_path),
+            import_csv_from_filesystem(repository=columnar_repository, folder_path=folder_path))
+        import_csv_from_filesystem(repository=columnar_repository, folder_path=folder_path)
+
+        def winners(repository):
+            return [(x.year, x.name, x.producer, x.studios, x.winner) for x in repository.all_winners()]
+        self.assertEqual(winners(django_repository), winners(columnar_repository))
+        producers, codes, years = columnar_repository.winner_columns()
+        self.assertEqual([(producers[code], year) for code, year in zip(codes, years)],
+                         [(x.producer, x.year) for x in django_repository.all_winners()])
+
+        columnar_repository.delete_all()
+        self.assertEqual(columnar_repository.all_winners(), [])
+
+    def test_if_it_only_deletes_the_prizes_of_the_source_path(self):
+        repository = InMemoryColumnarPrizeRepository(result_cache=ResultCache(), interval_index=PrizeIntervalIndex())
+        repository.bulk_create([
+            PrizeInputDTO(
+                year=year, winner=True, source=source,
+                movie=MovieInputDTO(_id=None, name=name, producer_name=producer, studio_name="Studios"))
+            for year, name, producer, source in [
+                (2000, "Movie A", "Producer A", "a.csv"), (2001, "Movie B", "Producer B", "a.csv"),
+                (2002, "Movie C", "Producer A", "b.csv")]])
+        self.assertEqual(repository.delete_prizes("b.csv", [(2000, "Movie A"), (2002, "Movie C")]), {"Producer A"})
+        self.assertEqual(repository.delete_prizes("a.csv", [(2030, "Movie D")]), set())
+        self.assertEqual([(x._id, x.year, x.name) for x in repository.all_winners()],
+                         [(1, 2000, "Movie A"), (2, 2001, "Movie B")])
+        producers, codes, years = repository.winner_columns(["Producer A"])
+        self.assertEqual([(producers[code], year) for code, year in zip(codes, years)], [("Producer A", 2000)])
+
+    def test_if_the_view_returns_the_same_values_without_reading_the_database(self):
+        columnar_result_cache = ResultCache()
+        repository = InMemoryColumnarPrizeRepository(result_cache=columnar_result_cache)
+        import_csv_from_filesystem(
+            repository=repository, folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        for engine in ["rolling", "indexed", "vectorized"]:
+            columnar_result_cache.bump_version()
+            with application_container.prize_repository.override(repository), \
+                    application_container.result_cache.override(columnar_result_cache), \
+                    application_container.config.prize_interval_filter_engine.override(engine), \
+                    CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('get_prize_interval_summary'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([query["sql"] for query in queries.captured_queries if "app_" in query["sql"]], [])
+            self.assertEqual(response.data["min"][0]["producer"], "Bo Derek")
+            self.assertEqual(response.data["max"][0]["producer"], "Matthew Vaughn")
+
+
+class TestPopulatePrizeDataBatch(ResultCacheTestCase):
+
+    def test_if_the_batch_validation_has_the_same_result_as_the_entities_validation(self):
+        items = [
+            ("Producer", "Movie", "Studios", 1990, "yes"),
+            ("Producer", "Movie", "Studios", 1990, ""),
+            ("", "Movie", "Studios", 1990, "yes"),
+            ("Producer", "", "", 1990, ""),
+            ("Producer", "Movie", "Studios", 1900, "yes"),
+            ("", "", "", 2099, ""),
+            ("Producer", "Movie", "Studios", 1990, "no"),
+        ]
+        prize_input_dtos, invalid_items = PopulatePrizeData.prepare_many(*zip(*items))
+        valid_items = iter(prize_input_dtos)
+        for position, (producer, movie, studios, year, winner) in enumerate(items):
+            output, prize_input_dto = PopulatePrizeData(
+                repo=None, producer_name=producer, movie_name=movie, studios_name=studios,
+                year=year, winner=winner).prepare()
+            if prize_input_dto is None:
+                self.assertEqual(invalid_items[position].msg, output.msg)
+                continue
+            batch_prize_input_dto = next(valid_items)
+            self.assertEqual(
+                (batch_prize_input_dto.year, batch_prize_input_dto.winner, batch_prize_input_dto.movie.name,
+                 batch_prize_input_dto.movie.producer_name, batch_prize_input_dto.movie.studio_name),
+                (prize_input_dto.year, prize_input_dto.winner, prize_input_dto.movie.name,
+                 prize_input_dto.movie.producer_name, prize_input_dto.movie.studio_name))
+        self.assertEqual(len(invalid_items), 5)
+
+    def test_if_it_creates_the_valid_items_and_reports_the_invalid_ones(self):
+        output = PopulatePrizeData.execute_many(
+            DjangoPrizeRepository(),
+            producer_names=["A", "B", ""],
+            movie_names=["Movie A", "Movie B", "Movie C"],
+            studios_names=["Studios", "Studios", "Studios"],
+            years=[1990, 1991, 1992],
+            winners=["yes", "", "yes"])
+        self.assertEqual(output.status, "FAILED")
+        self.assertEqual(list(output.data), [2])
+        self.assertEqual(Prize.objects.count(), 2)
+
+
+class TestGetProducerIntervalsView(ResultCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        repository = DjangoPrizeRepository()
+        for producer, years in [("A", [1990, 1991, 1995, 2005]), ("B", [1980, 2000]), ("C", [1993, 1994])]:
+            for year in years:
+                create_winner(repository, year, producer)
+        refresh_producer_gaps(repository=repository)
+
+    def get_all_pages(self, **params) -> list:
+        results = []
+        response = self.client.get(reverse('get_producer_intervals'), {"page_size": 2, **params})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            results.extend((x["producer"], x["previousWin"], x["interval"]) for x in response.data["results"])
+            if response.data["next"] is None:
+                return results
+            response = self.client.get(response.data["next"])
+
+    def test_if_the_pages_return_every_interval_once_in_the_ordering(self):
+        self.assertEqual(self.get_all_pages(), [
+            ("A", 1990, 1), ("C", 1993, 1), ("A", 1991, 4), ("A", 1995, 10), ("B", 1980, 20)])
+        self.assertEqual(self.get_all_pages(ordering="-interval"), [
+            ("B", 1980, 20), ("A", 1995, 10), ("A", 1991, 4), ("C", 1993, 1), ("A", 1990, 1)])
+        self.assertEqual(self.get_all_pages(ordering="producer"), [
+            ("A", 1990, 1), ("A", 1991, 4), ("A", 1995, 10), ("B", 1980, 20), ("C", 1993, 1)])
+
+    def test_if_it_filters_the_intervals_by_the_years_and_the_interval_ranges(self):
+        self.assertEqual(self.get_all_pages(min_year=1990, max_year=2000), [
+            ("A", 1990, 1), ("C", 1993, 1), ("A", 1991, 4)])
+        self.assertEqual(self.get_all_pages(min_interval=4, max_interval=10), [
+            ("A", 1991, 4), ("A", 1995, 10)])
+
+    def test_if_the_import_only_replaces_the_gaps_of_its_producers(self):
+        gap_ids = set(ProducerGap.objects.exclude(producer="B").values_list("id", flat=True))
+        import_csv_from_stream(
+            io.BytesIO(b"year;title;studios;producers;winner\n2001;Movie B 2001;Studio;B;yes\n"),
+            "upload.csv", repository=DjangoPrizeRepository())
+        self.assertEqual(set(ProducerGap.objects.exclude(producer="B").values_list("id", flat=True)), gap_ids)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_all_pages(ordering="producer")[3:], [
+                ("B", 1980, 20), ("B", 2000, 1), ("C", 1993, 1)])
+        self.assertFalse(any(query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+                             for query in queries.captured_queries))
+
+    def test_if_the_gaps_of_the_columnar_repository_are_not_written_to_the_database(self):
+        gaps = ProducerGap.objects.count()
+        with application_container.config.prize_repository.override("columnar"):
+            repository = InMemoryColumnarPrizeRepository(result_cache=ResultCache())
+            import_csv_from_filesystem(
+                repository=repository, folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+            results = self.get_all_pages(ordering="-interval")
+        self.assertEqual(ProducerGap.objects.count(), gaps)
+        self.assertEqual(results[0], ("Matthew Vaughn", 2002, 13))
+        self.assertEqual(results[-1], ("Bo Derek", 1984, 6))
+
+    def test_if_it_returns_bad_request_when_a_parameter_is_invalid(self):
+        url = reverse('get_producer_intervals')
+        for params in [{"ordering": "year"}, {"min_year": "x"}, {"page_size": 0}, {"cursor": "x"},
+                       {"ordering": "producer", "cursor": "WzEsIDJd"}]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn("error", response.data)
+
+
+class TestDatabaseProfiles(TestCase):
+
+    def test_if_the_sqlite_profile_applies_the_pragmas_on_each_connection(self):
+        with tempfile.TemporaryDirectory() as folder_path:
+            connections = ConnectionHandler({"default": {
+                **DATABASE_PROFILES["sqlite"], "NAME": os.path.join(folder_path, "db.sqlite3")}})
+            try:
+                with connections["default"].cursor() as cursor:
+                    pragmas = {}
+                    for pragma in ["journal_mode", "synchronous", "cache_size"]:
+                        cursor.execute(f"PRAGMA {pragma}")
+                        pragmas[pragma] = cursor.fetchone()[0]
+            finally:
+                connections.close_all()
+        # The synchronous=NORMAL is 1.
+        self.assertEqual(pragmas, {"journal_mode": "wal", "synchronous": 1, "cache_size": SQLITE_CACHE_SIZE})
+
+    def test_if_only_the_readers_of_the_memory_profile_fail_while_the_data_is_written(self):
+        def read_while_writing(profile: dict) -> str:
+            connections = ConnectionHandler({"default": profile})
+            results = Queue()
+
+            def read():
+                try:
+                    with connections["default"].cursor() as cursor:
+                        cursor.execute("SELECT COUNT(*) FROM gap")
+                        results.put(str(cursor.fetchone()[0]))
+                except OperationalError as ex:
+                    results.put(str(ex))
+                finally:
+                    connections.close_all()
+
+            writer = connections["default"]
+            try:
+                with writer.cursor() as cursor:
+                    cursor.execute("CREATE TABLE gap (interval INTEGER)")
+                writer.set_autocommit(False)
+                with writer.cursor() as cursor:
+                    cursor.execute("INSERT INTO gap VALUES (1)")
+                reader = Thread(target=read)
+                reader.start()
+                reader.join()
+                writer.rollback()
+            finally:
+                connections.close_all()
+            return results.get()
+
+        with tempfile.TemporaryDirectory() as folder_path:
+            self.assertEqual(read_while_writing(
+                {**DATABASE_PROFILES["sqlite"], "NAME": os.path.join(folder_path, "db.sqlite3")}), "0")
+        self.assertIn("database table is locked", read_while_writing(
+            {**DATABASE_PROFILES["memory"], "NAME": "file:concurrency?mode=memory&cache=shared"}))
+
+
+class TestImportReadiness(ResultCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        delete_all_items()
+        self.import_progress = ImportProgress()
+        application_container.import_progress.override(self.import_progress)
+
+    def tearDown(self):
+        application_container.import_progress.reset_override()
+        delete_all_items()
+
+    def test_if_the_interval_endpoints_answer_service_unavailable_until_the_first_import_completes(self):
+        folder_path = f"{PATH_CSV_FILES_FOLDER_TESTS}/default/"
+        csv_file_name = glob.glob(f"{folder_path}*.csv")[0]
+        self.import_progress.start([csv_file_name])
+        self.import_progress.advance(csv_file_name, 103)
+        for url in [reverse('get_prize_interval_summary'), reverse('get_prize_interval_summary_async'),
+                    reverse('get_producer_intervals'), reverse('ready')]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response["Retry-After"], "5")
+            self.assertEqual(response.json()["state"], "running")
+            self.assertAlmostEqual(response.json()["progress"], 50, delta=1)
+        self.assertEqual(self.client.get(reverse('health')).status_code, status.HTTP_200_OK)
+
+        import_csv_from_filesystem(repository=DjangoPrizeRepository(), folder_path=folder_path)
+        self.import_progress.finish()
+        self.assertEqual(self.client.get(reverse('get_prize_interval_summary')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('ready')).json()["progress"], 100.0)
+
+        # A later import does not make the application unavailable.
+        self.import_progress.start([csv_file_name])
+        self.assertEqual(self.client.get(reverse('get_prize_interval_summary')).status_code, status.HTTP_200_OK)
+
+    def test_if_the_import_script_finishes_the_progress(self):
+        with self.assertLogs("scripts.background_import", level="INFO") as logs:
+            start_import(import_progress=self.import_progress,
+                         folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default", background=False, watch=False,
+                         migrate=False, lock_path=None)
+        self.assertEqual((self.import_progress.state, self.import_progress.percent()), ("completed", 100.0))
+        self.assertTrue(Prize.objects.exists())
+        self.assertIn("343 of 343 producers data imported", logs.output[-1])
+
+        self.import_progress = ImportProgress()
+        application_container.import_progress.override(self.import_progress)
+        with self.assertLogs("scripts.background_import", level="ERROR"):
+            start_import(import_progress=self.import_progress,
+                         folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/empty_folder", background=False,
+                         watch=False, migrate=False, lock_path=None)
+        self.assertEqual(self.import_progress.state, "failed")
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn("no csv file uploaded", response.json()["error"])
+
+    def test_if_only_the_process_that_holds_the_lock_imports_the_files(self):
+        with tempfile.TemporaryDirectory() as folder_path, \
+                open(os.path.join(folder_path, "import.lock"), "a") as lock_file:
+            # The lock is held by another open file, as it would be by another process.
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            with self.assertLogs("scripts.background_import", level="INFO") as logs:
+                thread = start_import(import_progress=self.import_progress,
+                                      folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default", background=False,
+                                      watch=False, migrate=False, lock_path=lock_file.name)
+        self.assertIsNone(thread)
+        self.assertIn("imported by another process", logs.output[-1])
+        self.assertEqual(self.import_progress.state, "idle")
+        self.assertFalse(Prize.objects.exists())
+
+
+class TestWatchedCSVFolder(APITestCase):
+
+    def setUp(self):
+        delete_all_items()
+        self.folder = tempfile.TemporaryDirectory()
+        self.csv_file_name = os.path.join(self.folder.name, "movielist.csv")
+        shutil.copy(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "default", "movielist_default.csv"),
+                    self.csv_file_name)
+
+    def tearDown(self):
+        self.folder.cleanup()
+        delete_all_items()
+
+    def append_row(self, row: str):
+        with open(self.csv_file_name, "a") as csv_file:
+            csv_file.write(row + "\n")
+
+    def test_if_the_watcher_only_reports_the_files_that_stopped_changing(self):
+        changes = []
+        watcher = CSVFolderWatcher(self.folder.name, lambda: changes.append(True))
+        self.assertFalse(watcher.poll())
+
+        self.append_row("2030;New Movie;New Studios;New Producer;yes")
+        self.assertFalse(watcher.poll())
+        self.assertTrue(watcher.poll())
+        self.assertFalse(watcher.poll())
+
+        shutil.copy(self.csv_file_name, os.path.join(self.folder.name, "other.csv"))
+        self.assertFalse(watcher.poll())
+        self.append_row("2031;Other Movie;New Studios;New Producer;yes")
+        self.assertFalse(watcher.poll())
+        self.assertTrue(watcher.poll())
+        self.assertEqual(len(changes), 2)
+
+    def test_if_the_ingestion_swaps_the_results_once_after_it_commits(self):
+        import_csv_from_filesystem_if_changed(folder_path=self.folder.name)
+        result_cache.bump_version()
+        self.assertEqual(self.client.get(reverse('get_prize_interval_summary')).data["max"][0]["interval"], 13)
+
+        self.append_row("2040;New Movie;New Studios;Matthew Vaughn;yes")
+        version = result_cache.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_csv_folder(folder_path=self.folder.name)
+        self.assertGreater(result_cache.version(), version)
+        self.assertEqual(interval_index.version, result_cache.version())
+
+        with CaptureQueriesContext(connection) as queries, \
+                application_container.config.prize_interval_filter_engine.override("indexed"):
+            response = self.client.get(reverse('get_prize_interval_summary'))
+        self.assertEqual(response.data["max"][0], {
+            "producer": "Matthew Vaughn", "interval": 25, "previousWin": 2015, "followingWin": 2040})
+        # Only the dataset version is read, if it is kept in the database (see DATASET_VERSION_STORE).
+        self.assertEqual([query["sql"] for query in queries.captured_queries
+                          if "app_" in query["sql"] and "app_datasetversion" not in query["sql"]], [])
+
+    def test_if_a_failed_ingestion_keeps_the_previous_data(self):
+        import_csv_from_filesystem_if_changed(folder_path=self.folder.name)
+        prizes = Prize.objects.count()
+        version = result_cache.version()
+
+        self.append_row("2040;New Movie;New Studios;New Producer;yes")
+        with open(os.path.join(self.folder.name, "invalid.csv"), "w") as csv_file:
+            csv_file.write("year;name\n2041;Invalid Movie\n")
+        with self.assertRaises(ImportCSVFromFileSystemException):
+            ingest_csv_folder(folder_path=self.folder.name)
+        self.assertEqual(Prize.objects.count(), prizes)
+        self.assertEqual(result_cache.version(), version)
+
+    def test_if_the_columnar_repository_is_replaced_at_once(self):
+        repository = InMemoryColumnarPrizeRepository()
+        import_csv_from_filesystem(repository=repository, folder_path=self.folder.name)
+        self.append_row("2040;New Movie;New Studios;Matthew Vaughn;yes")
+        with application_container.config.prize_repository.override("columnar"):
+            ingest_csv_folder(repository=repository, folder_path=self.folder.name)
+        imported_repository = InMemoryColumnarPrizeRepository()
+        import_csv_from_filesystem(repository=imported_repository, folder_path=self.folder.name)
+        self.assertEqual([(x.year, x.producer) for x in repository.all_winners()],
+                         [(x.year, x.producer) for x in imported_repository.all_winners()])
+        self.assertIn((2040, "Matthew Vaughn"), [(x.year, x.producer) for x in repository.all_winners()])
+
+    def test_if_only_the_changes_are_ingested_into_a_copy_of_the_columnar_repository(self):
+        repository = InMemoryColumnarPrizeRepository(result_cache=ResultCache(), interval_index=PrizeIntervalIndex())
+        gap_repository = InMemoryProducerGapRepository()
+        import_csv_from_filesystem_if_changed(
+            repository=repository, folder_path=self.folder.name, mode="delta", gap_repository=gap_repository)
+        import_csv_from_stream(
+            io.BytesIO(b"year;title;studios;producers;winner\n2045;Uploaded Movie;Studios;Bo Derek;yes\n"),
+            "upload", repository=repository, gap_repository=gap_repository)
+        with open(self.csv_file_name) as csv_file:
+            lines = csv_file.readlines()
+        with open(self.csv_file_name, "w") as csv_file:
+            csv_file.writelines(lines[:1] + lines[2:])
+
+        with application_container.config.prize_repository.override("columnar"):
+            failed_count, producers_count, row_count, _ = ingest_csv_folder(
+                repository=repository, gap_repository=gap_repository, folder_path=self.folder.name, mode="delta")
+        self.assertEqual((failed_count, producers_count, row_count), (0, 0, 1))
+        winners = [(x.year, x.name) for x in repository.all_winners()]
+        self.assertIn((2045, "Uploaded Movie"), winners)
+        self.assertNotIn((1980, "Can't Stop the Music"), winners)
+        self.assertEqual(gap_repository.page("-interval", 1)[0].producer, "Bo Derek")
+
+
+class TestImportPrizesView(ResultCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        delete_all_items()
+        self.import_jobs = ImportJobs()
+        application_container.import_jobs.override(self.import_jobs)
+        self.enterContext(application_container.config.prizes_import_token.override("secret"))
+        self.enterContext(application_container.config.writes_while_serving.override(True))
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+        with open(os.path.join(PATH_CSV_FILES_FOLDER_TESTS, "default", "movielist_default.csv"), "rb") as csv_file:
+            self.content = csv_file.read()
+
+    def tearDown(self):
+        application_container.import_jobs.reset_override()
+        delete_all_items()
+
+    def post(self, content: bytes, content_type: str = "text/csv"):
+        with application_container.config.prizes_import_in_background.override(False):
+            return self.client.post(reverse('import_prizes'), data=content, content_type=content_type)
+
+    def test_if_it_imports_the_uploaded_file_with_the_same_rules_of_the_folder(self):
+        content = self.content + b"2041;Invalid Movie;Studios;Producer;maybe\n"
+        response = self.post(content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        job = response.json()
+        self.assertEqual((job["state"], job["rowCount"], job["failedCount"]), ("completed", 208, 1))
+        self.assertEqual(job["rejectedRows"][0]["row"], 208)
+        self.assertEqual(response["Location"], reverse('get_import_job', args=[job["jobId"]]))
+        self.assertEqual(self.client.get(response["Location"]).json(), job)
+
+        # The job is also answered by the other processes that share the database.
+        with application_container.import_jobs.override(ImportJobs()):
+            self.assertEqual(self.client.get(response["Location"]).json(), job)
+
+        prizes = set(Prize.objects.values_list("year", "movie__name", "movie__producer__name", "winner"))
+        delete_all_items()
+        import_csv_from_filesystem(folder_path=f"{PATH_CSV_FILES_FOLDER_TESTS}/default/")
+        self.assertEqual(prizes, set(Prize.objects.values_list("year", "movie__name", "movie__producer__name", "winner")))
+        self.assertEqual(self.client.get(reverse('get_prize_interval_summary')).status_code, status.HTTP_200_OK)
+
+    def test_if_it_decompresses_the_gzip_files(self):
+        response = self.post(gzip.compress(self.content), "application/gzip")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        job = response.json()
+        self.assertEqual((job["rowCount"], job["producersCount"], job["failedCount"]), (207, 343, 0))
+
+    def test_if_the_invalid_files_and_the_large_uploads_are_refused(self):
+        response = self.post(b"year;name\n2041;Movie\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("invalid column name", response.json()["error"])
+        self.assertEqual(self.client.get(reverse('get_import_job', args=["unknown"])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+        with self.assertRaises(UploadTooLargeException):
+            start_upload_import(io.BytesIO(self.content), background=False, max_size=100)
+        self.assertFalse(Prize.objects.exists())
+
+    def test_if_the_uploads_require_the_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer wrong")
+        response = self.post(self.content)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('get_import_job', args=["unknown"])).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        with application_container.config.prizes_import_token.override(None):
+            self.assertEqual(self.post(self.content).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+        with application_container.config.writes_while_serving.override(False):
+            self.assertEqual(self.post(self.content).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Prize.objects.exists())
@@ -1,7 +1,20 @@
 from django.urls import path, include
-from app.views import get_prize_interval_summary
+from app.views import (
+    get_import_job, get_prize_interval_summary, get_prize_interval_summary_async, get_producer_intervals, health,
+    import_prizes, metrics, ready)
 
 urlpatterns = [
     path("api/v1/prizes_interval", get_prize_interval_summary,
-         name="get_prize_interval_summary")
+         name="get_prize_interval_summary"),
+    path("api/v1/prizes_interval/async", get_prize_interval_summary_async,
+         name="get_prize_interval_summary_async"),
+    path("api/v1/producers/intervals", get_producer_intervals,
+         name="get_producer_intervals"),
+    path("api/v1/prizes/import", import_prizes,
+         name="import_prizes"),
+    path("api/v1/prizes/import/<str:job_id>", get_import_job,
+         name="get_import_job"),
+    path("metrics", metrics, name="metrics"),
+    path("health", health, name="health"),
+    path("ready", ready, name="ready")
 ]
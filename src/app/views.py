@@ -1,24 +1,123 @@
+import base64
+import binascii
+from functools import wraps
+import hmac
+import json
+from typing import Optional, Tuple
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBase, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from app.serializer import PrizeIntervalSerializer
 from usecases.usecases import (
+    ListProducerGaps as ListProducerGapsUseCase,
     ShowHighestAndLowestPrizeIntervals as ShowHighestAndLowestPrizeIntervalsUseCase)
 from infra.django_prize_repository import DjangoPrizeRepository
+from infra.import_jobs import ImportJobs
+from infra.import_progress import ImportProgress
+from infra.metrics import instrument, registry
+from infra.result_cache import ResultCache
+from repository.filters import Filter
+from repository.producer_gap_repository import ProducerGapRepository
+from scripts.import_csv_upload import UploadTooLargeException, start_upload_import
 from dependency_injector.wiring import inject, Provide
 from texo.containers import ApplicationContainer
+from texo.settings import (
+    IMPORT_RETRY_AFTER, PRIZE_INTERVAL_CACHE_MAX_AGE, PRODUCER_GAPS_MAX_PAGE_SIZE, PRODUCER_GAPS_PAGE_SIZE)
 
 
+@inject
+def _import_progress(import_progress: ImportProgress = Provide[ApplicationContainer.import_progress]) -> ImportProgress:
+    return import_progress
+
+
+def _not_ready_response(import_progress: ImportProgress) -> JsonResponse:
+    error = "The data is being imported, try again later." if import_progress.error is None else \
+        f"The data was not imported: {import_progress.error}"
+    response = JsonResponse({"error": error, **import_progress.dict()},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response["Retry-After"] = str(IMPORT_RETRY_AFTER)
+    return response
+
+
+def require_ready(view):
+    """The decorated view answers 503 (Service Unavailable) with a Retry-After of IMPORT_RETRY_AFTER
+    seconds until the first import of the CSV files completes (see infra.import_progress)."""
+    if iscoroutinefunction(view):
+        async def async_wrapper(request, *args, **kwargs):
+            import_progress = _import_progress()
+            if not import_progress.is_ready():
+                return _not_ready_response(import_progress)
+            return await view(request, *args, **kwargs)
+        return markcoroutinefunction(wraps(view)(async_wrapper))
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        import_progress = _import_progress()
+        if not import_progress.is_ready():
+            return _not_ready_response(import_progress)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@inject
+def _import_token(token: Optional[str] = Provide[ApplicationContainer.config.prizes_import_token]) -> Optional[str]:
+    return token
+
+
+def require_import_token(view):
+    """The decorated view answers 403 (Forbidden) if the uploads are disabled (PRIZES_IMPORT_TOKEN is None),
+    or 401 (Unauthorized) if the request does not send the token as 'Authorization: Bearer <token>'."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _import_token()
+        if not token:
+            return JsonResponse({"error": "The import of the uploaded files is disabled."},
+                                status=status.HTTP_403_FORBIDDEN)
+        scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.strip().encode(), token.encode()):
+            response = JsonResponse({"error": "The import token is invalid."}, status=status.HTTP_401_UNAUTHORIZED)
+            response["WWW-Authenticate"] = "Bearer"
+            return response
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@transaction.non_atomic_requests
+@require_ready
 @api_view(["GET"])
 @inject
 def get_prize_interval_summary(
         request,
-        repository: DjangoPrizeRepository = Provide[ApplicationContainer.prize_repository]):
+        repository: DjangoPrizeRepository = Provide[ApplicationContainer.prize_repository],
+        result_cache: ResultCache = Provide[ApplicationContainer.result_cache],
+        interval_filter: Filter = Provide[ApplicationContainer.prize_interval_filter],
+        rendering: str = Provide[ApplicationContainer.config.prize_interval_response_rendering]):
     """
     This view gets two lists (min and max) from the usecase called ShowHighestAndLowestPrizeIntervalsUseCase.
     As the DTO Output from this usecase has a presenter method called dict, which returns the data for the specs 
-    response format, those lists are iterated to pass this dict format to PrizeIntervalSerializer, which will
-    return the right response.
+    response format, those lists are iterated to build the response.
+
+    The rendering (the PRIZE_INTERVAL_RESPONSE_RENDERING constant from texo.settings) can be:
+    - 'serializer': the lists are validated by the PrizeIntervalSerializer, which returns the right response.
+    - 'precomputed': as the lists are built by the application, they are not validated again, and the
+    PrizeIntervalSerializer is only the documentation of the response schema.
+    - 'encoded': the same of 'precomputed', but the response is encoded to JSON only once for each dataset
+    version.
+
+    The successful responses are sent with an ETag and a Last-Modified derived from the repository dataset
+    version, and a Cache-Control that allows the clients and CDNs to keep them for PRIZE_INTERVAL_CACHE_MAX_AGE
+    seconds. If the request has an If-None-Match of the current dataset version, it is answered with 304 (Not
+    Modified) without executing the filter. The If-Modified-Since is not used, because the Last-Modified only
+    has seconds and the dataset can change more than once in the same second.
 
     If the min and the max lists are empty, it indicates that the database is empty, responding and internal error 
     and requesting to user fix the problem and try again later.
@@ -26,22 +125,328 @@ def get_prize_interval_summary(
     In case of an unexpected exception happen, there is a try-except which will get this unknown exception and then
     it will return to use a Unexpected error with internal error status code as well.
 
-    There is a injection of the DjangoPrizeRepository from the dependency injector container, which is done by
-    the @inject decorator.
+    There is a injection of the DjangoPrizeRepository, the ResultCache and the interval Filter from the dependency
+    injector container, which is done by the @inject decorator.
+
+    As the intervals only change when the data is written, the serialized response is saved in the ResultCache
+    with the repository dataset version, so it is only computed again after the next write.
+
+    This view only reads the data, so it is not wrapped in the transaction of the ATOMIC_REQUESTS, which
+    would keep a transaction open (and, in the 'sqlite' DATABASE_PROFILE, a read snapshot) on each request.
+
+    Until the first import of the CSV files completes, it answers 503 (Service Unavailable) with a Retry-After
+    (see the require_ready decorator).
     """
 
     try:
-        elements: ShowHighestAndLowestPrizeIntervalsUseCase.DTOOutput = ShowHighestAndLowestPrizeIntervalsUseCase(
-            repository).execute()
-        prize_info_serializers = PrizeIntervalSerializer(data={
-            "min": [x.dict() for x in elements._min],
-            "max": [x.dict() for x in elements._max]
-        })
-        if prize_info_serializers.is_valid():
-            if not prize_info_serializers['min'].value and not prize_info_serializers['max'].value:
-                return Response(data={
-                    "error": "Database is empty. Your CSV file must be empty or with some issues, fix it and run the application later."
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            return Response(data=prize_info_serializers.data)
+        version, etag, last_modified = _dataset_validators(result_cache)
+        not_modified = _not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        if rendering == "encoded":
+            response = _encoded_response(*_get_encoded_prize_interval_summary(
+                repository, result_cache, interval_filter, version))
+        else:
+            data, status_code = _get_prize_interval_summary(
+                repository, result_cache, interval_filter, rendering, version)
+            response = Response(data=data, status=status_code)
+        return _with_cache_headers(response, etag, last_modified)
     except Exception:
         return Response(data={"error": "Unexpected error ocurred."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@transaction.non_atomic_requests
+@require_ready
+@require_GET
+@inject
+async def get_prize_interval_summary_async(
+        request,
+        repository: DjangoPrizeRepository = Provide[ApplicationContainer.prize_repository],
+        result_cache: ResultCache = Provide[ApplicationContainer.result_cache],
+        interval_filter: Filter = Provide[ApplicationContainer.prize_interval_filter],
+        rendering: str = Provide[ApplicationContainer.config.prize_interval_response_rendering]):
+    """
+    This is the async variant of the get_prize_interval_summary view, with the same responses, to be
+    served by an ASGI server (see texo.asgi).
+
+    The repositories and the filters are sync, so the summary is got in a thread by sync_to_async, and
+    the event loop keeps serving the other requests meanwhile.
+
+    Django does not support ATOMIC_REQUESTS in async views, and this view only reads the data, so it
+    is not wrapped in a transaction.
+    """
+
+    try:
+        version, etag, last_modified = await sync_to_async(_dataset_validators)(result_cache)
+        not_modified = _not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        if rendering == "encoded":
+            response = _encoded_response(*await sync_to_async(_get_encoded_prize_interval_summary)(
+                repository, result_cache, interval_filter, version))
+        else:
+            data, status_code = await sync_to_async(_get_prize_interval_summary)(
+                repository, result_cache, interval_filter, rendering, version)
+            response = JsonResponse(data=data, status=status_code)
+        return _with_cache_headers(response, etag, last_modified)
+    except Exception:
+        return JsonResponse(data={"error": "Unexpected error ocurred."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _get_prize_interval_summary(repository: DjangoPrizeRepository, result_cache: ResultCache, interval_filter: Filter, rendering: str, version: int) -> Tuple[dict, int]:
+    """It returns the cached response data and status code, computing them if the data changed."""
+    return result_cache.get_or_compute(
+        f"prize_interval_summary.{rendering}",
+        version,
+        lambda: _compute_prize_interval_summary(repository, interval_filter, rendering))
+
+
+def _get_encoded_prize_interval_summary(repository: DjangoPrizeRepository, result_cache: ResultCache, interval_filter: Filter, version: int) -> Tuple[bytes, int]:
+    """It returns the cached (JSON body, status code) of the response, computing them if the data changed."""
+    def compute() -> Tuple[bytes, int]:
+        data, status_code = _compute_prize_interval_summary(repository, interval_filter, "precomputed")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), status_code
+    return result_cache.get_or_compute("prize_interval_summary.encoded", version, compute)
+
+
+def _encoded_response(body: bytes, status_code: int) -> HttpResponse:
+    return HttpResponse(body, status=status_code, content_type="application/json")
+
+
+def _dataset_validators(result_cache: ResultCache) -> Tuple[int, str, float]:
+    """Returns the dataset version with its ETag and Last-Modified timestamp, read at once from the
+    ResultCache (which keeps the version that the repository bumps). As the version is a counter that
+    starts again with the process (or the cache) if it is not kept in the database (see
+    DATASET_VERSION_STORE at texo.settings), the time of the version is part of the ETag. It is a weak
+    ETag because the sync and the async views encode the same data with different spaces."""
+    version, modified_at = result_cache.dataset_state()
+    return version, f'W/"{version}-{int(modified_at * 1000)}"', modified_at
+
+
+def _not_modified_response(request, etag: str, last_modified: float) -> Optional[HttpResponseBase]:
+    """Returns the 304 (Not Modified) response if the client already has the response of this dataset version.
+    Only the ETag is compared, since two versions of the same second have the same Last-Modified."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        return None
+    return _with_cache_headers(response, etag, last_modified)
+
+
+def _with_cache_headers(response: HttpResponseBase, etag: str, last_modified: float) -> HttpResponseBase:
+    """Only the successful (and not modified) responses can be cached."""
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(int(last_modified))
+        patch_cache_control(response, public=True, max_age=PRIZE_INTERVAL_CACHE_MAX_AGE)
+    return response
+
+
+def _compute_prize_interval_summary(repository: DjangoPrizeRepository, interval_filter: Filter, rendering: str) -> Tuple[dict, int]:
+    """It returns the response data and status code of the get_prize_interval_summary view. The data is only
+    validated by the PrizeIntervalSerializer if the rendering is 'serializer'."""
+    elements: ShowHighestAndLowestPrizeIntervalsUseCase.DTOOutput = ShowHighestAndLowestPrizeIntervalsUseCase(
+        repository, interval_filter).execute()
+    data = {
+        "min": [x.dict() for x in elements._min],
+        "max": [x.dict() for x in elements._max]
+    }
+    if rendering == "serializer":
+        prize_info_serializers = PrizeIntervalSerializer(data=data)
+        with instrument("prize_interval_serializer.is_valid"):
+            is_valid = prize_info_serializers.is_valid()
+        if not is_valid:
+            raise ValueError(prize_info_serializers.errors)
+        data = dict(prize_info_serializers.data)
+    if not data["min"] and not data["max"]:
+        return {
+            "error": "Database is empty. Your CSV file must be empty or with some issues, fix it and run the application later."
+        }, status.HTTP_500_INTERNAL_SERVER_ERROR
+    return data, status.HTTP_200_OK
+
+
+@transaction.non_atomic_requests
+@require_ready
+@api_view(["GET"])
+@inject
+def get_producer_intervals(
+        request,
+        gap_repository: ProducerGapRepository = Provide[ApplicationContainer.producer_gap_repository]):
+    """
+    This view lists every interval between two consecutive wins of each producer, page by page, from the
+    producer gaps table, which is updated by the imports in the same transaction of the prizes (see the
+    refresh_producer_gaps script), so this view only reads it.
+
+    The query parameters are:
+    - ordering: 'interval' (default), '-interval' or 'producer' (then by the previous win).
+    - min_year and max_year: only the intervals with both wins inside the years range.
+    - min_interval and max_interval: only the intervals inside this range.
+    - page_size: by default PRODUCER_GAPS_PAGE_SIZE, up to PRODUCER_GAPS_MAX_PAGE_SIZE.
+    - cursor: the cursor of the next page, which is informed in the 'next' URL of the previous page.
+
+    The pages use keyset pagination: the cursor has the key of the last interval of the previous page, so
+    each page is read from the database index after this key, whatever the page number is.
+
+    If a parameter is invalid, it returns a bad request with the error.
+
+    As the get_prize_interval_summary, it is not wrapped in the transaction of the ATOMIC_REQUESTS, as the
+    pages are only read.
+    """
+
+    try:
+        ordering = request.query_params.get("ordering", "interval")
+        filters = {name: _int_query_param(request, name) for name in [
+            "min_year", "max_year", "min_interval", "max_interval"]}
+        page_size = _int_query_param(request, "page_size")
+        if page_size is None:
+            page_size = PRODUCER_GAPS_PAGE_SIZE
+        if page_size < 1 or page_size > PRODUCER_GAPS_MAX_PAGE_SIZE:
+            raise ValueError(f"The page_size must be between 1 and {PRODUCER_GAPS_MAX_PAGE_SIZE}")
+        after = _decode_cursor(request.query_params.get("cursor"), ordering)
+    except ValueError as ex:
+        return Response(data={"error": str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        output = ListProducerGapsUseCase(
+            gap_repository, ordering=ordering, limit=page_size, after=after, **filters).execute()
+        if output.status == "FAILED":
+            return Response(data={"error": output.msg}, status=status.HTTP_400_BAD_REQUEST)
+        if output.status != "OK":
+            raise ValueError(output.msg)
+        next_url = None
+        if output.next is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", _encode_cursor(output.next))
+        return Response(data={
+            "results": [gap.dict() for gap in output.gaps],
+            "next": next_url
+        }, status=status.HTTP_200_OK)
+    except Exception:
+        return Response(data={"error": "Unexpected error ocurred."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _int_query_param(request, name: str) -> Optional[int]:
+    value = request.query_params.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"The {name} must be an integer")
+
+
+def _encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: Optional[str], ordering: str) -> Optional[tuple]:
+    """Returns the key of the cursor, checking that it has the fields of the ordering."""
+    if not cursor:
+        return None
+    fields = ProducerGapRepository.ORDERINGS.get(ordering)
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise ValueError("The cursor is invalid")
+    if fields is None or not isinstance(key, list) or len(key) != len(fields) or not all(
+            isinstance(value, str if field == "producer" else int) for field, value in zip(fields, key)):
+        raise ValueError("The cursor is invalid")
+    return tuple(key)
+
+
+@csrf_exempt
+@transaction.non_atomic_requests
+@require_POST
+@require_import_token
+@require_ready
+@inject
+def import_prizes(request, writes_while_serving: bool = Provide[ApplicationContainer.config.writes_while_serving]):
+    """
+    This view imports the CSV file (or the gzip compressed CSV file) that is sent as the body of the request,
+    with the same columns and rules of the CSV files of the folder, by the start_upload_import script (see
+    scripts.import_csv_upload). The body is read chunk by chunk, so it is never kept in memory.
+
+    It answers the import job (see infra.import_jobs) with its id and the counts of the rows, the producers
+    and the failed producers (with the first rejected rows), and its URL in the Location header:
+    - 202 (Accepted) if the file is being imported in the background (PRIZES_IMPORT_IN_BACKGROUND);
+    - 201 (Created) if it was imported, and 400 (Bad Request) if the file is not valid (e.g. an invalid column);
+    - 413 (Content Too Large) if the upload is larger than PRIZES_IMPORT_MAX_UPLOAD_SIZE bytes.
+
+    The token of PRIZES_IMPORT_TOKEN is required (see the require_import_token decorator).
+
+    The import has its own transaction (see the import_csv_from_stream script), which is committed before the
+    job is finished, so it is not wrapped in the transaction of the ATOMIC_REQUESTS. Until the first import of
+    the CSV files of this process completes, it answers 503 (Service Unavailable) with a Retry-After (see the
+    require_ready decorator), as the first import may delete all the data, with the uploaded prizes (see
+    CSV_IMPORT_MODE at texo.settings).
+
+    If the data can not be written while the requests are answered (see WRITES_WHILE_SERVING at texo.settings),
+    the uploads are refused with 403 (Forbidden), as the readers of the other requests would fail.
+    """
+    if not writes_while_serving:
+        return JsonResponse({"error": "The import of the uploaded files is disabled with the 'memory' database "
+                                      "profile, whose readers fail while the data is written."},
+                            status=status.HTTP_403_FORBIDDEN)
+    try:
+        job = start_upload_import(request)
+    except UploadTooLargeException as ex:
+        return JsonResponse({"error": str(ex)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    status_code = {
+        "running": status.HTTP_202_ACCEPTED,
+        "completed": status.HTTP_201_CREATED,
+        "failed": status.HTTP_400_BAD_REQUEST
+    }[job.state]
+    response = JsonResponse(job.dict(), status=status_code)
+    response["Location"] = reverse("get_import_job", args=[job.id])
+    return response
+
+
+@transaction.non_atomic_requests
+@require_GET
+@require_import_token
+@inject
+def get_import_job(request, job_id: str, import_jobs: ImportJobs = Provide[ApplicationContainer.import_jobs]):
+    """
+    It answers the state and the counts of the import job of an uploaded CSV file (see the import_prizes view),
+    which may have been imported by another process that shares the database, or 404 (Not Found) if the job
+    is not one of the last ones. The token of PRIZES_IMPORT_TOKEN is required, as in the import_prizes view.
+    """
+    job = import_jobs.find(job_id)
+    if job is None:
+        return JsonResponse({"error": "The import job was not found."}, status=status.HTTP_404_NOT_FOUND)
+    return JsonResponse(job)
+
+
+@transaction.non_atomic_requests
+@require_GET
+def metrics(request):
+    """
+    It returns the metrics of this process (see infra.metrics) in the Prometheus text format: the duration
+    histograms and the database queries of the repositories, the interval filters, the serializer validation
+    and the import stages, and the rows and producers read by the import.
+    """
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@transaction.non_atomic_requests
+@require_GET
+def health(request):
+    """
+    It is the liveness endpoint: it answers while the process can serve the requests, even during the import
+    of the CSV files.
+    """
+    return JsonResponse({"status": "ok"})
+
+
+@transaction.non_atomic_requests
+@require_GET
+@inject
+def ready(request, import_progress: ImportProgress = Provide[ApplicationContainer.import_progress]):
+    """
+    It is the readiness endpoint: it answers the state and the progress (%) of the import of the CSV files (see
+    infra.import_progress), with 200 (OK) after the first import completes, or 503 (Service Unavailable) with a
+    Retry-After before it.
+    """
+    if not import_progress.is_ready():
+        return _not_ready_response(import_progress)
+    return JsonResponse(import_progress.dict())
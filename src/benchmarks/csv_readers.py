@@ -0,0 +1,59 @@
+"""Benchmark of the CSV readers of the import pipeline.
+
+It writes a synthetic movielist CSV file and measures the rows per second of the 'csv'
+(read_rows + map_columns, with csv.DictReader) and the 'mmap' (read_mapped_rows_mmap)
+stages. With --pipeline, the whole pipeline (until the validate_rows stage) is measured
+with each reader too.
+
+Run it from the src folder:
+
+    python -m benchmarks.csv_readers --rows 2000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import deque
+from benchmarks.synthetic import write_movielist_csv
+from scripts.csv_file_parser import CSVFileStats, csv_file_pipeline, map_columns, read_mapped_rows_mmap, read_rows
+
+
+def measure(rows_generator) -> float:
+    """Returns the seconds to consume the generator."""
+    start = time.perf_counter()
+    deque(rows_generator, maxlen=0)
+    return time.perf_counter() - start
+
+
+def run(csv_file_name: str, pipeline: bool = False) -> dict:
+    results = {
+        "csv reader": measure(map_columns(read_rows(csv_file_name, CSVFileStats()))),
+        "mmap reader": measure(read_mapped_rows_mmap(csv_file_name, CSVFileStats())),
+    }
+    if pipeline:
+        results["csv pipeline"] = measure(csv_file_pipeline(
+            csv_file_name, CSVFileStats(), reader="csv"))
+        results["mmap pipeline"] = measure(csv_file_pipeline(
+            csv_file_name, CSVFileStats(), reader="mmap"))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--producers", type=int, default=50_000)
+    parser.add_argument("--pipeline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        csv_file_name = os.path.join(folder_path, "movielist.csv")
+        write_movielist_csv(csv_file_name, args.rows, args.producers)
+        results = run(csv_file_name, args.pipeline)
+
+    print(f"{args.rows} rows")
+    for name, seconds in results.items():
+        print(f"{name:16} {seconds:8.2f} s {args.rows / seconds:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Benchmark of the database profiles (see the DATABASE_PROFILE at texo.settings) under concurrent load.
+
+Each profile runs in a new process, with the Django settings of the profile, and:
+- the synthetic movielist CSV file (see benchmarks.synthetic) is imported;
+- the WSGI get_prize_interval_summary view is loaded by concurrent clients (see benchmarks.http_load),
+  with the dataset version bumped before each request, so the winners are read on every request;
+- the same load runs while a writer thread creates prizes one by one, and the prizes written per
+  second are reported with the latency of the readers.
+
+The 'sqlite' profile uses a database file in a temporary folder. The 'postgresql' profile needs a
+running server (see the DATABASE_* environment variables); if it can not connect, the error is
+reported instead of the results. The --pool option sets the DATABASE_POOL of the 'postgresql' profile.
+
+Run it from the src folder:
+
+    python -m benchmarks.database_profiles --rows 20000 --clients 16 --requests 20
+    python -m benchmarks.database_profiles --profiles memory sqlite postgresql --pool local
+"""
+import argparse
+import contextlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = ["memory", "sqlite", "postgresql"]
+
+
+def _write_prizes(stop: threading.Event, written: list):
+    from django.db import connection
+    from infra.django_prize_repository import DjangoPrizeRepository
+    from repository.prize_repository import MovieInputDTO
+
+    repository = DjangoPrizeRepository()
+    try:
+        while not stop.is_set():
+            year = 1900 + len(written) % 199
+            try:
+                repository.create(year=year, winner=True, movie=MovieInputDTO(
+                    _id=None, name=f"Concurrent movie {len(written)}",
+                    producer_name="Concurrent producer", studio_name="Concurrent studios"))
+                written.append(True)
+            except Exception:
+                written.append(False)
+    finally:
+        connection.close()
+
+
+def _run_profile(profile: str, pool: str, folder_path: str, clients: int, requests: int, results):
+    os.environ["DATABASE_PROFILE"] = profile
+    os.environ["DATABASE_POOL"] = pool
+    if profile == "sqlite":
+        os.environ["DATABASE_NAME"] = os.path.join(folder_path, "db.sqlite3")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texo.settings")
+    try:
+        import django
+        with contextlib.redirect_stdout(sys.stderr):
+            django.setup()
+        from django.core import management
+        management.call_command("migrate", verbosity=0)
+        from benchmarks.http_load import WSGI_PATH, wsgi_load
+        from infra.django_prize_repository import DjangoPrizeRepository
+        from infra.result_cache import result_cache
+        from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem
+
+        repository = DjangoPrizeRepository()
+        repository.delete_all()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            import_csv_from_filesystem(repository=repository, folder_path=folder_path)
+        result = {"import_seconds": time.perf_counter() - start}
+        result["reads"] = wsgi_load(WSGI_PATH, clients, requests, result_cache.bump_version)
+
+        stop = threading.Event()
+        written = []
+        writer = threading.Thread(target=_write_prizes, args=(stop, written))
+        start = time.perf_counter()
+        writer.start()
+        result["reads_with_writer"] = wsgi_load(WSGI_PATH, clients, requests, result_cache.bump_version)
+        stop.set()
+        writer.join()
+        seconds = time.perf_counter() - start
+        result["writer"] = {
+            "writes_per_second": sum(written) / seconds,
+            "errors": len(written) - sum(written),
+        }
+        results.put(result)
+    except Exception as ex:
+        results.put({"error": f"{type(ex).__name__}: {ex}"})
+
+
+def run_profile(profile: str, pool: str, folder_path: str, clients: int, requests: int) -> dict:
+    """Runs the profile in a new process, as the database settings are read once by Django."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=_run_profile, args=(profile, pool, folder_path, clients, requests, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def print_results(results: dict):
+    print(f"{'':11} {'import s':>9} {'read p50':>9} {'read p99':>9} {'req/s':>8} "
+          f"{'w/ writer p99':>14} {'req/s':>8} {'writes/s':>9} {'errors':>7}")
+    for profile, result in results.items():
+        if "error" in result:
+            print(f"{profile:11} {result['error']}")
+            continue
+        reads, reads_with_writer, writer = result["reads"], result["reads_with_writer"], result["writer"]
+        print(f"{profile:11} {result['import_seconds']:9.2f} {reads['p50_ms']:9.2f} {reads['p99_ms']:9.2f} "
+              f"{reads['requests_per_second']:8.1f} {reads_with_writer['p99_ms']:14.2f} "
+              f"{reads_with_writer['requests_per_second']:8.1f} {writer['writes_per_second']:9.1f} "
+              f"{reads['errors'] + reads_with_writer['errors'] + writer['errors']:7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["memory", "sqlite"], choices=PROFILES)
+    parser.add_argument("--pool", default="none", choices=["none", "local", "pgbouncer"],
+                        help="DATABASE_POOL of the postgresql profile")
+    parser.add_argument("--rows", type=int, default=20_000,
+                        help="rows of the synthetic CSV file")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20,
+                        help="quantity of requests of each client")
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import write_movielist_csv
+    results = {}
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as folder_path:
+            write_movielist_csv(os.path.join(folder_path, "movielist.csv"), args.rows)
+            results[profile] = run_profile(profile, args.pool, folder_path, args.clients, args.requests)
+
+    print(f"{args.rows} rows, {args.clients} clients x {args.requests} requests (ms, uncached)")
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark of the delta import (import_csv_from_filesystem_delta) against the full import of a
+mostly unchanged file.
+
+A synthetic movielist CSV file (see benchmarks.synthetic) is imported to a SQLite database file in
+a temporary folder. Then the file is changed in two ways, and each change is imported by the delta
+import and by the full import (deleting and importing all the data, as the 'full' CSV_IMPORT_MODE):
+- append: --changes new rows are appended to the file;
+- modify: --changes rows in the middle of the file have their winner column switched.
+
+For each one, it reports the seconds and the write queries (INSERT, UPDATE and DELETE) sent to the
+database.
+
+Run it from the src folder:
+
+    python -m benchmarks.delta_import --rows 100000 --changes 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def count_writes(function) -> tuple:
+    from django.db import connection
+    writes = 0
+
+    def count_write(execute, sql, params, many, context):
+        nonlocal writes
+        if sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            writes += 1
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(count_write):
+        function()
+    return time.perf_counter() - start, writes
+
+
+def append_rows(csv_file_name: str, rows: int, changes: int):
+    with open(csv_file_name, "a") as csv_file:
+        for row in range(rows, rows + changes):
+            csv_file.write(f"2098;Movie {row};Studios 0;Producer {row % 7};yes\n")
+
+
+def modify_rows(csv_file_name: str, changes: int):
+    with open(csv_file_name) as csv_file:
+        lines = csv_file.readlines()
+    middle = len(lines) // 2
+    for position in range(middle, middle + changes):
+        fields = lines[position].rstrip("\n").split(";")
+        fields[4] = "" if fields[4] == "yes" else "yes"
+        lines[position] = ";".join(fields) + "\n"
+    with open(csv_file_name, "w") as csv_file:
+        csv_file.writelines(lines)
+
+
+def run(folder_path: str, rows: int, changes: int) -> dict:
+    from benchmarks.synthetic import write_movielist_csv
+    from infra.django_import_manifest_repository import DjangoImportManifestRepository
+    from infra.django_imported_row_repository import DjangoImportedRowRepository
+    from infra.django_prize_repository import DjangoPrizeRepository
+    from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem, import_csv_from_filesystem_delta
+
+    csv_folder_path = os.path.join(folder_path, "csv")
+    os.makedirs(csv_folder_path)
+    csv_file_name = os.path.join(csv_folder_path, "movielist.csv")
+    write_movielist_csv(csv_file_name, rows)
+    repository = DjangoPrizeRepository()
+    manifest_repository = DjangoImportManifestRepository()
+    imported_row_repository = DjangoImportedRowRepository()
+
+    def delta_import():
+        import_csv_from_filesystem_delta(
+            repository=repository, manifest_repository=manifest_repository,
+            imported_row_repository=imported_row_repository, folder_path=csv_folder_path)
+
+    def full_import():
+        repository.delete_all()
+        import_csv_from_filesystem(repository=repository, folder_path=csv_folder_path)
+
+    results = {"first import": {"delta": count_writes(delta_import)}}
+    for name, change in [("append", lambda: append_rows(csv_file_name, rows, changes)),
+                         ("modify", lambda: modify_rows(csv_file_name, changes))]:
+        change()
+        results[name] = {"delta": count_writes(delta_import)}
+        # The full import creates the same prizes, so the hashes saved by the delta import are kept.
+        results[name]["full"] = count_writes(full_import)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=100,
+                        help="rows appended or modified")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        os.environ["DATABASE_PROFILE"] = "sqlite"
+        os.environ["DATABASE_NAME"] = os.path.join(folder_path, "db.sqlite3")
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texo.settings")
+        import django
+        django.setup()
+        from django.core import management
+        management.call_command("migrate", verbosity=0)
+        results = run(folder_path, args.rows, args.changes)
+
+    print(f"{args.rows} rows, {args.changes} rows appended or modified")
+    print(f"{'':14} {'delta s':>9} {'writes':>8} {'full s':>9} {'writes':>8}")
+    for name, result in results.items():
+        delta_seconds, delta_writes = result["delta"]
+        full = f"{result['full'][0]:9.2f} {result['full'][1]:8}" if "full" in result else ""
+        print(f"{name:14} {delta_seconds:9.2f} {delta_writes:8} {full}")
+
+
+if __name__ == "__main__":
+    main()
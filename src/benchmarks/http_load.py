@@ -0,0 +1,208 @@
+"""Load test of the prize interval summary views served by WSGI and ASGI.
+
+Each client sends its requests one after the other, and all the clients run at the same time.
+By default, the requests are sent to the Django WSGI and ASGI handlers in this process (without
+a server), so it runs offline and only the application is measured:
+- WSGI: the get_prize_interval_summary view, each client in a thread;
+- ASGI: the get_prize_interval_summary_async view, each client in a task of the event loop.
+
+The --url option sends the requests to a running server instead (e.g. started by runserver or
+uvicorn), each client in a thread.
+
+For each one, it reports the p50 and p99 latency and the requests per second. With --uncached,
+the dataset version is bumped before each request, so the summary is computed every time.
+
+Run it from the src folder:
+
+    python -m benchmarks.http_load --clients 32 --requests 100 --rows 20000
+    python -m benchmarks.http_load --url http://127.0.0.1:8000/api/v1/prizes_interval/async
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+from wsgiref.util import setup_testing_defaults
+
+WSGI_PATH = "/api/v1/prizes_interval"
+ASGI_PATH = "/api/v1/prizes_interval/async"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summarize(latencies: List[float], seconds: float, errors: int) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "requests_per_second": len(latencies) / seconds,
+    }
+
+
+def threaded_load(send_request: Callable[[], int], clients: int, requests: int) -> dict:
+    """Runs the clients in threads. The send_request must return the response status code."""
+    def client() -> List[tuple]:
+        results = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            status_code = send_request()
+            results.append((time.perf_counter() - start, status_code))
+        return results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = [result for future in [executor.submit(client) for _ in range(clients)]
+                   for result in future.result()]
+    seconds = time.perf_counter() - start
+    return summarize([latency for latency, _ in results], seconds,
+                     sum(1 for _, status_code in results if status_code != 200))
+
+
+def wsgi_load(path: str, clients: int, requests: int, before_request: Callable = None) -> dict:
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    handler = WSGIHandler()
+
+    def send_request() -> int:
+        if before_request is not None:
+            before_request()
+        environ = {"PATH_INFO": path, "REQUEST_METHOD": "GET"}
+        setup_testing_defaults(environ)
+        statuses = []
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        b"".join(response)
+        response.close()
+        return int(statuses[0].split()[0])
+
+    def send_request_and_close_connection() -> int:
+        # The WSGI servers close the connections of their threads after each request.
+        try:
+            return send_request()
+        finally:
+            connection.close()
+    return threaded_load(send_request_and_close_connection, clients, requests)
+
+
+def asgi_load(path: str, clients: int, requests: int, before_request: Callable = None) -> dict:
+    from django.core.asgi import get_asgi_application
+    application = get_asgi_application()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"127.0.0.1")],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+
+    async def send_request() -> int:
+        if before_request is not None:
+            before_request()
+        statuses = []
+        request_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await application(dict(scope), receive, send)
+        return statuses[0]
+
+    async def client() -> List[tuple]:
+        results = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            status_code = await send_request()
+            results.append((time.perf_counter() - start, status_code))
+        return results
+
+    async def run_clients() -> List[tuple]:
+        return [result for results in await asyncio.gather(*[client() for _ in range(clients)])
+                for result in results]
+
+    start = time.perf_counter()
+    results = asyncio.run(run_clients())
+    seconds = time.perf_counter() - start
+    return summarize([latency for latency, _ in results], seconds,
+                     sum(1 for _, status_code in results if status_code != 200))
+
+
+def url_load(url: str, clients: int, requests: int) -> dict:
+    def send_request() -> int:
+        try:
+            with urllib.request.urlopen(url) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+    return threaded_load(send_request, clients, requests)
+
+
+def setup_django(rows: int, folder_path: str):
+    """Sets Django up (importing the production CSV files) and, if rows is informed, replaces the
+    data by a synthetic movielist CSV file with this quantity of rows."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texo.settings")
+    import django
+    django.setup()
+    from django.core import management
+    management.call_command("migrate", verbosity=0)
+    if rows:
+        from benchmarks.synthetic import write_movielist_csv
+        from infra.django_prize_repository import DjangoPrizeRepository
+        from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem
+        write_movielist_csv(os.path.join(folder_path, "movielist.csv"), rows)
+        repository = DjangoPrizeRepository()
+        repository.delete_all()
+        import_csv_from_filesystem(repository=repository, folder_path=folder_path)
+
+
+def print_results(results: dict):
+    print(f"{'':8} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>10}")
+    for name, result in results.items():
+        print(f"{name:8} {result['requests']:9} {result['errors']:7} {result['p50_ms']:9.2f} "
+              f"{result['p99_ms']:9.2f} {result['requests_per_second']:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=100,
+                        help="quantity of requests of each client")
+    parser.add_argument("--rows", type=int, default=0,
+                        help="rows of the synthetic CSV file imported instead of the production files")
+    parser.add_argument("--uncached", action="store_true")
+    parser.add_argument("--url", help="URL of a running server")
+    args = parser.parse_args()
+
+    if args.url:
+        print_results({"url": url_load(args.url, args.clients, args.requests)})
+        return
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        setup_django(args.rows, folder_path)
+    from infra.result_cache import result_cache
+    before_request = result_cache.bump_version if args.uncached else None
+    print(f"{args.clients} clients x {args.requests} requests")
+    print_results({
+        "wsgi": wsgi_load(WSGI_PATH, args.clients, args.requests, before_request),
+        "asgi": asgi_load(ASGI_PATH, args.clients, args.requests, before_request),
+    })
+
+
+if __name__ == "__main__":
+    main()
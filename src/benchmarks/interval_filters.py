@@ -0,0 +1,85 @@
+"""Benchmark of the prize interval filters.
+
+It generates random prize winners in memory (no database is used) and measures how long
+each filter takes to execute over them.
+
+Run it from the src folder:
+
+    python -m benchmarks.interval_filters --rows 1000000 --producers 50000
+"""
+import argparse
+import random
+import time
+from typing import List
+from benchmarks.synthetic import producer_picker
+from infra.in_memory_columnar_prize_repository import InMemoryColumnarPrizeRepository
+from infra.result_cache import ResultCache
+from repository.filters import PrizeIntervalFilter, VectorizedPrizeIntervalFilter
+from repository.interval_index import PrizeIntervalIndex
+from repository.prize_repository import MovieInputDTO, PrizeInputDTO, PrizeOutputDTO, PrizeRepository
+
+
+class InMemoryWinnersRepository(InMemoryColumnarPrizeRepository):
+    """The columnar repository filled with the generated winners. It has its own ResultCache and
+    PrizeIntervalIndex, so the benchmarks do not change the ones of the application."""
+
+    def __init__(self, winners: List[PrizeOutputDTO]):
+        super().__init__(result_cache=ResultCache(), interval_index=PrizeIntervalIndex())
+        self.bulk_create([
+            PrizeInputDTO(
+                year=item.year,
+                movie=MovieInputDTO(
+                    _id=None, name=item.name, producer_name=item.producer, studio_name=item.studios),
+                winner=item.winner)
+            for item in winners])
+
+
+def generate_winners(rows: int, producers: int, seed: int = 0, skew: float = 0.0) -> List[PrizeOutputDTO]:
+    generator = random.Random(seed)
+    pick_producer = producer_picker(generator, producers, skew)
+    return [
+        PrizeOutputDTO(
+            _id=_id,
+            year=generator.randint(1901, 2098),
+            name=f"Movie {_id}",
+            producer=f"Producer {pick_producer()}",
+            studios="Studios",
+            winner=True)
+        for _id in range(rows)
+    ]
+
+
+def measure(filter_class, repository: PrizeRepository, repeat: int) -> float:
+    """Returns the best execution time (in seconds) of the filter."""
+    timings = []
+    for _ in range(repeat):
+        interval_filter = filter_class(repository)
+        start = time.perf_counter()
+        interval_filter.execute()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(rows: int, producers: int, repeat: int) -> dict:
+    repository = InMemoryWinnersRepository(generate_winners(rows, producers))
+    return {
+        filter_class.__name__: measure(filter_class, repository, repeat)
+        for filter_class in (PrizeIntervalFilter, VectorizedPrizeIntervalFilter)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--producers", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.producers, args.repeat)
+    print(f"{args.rows} winners of {args.producers} producers (best of {args.repeat})")
+    for name, seconds in results.items():
+        print(f"{name:32} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark of the renderings of the prize interval summary response (see the
+PRIZE_INTERVAL_RESPONSE_RENDERING at texo.settings) with large lists of tied producers.
+
+The get_prize_interval_summary view is called with a filter that returns the informed quantity of
+tied producers in the min and max lists, and the response is rendered to bytes. For each rendering,
+it reports the CPU time per request:
+- uncached: the result cache is empty on each request, so the response is computed every time;
+- cached: the response is computed once and got from the result cache on the next requests.
+
+No database is used. Run it from the src folder:
+
+    python -m benchmarks.response_rendering --ties 5000 --requests 200
+"""
+import argparse
+import os
+import time
+
+RENDERINGS = ["serializer", "precomputed", "encoded"]
+
+
+def run(ties: int, requests: int) -> dict:
+    from dependency_injector import providers
+    from rest_framework.test import APIRequestFactory
+    from app.views import get_prize_interval_summary
+    from benchmarks.interval_filters import InMemoryWinnersRepository
+    from infra.result_cache import ResultCache
+    from repository.filters import Filter, PrizeIntervalFilterSchema, ProducerPreviousFollowingWinFilterSchema
+    from texo.containers import application_container
+
+    class TiedProducersFilter(Filter):
+        def __init__(self):
+            self.schema = PrizeIntervalFilterSchema(
+                _min=[ProducerPreviousFollowingWinFilterSchema.from_gap(f"Producer {k}", 1950, 1951)
+                      for k in range(ties)],
+                _max=[ProducerPreviousFollowingWinFilterSchema.from_gap(f"Producer {k}", 1901, 2098)
+                      for k in range(ties)])
+
+        def execute(self):
+            ...
+
+        def get_schema(self):
+            return self.schema
+
+    def get_response_body() -> bytes:
+        response = get_prize_interval_summary(request_factory.get("/"))
+        if hasattr(response, "render"):
+            response.render()
+        assert response.status_code == 200
+        return response.content
+
+    request_factory = APIRequestFactory()
+    interval_filter = TiedProducersFilter()
+    results = {}
+    for rendering in RENDERINGS:
+        for cached in [False, True]:
+            result_cache = providers.Object(ResultCache()) if cached else providers.Factory(ResultCache)
+            with application_container.prize_repository.override(InMemoryWinnersRepository([])), \
+                    application_container.prize_interval_filter.override(interval_filter), \
+                    application_container.result_cache.override(result_cache), \
+                    application_container.config.prize_interval_response_rendering.override(rendering):
+                get_response_body()
+                start = time.process_time()
+                for _ in range(requests):
+                    get_response_body()
+                seconds = time.process_time() - start
+            results[(rendering, cached)] = seconds / requests
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ties", type=int, default=5_000,
+                        help="quantity of tied producers in each list")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texo.settings")
+    import django
+    django.setup()
+    from django.core import management
+    management.call_command("migrate", verbosity=0)
+    results = run(args.ties, args.requests)
+
+    print(f"{args.ties} tied producers in each list, CPU ms per request")
+    print(f"{'':12} {'uncached':>10} {'cached':>10}")
+    for rendering in RENDERINGS:
+        print(f"{rendering:12} {results[(rendering, False)] * 1000:10.3f} {results[(rendering, True)] * 1000:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark of the memory and the time spent on the objects created for each row.
+
+It writes a synthetic movielist CSV file and measures:
+- the csv_file_pipeline, which creates the entities and the PrizeInputDTO (with its
+  MovieInputDTO) of each producer of each row: the rows per second and the memory of the
+  DTOs kept in a list;
+- the PrizeOutputDTO objects returned by the repositories all_winners: the memory of each one;
+- the PrizeIntervalFilter, which creates one ProducerPreviousFollowingWinFilterSchema for
+  each producer.
+
+The memory is measured with tracemalloc, so the time of that round is not considered.
+
+Run it from the src folder:
+
+    python -m benchmarks.row_objects --rows 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.interval_filters import InMemoryWinnersRepository, generate_winners
+from benchmarks.synthetic import write_movielist_csv
+from repository.filters import PrizeIntervalFilter
+from scripts.csv_file_parser import CSVFileStats, csv_file_pipeline
+
+
+def allocated_bytes(function) -> int:
+    """Returns the memory kept by the result of the function."""
+    tracemalloc.start()
+    try:
+        result = function()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def run(rows: int, producers: int) -> dict:
+    with tempfile.TemporaryDirectory() as folder_path:
+        csv_file_name = os.path.join(folder_path, "movielist.csv")
+        write_movielist_csv(csv_file_name, rows, producers)
+
+        def pipeline():
+            return list(csv_file_pipeline(csv_file_name, CSVFileStats()))
+
+        start = time.perf_counter()
+        items = pipeline()
+        seconds = time.perf_counter() - start
+        pipeline_bytes = allocated_bytes(pipeline)
+
+    winners = generate_winners(len(items), producers)
+    winners_bytes = allocated_bytes(lambda: generate_winners(len(items), producers))
+    repository = InMemoryWinnersRepository(winners)
+    start = time.perf_counter()
+    PrizeIntervalFilter(repository).execute()
+    filter_seconds = time.perf_counter() - start
+
+    return {
+        "items": len(items),
+        "pipeline rows/s": rows / seconds,
+        "pipeline bytes/item": pipeline_bytes / len(items),
+        "PrizeOutputDTO bytes/winner": winners_bytes / len(winners),
+        "PrizeIntervalFilter seconds": filter_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--producers", type=int, default=20_000)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.producers)
+    print(f"{args.rows} rows, {results.pop('items')} items")
+    for name, value in results.items():
+        print(f"{name:32} {value:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark of the database schema before and after the natural keys and winners index
+migration (app 0002_natural_keys_and_winner_index).
+
+It creates a SQLite database in a temporary folder, and for each schema it measures:
+- the batched import of a synthetic movielist CSV file;
+- the row by row import (get_or_create) of a smaller synthetic file;
+- the DjangoPrizeRepository.all_winners;
+- the lookup of producers by name;
+- the DjangoWindowPrizeIntervalFilter.
+
+Run it from the src folder:
+
+    python -m benchmarks.schema_indexes --rows 100000 --row-by-row-rows 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def measure(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(folder_path: str, rows: int, row_by_row_rows: int, producers: int) -> dict:
+    from django.core import management
+    from app.models import Producer
+    from benchmarks.synthetic import write_movielist_csv
+    from infra.django_prize_interval_filter import DjangoWindowPrizeIntervalFilter
+    from infra.django_prize_repository import DjangoPrizeRepository
+    from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem
+
+    bulk_folder_path = os.path.join(folder_path, "bulk")
+    row_by_row_folder_path = os.path.join(folder_path, "row_by_row")
+    os.makedirs(bulk_folder_path)
+    os.makedirs(row_by_row_folder_path)
+    write_movielist_csv(os.path.join(bulk_folder_path, "movielist.csv"), rows, producers)
+    write_movielist_csv(os.path.join(row_by_row_folder_path, "movielist.csv"), row_by_row_rows, producers)
+
+    repository = DjangoPrizeRepository()
+    results = {}
+    for label, migration in [("before", "0001_initial"), ("after", "0002_natural_keys_and_winner_index")]:
+        repository.delete_all()
+        management.call_command("migrate", "app", migration, verbosity=0)
+
+        result = results[label] = {}
+        result["row by row import"] = measure(lambda: import_csv_from_filesystem(
+            repository=repository, folder_path=row_by_row_folder_path, batch_size=None, workers=1))
+        repository.delete_all()
+        result["batched import"] = measure(lambda: import_csv_from_filesystem(
+            repository=repository, folder_path=bulk_folder_path, workers=1))
+        result["all_winners"] = measure(repository.all_winners)
+        result["1000 producers by name"] = measure(lambda: [
+            Producer.objects.filter(name=f"Producer {producer}").first() for producer in range(1000)])
+        result["database interval filter"] = measure(
+            DjangoWindowPrizeIntervalFilter().execute)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--row-by-row-rows", type=int, default=5_000)
+    parser.add_argument("--producers", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        os.environ["DATABASE_NAME"] = os.path.join(folder_path, "db.sqlite3")
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texo.settings")
+        import django
+        django.setup()
+        from django.core import management
+        management.call_command("migrate", verbosity=0)
+        results = run(folder_path, args.rows, args.row_by_row_rows, args.producers)
+
+    print(f"{args.rows} rows (batched import), {args.row_by_row_rows} rows (row by row import)")
+    print(f"{'':28} {'before':>10} {'after':>10}")
+    for name in results["before"]:
+        print(f"{name:28} {results['before'][name]:9.3f}s {results['after'][name]:9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Benchmark suite of the importer, the interval filters and the interval summary endpoint.
+
+It runs offline and writes a JSON report, so the results of two versions can be compared:
+- import: a synthetic movielist CSV file (see benchmarks.synthetic) is imported by the
+  import_csv_from_filesystem in a new process, which reports the rows per second and the peak
+  RSS (and the RSS before the import, after the Django setup);
+- interval_filter: the execution time of each in memory interval filter over synthetic winners;
+- endpoint: the WSGI and ASGI views are loaded by concurrent clients (see benchmarks.http_load),
+  with the response cached and uncached.
+
+The --skew option changes how much the producers are repeated (see the producer_picker), which
+changes the quantity of gaps calculated by the filters.
+
+With --compare, the metrics are compared with a previous report and the ones that are worse than
+the --tolerance are listed. In that case the exit status is 1, so it can be used to catch
+regressions.
+
+Run it from the src folder:
+
+    python -m benchmarks.suite --rows 100000 --skew 1.1 --output report.json
+    python -m benchmarks.suite --rows 100000 --skew 1.1 --compare report.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# The metrics of the report that are better when they are higher. All the others are better
+# when they are lower.
+HIGHER_IS_BETTER = ("rows_per_second", "requests_per_second")
+
+
+def rss_kib() -> int:
+    """Returns the current resident set size of this process in KiB."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def peak_rss_kib() -> int:
+    # The ru_maxrss is in bytes on macOS and in KiB on Linux.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _import_in_process(folder_path: str, batch_size: int, reader: str, results):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texo.settings")
+    import django
+    with contextlib.redirect_stdout(sys.stderr):
+        django.setup()
+    from django.core import management
+    management.call_command("migrate", verbosity=0)
+    from infra.django_prize_repository import DjangoPrizeRepository
+    from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem
+
+    repository = DjangoPrizeRepository()
+    repository.delete_all()
+    rss_before = rss_kib() if sys.platform == "linux" else None
+    start = time.perf_counter()
+    failed_count, producers_count, row_count, _ = import_csv_from_filesystem(
+        repository=repository, folder_path=folder_path, batch_size=batch_size, workers=1, reader=reader)
+    seconds = time.perf_counter() - start
+    results.put({
+        "rows": row_count - 1,
+        "producers": producers_count,
+        "failed_producers": failed_count,
+        "seconds": seconds,
+        "rows_per_second": (row_count - 1) / seconds,
+        "rss_before_import_kib": rss_before,
+        "peak_rss_kib": peak_rss_kib(),
+    })
+
+
+def measure_import(folder_path: str, batch_size: int, reader: str) -> dict:
+    """Runs the import in a new process, so the peak RSS is the one of the import only."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_import_in_process, args=(folder_path, batch_size, reader, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def measure_interval_filters(rows: int, producers: int, skew: float, repeat: int) -> dict:
+    from benchmarks.interval_filters import InMemoryWinnersRepository, generate_winners
+    from repository.filters import IndexedPrizeIntervalFilter, PrizeIntervalFilter, VectorizedPrizeIntervalFilter
+    from repository.interval_index import PrizeIntervalIndex
+
+    repository = InMemoryWinnersRepository(generate_winners(rows, producers, skew=skew))
+    engines = {
+        "rolling": lambda: PrizeIntervalFilter(repository),
+        "vectorized": lambda: VectorizedPrizeIntervalFilter(repository),
+        # A new index for each execution, so it is always rebuilt from the winners.
+        "indexed_rebuild": lambda: IndexedPrizeIntervalFilter(repository, index=PrizeIntervalIndex()),
+    }
+    results = {}
+    for name, create_filter in engines.items():
+        timings = []
+        for _ in range(repeat):
+            interval_filter = create_filter()
+            start = time.perf_counter()
+            interval_filter.execute()
+            timings.append(time.perf_counter() - start)
+        results[name] = {"seconds": min(timings)}
+    return results
+
+
+def measure_endpoint(folder_path: str, clients: int, requests: int) -> dict:
+    """Imports the synthetic file in this process, and loads the WSGI and ASGI views."""
+    from benchmarks.http_load import ASGI_PATH, WSGI_PATH, asgi_load, setup_django, wsgi_load
+    setup_django(rows=0, folder_path=folder_path)
+    from infra.django_prize_repository import DjangoPrizeRepository
+    from infra.result_cache import result_cache
+    from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem
+
+    repository = DjangoPrizeRepository()
+    repository.delete_all()
+    import_csv_from_filesystem(repository=repository, folder_path=folder_path)
+    return {
+        "wsgi_cached": wsgi_load(WSGI_PATH, clients, requests),
+        "asgi_cached": asgi_load(ASGI_PATH, clients, requests),
+        "wsgi_uncached": wsgi_load(WSGI_PATH, clients, max(1, requests // 10), result_cache.bump_version),
+        "asgi_uncached": asgi_load(ASGI_PATH, clients, max(1, requests // 10), result_cache.bump_version),
+    }
+
+
+def run(args) -> dict:
+    from benchmarks.synthetic import write_movielist_csv
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameters": {
+            "rows": args.rows,
+            "producers": args.producers,
+            "skew": args.skew,
+            "batch_size": args.batch_size,
+            "reader": args.reader,
+            "winners": args.winners,
+            "clients": args.clients,
+            "requests": args.requests,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as folder_path:
+        write_movielist_csv(os.path.join(folder_path, "movielist.csv"),
+                            args.rows, args.producers, skew=args.skew)
+        report["results"]["import"] = measure_import(folder_path, args.batch_size, args.reader)
+        report["results"]["interval_filter"] = measure_interval_filters(
+            args.winners, args.producers, args.skew, args.repeat)
+        if args.clients:
+            report["results"]["endpoint"] = measure_endpoint(folder_path, args.clients, args.requests)
+    return report
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """Returns the numeric metrics of the results as a dict of 'stage.name.metric' -> value."""
+    metrics = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[f"{prefix}{key}"] = value
+    return metrics
+
+
+def regressions(baseline: dict, report: dict, tolerance: float) -> List[str]:
+    """Returns a message for each metric of the report that is worse than the baseline by more
+    than the tolerance (e.g. 0.2 is 20%). The counters (rows, requests, errors...) are ignored."""
+    baseline_metrics = flatten(baseline["results"])
+    messages = []
+    for name, value in flatten(report["results"]).items():
+        metric = name.rsplit(".", 1)[-1]
+        if metric not in HIGHER_IS_BETTER and not metric.endswith(("seconds", "_ms", "_kib")):
+            continue
+        previous = baseline_metrics.get(name)
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        if metric in HIGHER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            messages.append(f"{name}: {previous:.3f} -> {value:.3f} ({change:+.0%} worse)")
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000,
+                        help="rows of the synthetic CSV file")
+    parser.add_argument("--producers", type=int, default=20_000)
+    parser.add_argument("--skew", type=float, default=0.0,
+                        help="Zipf exponent of the producers repetition (0 is uniform)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reader", default="csv", choices=["csv", "mmap"])
+    parser.add_argument("--winners", type=int, default=1_000_000,
+                        help="quantity of winners of the interval filters benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=16,
+                        help="concurrent clients of the endpoint benchmark (0 skips it)")
+    parser.add_argument("--requests", type=int, default=50,
+                        help="quantity of requests of each client")
+    parser.add_argument("--output", help="path of the JSON report (default: stdout)")
+    parser.add_argument("--compare", help="path of a previous JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # The Django setup prints to the stdout, which is kept for the report.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            messages = regressions(json.load(baseline_file), report, args.tolerance)
+        for message in messages:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if messages:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Generators of synthetic movielist CSV files for the benchmarks."""
+import random
+from bisect import bisect
+from itertools import accumulate
+from typing import Callable
+
+
+def producer_picker(generator: random.Random, producers: int, skew: float = 0.0) -> Callable[[], int]:
+    """Returns a function that picks a producer number. If the skew is 0, all the producers have
+    the same chance. Otherwise the chance of the producer k is proportional to 1 / (k + 1) ** skew
+    (a Zipf distribution), so the bigger the skew, the more the first producers are repeated."""
+    if not skew:
+        return lambda: generator.randrange(producers)
+    cumulative_weights = list(accumulate(1 / (k + 1) ** skew for k in range(producers)))
+    total = cumulative_weights[-1]
+    return lambda: min(bisect(cumulative_weights, generator.random() * total), producers - 1)
+
+
+def write_movielist_csv(path: str, rows: int, producers: int = 1000, seed: int = 0, skew: float = 0.0):
+    """Writes a ';' delimited movielist CSV file with the specs columns and the informed
+    quantity of rows. Each row has one or two producers (picked with the informed skew, see
+    the producer_picker) and about 20% of the rows are winners."""
+    generator = random.Random(seed)
+    pick_producer = producer_picker(generator, producers, skew)
+    with open(path, "w") as csv_file:
+        csv_file.write("year;title;studios;producers;winner\n")
+        for row in range(rows):
+            row_producers = ", ".join(
+                f"Producer {pick_producer()}" for _ in range(generator.randint(1, 2)))
+            winner = "yes" if generator.random() < 0.2 else ""
+            csv_file.write(
+                f"{generator.randint(1901, 2098)};Movie {row};Studios {row % 50};{row_producers};{winner}\n")
@@ -4,40 +4,63 @@ from uuid import uuid4, UUID
 
 class Entity(ABC):
     """The Entity abstract class has an is_valid method which is resposible to validate
-    this entity when it is applied on usecases."""
+    this entity when it is applied on usecases.
+
+    The entities are created for each row of the CSV files, so they use __slots__, and the
+    UUID is only generated when the _id is requested for the first time."""
+    __slots__ = ("__id",)
+
+    def __init__(self, _id: UUID = None):
+        self.__id = _id
+
+    @property
+    def _id(self) -> UUID:
+        if self.__id is None:
+            self.__id = uuid4()
+        return self.__id
+
+    def has_valid_id(self) -> bool:
+        """The id is valid if it is an UUID or if it was not generated yet, as it will be one."""
+        return self.__id is None or isinstance(self.__id, UUID)
+
     @abstractmethod
     def is_valid(self) -> bool:
         ...
 
 
 class Producer(Entity):
+    __slots__ = ("name",)
+
     def __init__(self, name: str, _id: UUID = None):
-        self._id = uuid4() if _id is None else _id
+        super().__init__(_id)
         self.name = name
 
     def is_valid(self):
         """The Producer entity must have an UUID by default , the name be a string and not empty."""
-        return isinstance(self._id, UUID) and \
+        return self.has_valid_id() and \
             isinstance(self.name, str) and \
             self.name != ""
 
 
 class Studios(Entity):
+    __slots__ = ("name",)
+
     def __init__(self, name: str, _id: UUID = None):
-        self._id = uuid4() if _id is None else _id
+        super().__init__(_id)
         self.name = name
 
     def is_valid(self):
         """The Studios entity must have an UUID by default , the name be a string and not empty."""
-        return isinstance(self._id, UUID) and \
+        return self.has_valid_id() and \
             isinstance(self.name, str) and \
             self.name != ""
 
 
 class Movie(Entity):
+    __slots__ = ("name", "producer", "studios")
 
     def __init__(self, name: str, producer: Producer, studios: Studios, _id: UUID = None):
-        self._id = uuid4() if _id is None else _id
+        super().__init__(_id)
         self.name = name
         self.producer = producer
         self.studios = studios
@@ -46,15 +69,17 @@ class Movie(Entity):
         """The Studios entity must have an UUID by default , the name be a string and not empty,
         a producer and studios entities.
         """
-        return isinstance(self._id, UUID) and \
+        return self.has_valid_id() and \
             isinstance(self.producer, Producer) and \
             isinstance(self.studios, Studios) and \
             self.name != ""
 
 
 class Prize(Entity):
+    __slots__ = ("year", "winner", "producer")
+
     def __init__(self, year: int, winner: bool, producer: Producer, _id: UUID = None):
-        self._id = uuid4() if _id is None else _id
+        super().__init__(_id)
         self.year = year
         self.winner = winner
         self.producer = producer
@@ -64,7 +89,7 @@ class Prize(Entity):
         a producer and a winner boolean field. Following the specs, it is implied that the 
         smallest and largest years seems to be 1900 and 2099.
         """
-        return isinstance(self._id, UUID) and \
+        return self.has_valid_id() and \
             (isinstance(self.year, int) and self.year > 1900 and self.year < 2099) and \
             isinstance(self.winner, bool) and \
             isinstance(self.producer, Producer)
@@ -0,0 +1,106 @@
+from glob import glob
+import logging
+import os
+from threading import Event
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+class CSVFolderWatcher:
+    """It watches the CSV files of a folder and calls on_change when a file is added, modified or
+    removed, so the changes can be ingested while the application is running.
+
+    The folder is polled every interval seconds, comparing the size and the modification time of
+    each .csv file with the ones of the last change. If the watchdog package is installed, the
+    events of the folder (inotify, FSEvents or kqueue) also wake the watcher at once, and the
+    polling is kept as a fallback for the events that are lost (e.g. in network file systems).
+
+    As a file may still be written when it changes, the on_change is only called after two
+    consecutive polls return the same files. If on_change raises an exception, it is logged and
+    the files are only handled again when they change again."""
+
+    def __init__(self, folder_path: str, on_change: Callable[[], None], interval: float = 2.0):
+        self.folder_path = folder_path
+        self.on_change = on_change
+        self.interval = interval
+        self.__stop = Event()
+        self.__wake = Event()
+        self.__handled: Snapshot = self.snapshot()
+        self.__pending: Optional[Snapshot] = None
+
+    def snapshot(self) -> Snapshot:
+        """Returns the (size, modification time) of each CSV file of the folder."""
+        files = dict()
+        for csv_file_name in glob(f"{self.folder_path}/*.csv"):
+            try:
+                stat = os.stat(csv_file_name)
+            except FileNotFoundError:
+                continue
+            files[os.path.abspath(csv_file_name)] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def poll(self) -> bool:
+        """Checks the files once, calling on_change if they changed and did not change since the
+        previous poll. It returns if the on_change was called."""
+        files = self.snapshot()
+        if files == self.__handled:
+            self.__pending = None
+            return False
+        if files != self.__pending:
+            self.__pending = files
+            return False
+
+        self.__handled, self.__pending = files, None
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception("The changes of the CSV files of %s were not ingested", self.folder_path)
+        return True
+
+    def run(self):
+        """Polls the folder until the stop method is called."""
+        observer = self.__observe()
+        try:
+            while not self.__stop.is_set():
+                self.__wake.wait(self.interval)
+                self.__wake.clear()
+                if not self.__stop.is_set():
+                    self.poll()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def stop(self):
+        self.__stop.set()
+        self.__wake.set()
+
+    def __observe(self):
+        if Observer is None:
+            return None
+        observer = Observer()
+        observer.schedule(_WakeHandler(self.__wake), self.folder_path, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+
+class _WakeHandler(FileSystemEventHandler):
+
+    def __init__(self, wake: Event):
+        super().__init__()
+        self.wake = wake
+
+    def on_any_event(self, event):
+        self.wake.set()
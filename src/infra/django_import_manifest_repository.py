@@ -0,0 +1,42 @@
+from typing import List
+from django.db import transaction
+from app.models import ImportManifest
+from repository.import_manifest_repository import FileFingerprintDTO, ImportManifestRepository
+
+
+class DjangoImportManifestRepository(ImportManifestRepository):
+
+    def all(self) -> List[FileFingerprintDTO]:
+        return [
+            FileFingerprintDTO(
+                path=path,
+                size=size,
+                mtime_ns=mtime_ns,
+                content_hash=content_hash,
+                row_count=row_count)
+            for path, size, mtime_ns, content_hash, row_count in ImportManifest.objects.order_by("path").values_list(
+                "path", "size", "mtime_ns", "content_hash", "row_count")
+        ]
+
+    def replace_all(self, fingerprints: List[FileFingerprintDTO]):
+        """Deletes the saved fingerprints and saves the informed ones in the same transaction."""
+        with transaction.atomic():
+            ImportManifest.objects.all().delete()
+            ImportManifest.objects.bulk_create([
+                ImportManifest(
+                    path=fingerprint.path,
+                    size=fingerprint.size,
+                    mtime_ns=fingerprint.mtime_ns,
+                    content_hash=fingerprint.content_hash,
+                    row_count=fingerprint.row_count)
+                for fingerprint in fingerprints
+            ])
+
+    def save(self, fingerprint: FileFingerprintDTO):
+        ImportManifest.objects.update_or_create(
+            path=fingerprint.path,
+            defaults={
+                "size": fingerprint.size,
+                "mtime_ns": fingerprint.mtime_ns,
+                "content_hash": fingerprint.content_hash,
+                "row_count": fingerprint.row_count})
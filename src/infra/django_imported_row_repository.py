@@ -0,0 +1,66 @@
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List
+from django.db import transaction
+from django.db.models import Q
+from app.models import ImportedRow
+from repository.imported_row_repository import ImportedRowRepository, RowKey
+from texo.settings import CSV_IMPORT_BATCH_SIZE, QUERY_VALUES_CHUNK_SIZE
+
+
+class DjangoImportedRowRepository(ImportedRowRepository):
+
+    def paths(self) -> List[str]:
+        return list(ImportedRow.objects.order_by("path").values_list("path", flat=True).distinct())
+
+    def hashes(self, path: str, keys: Iterable[RowKey] = None) -> Dict[RowKey, int]:
+        if keys is None:
+            return self.__hashes(ImportedRow.objects.filter(path=path))
+        keys = list(keys)
+        hashes = {}
+        for start in range(0, len(keys), QUERY_VALUES_CHUNK_SIZE):
+            hashes.update(self.__hashes(ImportedRow.objects.filter(path=path).filter(
+                self.__keys_condition(keys[start:start + QUERY_VALUES_CHUNK_SIZE]))))
+        return hashes
+
+    def key_paths(self, keys: Iterable[RowKey]) -> Dict[str, List[RowKey]]:
+        keys = list(keys)
+        key_paths: Dict[str, List[RowKey]] = dict()
+        for start in range(0, len(keys), QUERY_VALUES_CHUNK_SIZE):
+            chunk = keys[start:start + QUERY_VALUES_CHUNK_SIZE]
+            for path, year, title in ImportedRow.objects.filter(
+                    self.__keys_condition(chunk)).values_list("path", "year", "title"):
+                key_paths.setdefault(path, []).append((year, title))
+        return key_paths
+
+    def __hashes(self, queryset) -> Dict[RowKey, int]:
+        return {
+            (year, title): row_hash
+            for year, title, row_hash in queryset.values_list(
+                "year", "title", "row_hash").iterator(chunk_size=CSV_IMPORT_BATCH_SIZE)
+        }
+
+    def __keys_condition(self, keys: List[RowKey]) -> Q:
+        return reduce(or_, (Q(year=year, title=title) for year, title in keys))
+
+    def save(self, path: str, hashes: Dict[RowKey, int], removed: Iterable[RowKey] = ()):
+        """The hashes are upserted by the (path, year, title) unique constraint, so only the
+        changed keys are written, in the same transaction of the removed ones."""
+        removed = list(removed)
+        with transaction.atomic():
+            for start in range(0, len(removed), QUERY_VALUES_CHUNK_SIZE):
+                ImportedRow.objects.filter(path=path).filter(
+                    self.__keys_condition(removed[start:start + QUERY_VALUES_CHUNK_SIZE])).delete()
+            ImportedRow.objects.bulk_create(
+                [ImportedRow(path=path, year=year, title=title, row_hash=row_hash)
+                 for (year, title), row_hash in hashes.items()],
+                batch_size=CSV_IMPORT_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["path", "year", "title"],
+                update_fields=["row_hash"])
+
+    def delete_paths(self, paths: Iterable[str]):
+        ImportedRow.objects.filter(path__in=list(paths)).delete()
+
+    def delete_all(self):
+        ImportedRow.objects.all().delete()
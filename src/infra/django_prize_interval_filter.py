@@ -0,0 +1,60 @@
+from typing import List
+from django.db.models import F, Q, QuerySet, Subquery, Window
+from django.db.models.functions import Lag
+from app.models import Prize
+from repository.filters import Filter, PrizeIntervalFilterSchema, ProducerPreviousFollowingWinFilterSchema
+
+
+class DjangoWindowPrizeIntervalFilter(Filter):
+    """It returns the same schema of the PrizeIntervalFilter, but the intervals are calculated
+    by the database, so the winners are not loaded in the application memory.
+
+    For each prize winner, the previous win of the same producer is got with the LAG window
+    function (partitioned by producer and ordered by year), so every consecutive gap is
+    considered. Only the gaps tied with the smallest and the largest intervals are returned
+    by the database, in one query.
+    """
+
+    def __init__(self):
+        self.__min_interval_producers: List[ProducerPreviousFollowingWinFilterSchema] = list(
+        )
+        self.__max_interval_producers: List[ProducerPreviousFollowingWinFilterSchema] = list(
+        )
+
+    def get_schema(self) -> PrizeIntervalFilterSchema:
+        return PrizeIntervalFilterSchema(
+            _min=self.__min_interval_producers,
+            _max=self.__max_interval_producers)
+
+    def execute(self):
+        gaps = self.__gaps()
+        min_interval = gaps.order_by("interval").values("interval")[:1]
+        max_interval = gaps.order_by("-interval").values("interval")[:1]
+        tied_gaps = gaps.filter(
+            Q(interval=Subquery(min_interval)) | Q(interval=Subquery(max_interval))
+        ).order_by("previous_win", "producer").values_list("producer", "previous_win", "year", "interval")
+
+        tied_gaps = list(tied_gaps)
+        if not tied_gaps:
+            return
+        smallest_interval = min(gap[3] for gap in tied_gaps)
+        largest_interval = max(gap[3] for gap in tied_gaps)
+        self.__min_interval_producers = [
+            ProducerPreviousFollowingWinFilterSchema.from_gap(producer, previous_win, following_win)
+            for producer, previous_win, following_win, interval in tied_gaps if interval == smallest_interval]
+        self.__max_interval_producers = [
+            ProducerPreviousFollowingWinFilterSchema.from_gap(producer, previous_win, following_win)
+            for producer, previous_win, following_win, interval in tied_gaps if interval == largest_interval]
+
+    def __gaps(self) -> QuerySet:
+        """Returns the winners annotated with the previous win of the same producer and the
+        interval between them. The first win of each producer is excluded."""
+        return Prize.objects.filter(winner=True).annotate(
+            producer=F("movie__producer__name"),
+            previous_win=Window(
+                Lag("year"),
+                partition_by=[F("movie__producer__name")],
+                order_by=[F("year").asc(), F("id").asc()]),
+        ).annotate(
+            interval=F("year") - F("previous_win")
+        ).filter(previous_win__isnull=False)
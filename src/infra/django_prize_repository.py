@@ -1,10 +1,22 @@
-from typing import List
+from array import array
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from django.db import transaction
+from django.db.models import Q
 from app.models import Producer, Studios, Movie, Prize
-from repository.prize_repository import MovieInputDTO, PrizeOutputDTO, PrizeRepository
+from repository.prize_repository import MovieInputDTO, PrizeInputDTO, PrizeOutputDTO, PrizeRepository
+from repository.interval_index import PrizeIntervalIndex, interval_index as default_interval_index
+from infra.result_cache import ResultCache, result_cache as default_result_cache
+from texo.settings import ALL_WINNERS_CHUNK_SIZE, CSV_IMPORT_BATCH_SIZE, QUERY_VALUES_CHUNK_SIZE
 
 
 class DjangoPrizeRepository(PrizeRepository):
 
+    def __init__(self, result_cache: ResultCache = None, interval_index: PrizeIntervalIndex = None):
+        self.result_cache = default_result_cache if result_cache is None else result_cache
+        self.interval_index = default_interval_index if interval_index is None else interval_index
+
     def create(self, year: int, movie: MovieInputDTO, winner: bool):
         """This is responsible to create all the instances for the Django
         models. If there are not any of the following models instantes in
@@ -28,24 +40,184 @@ class DjangoPrizeRepository(PrizeRepository):
                 "producer": producer}
         )
 
-        Prize.objects.get_or_create(year=year, movie=movie, winner=winner,
-                                    defaults={
-                                        "year": year, "movie": movie, "winner": winner
-                                    })
+        _, created = Prize.objects.get_or_create(year=year, movie=movie, winner=winner,
+                                                 defaults={
+                                                     "year": year, "movie": movie, "winner": winner
+                                                 })
+        self.__written([(producer.name, year)] if created and winner else [])
+
+    def bulk_create(self, batch: List[PrizeInputDTO], batch_size: int = None):
+        """This is the batched version of the create method. All the batch is saved inside
+        one transaction and it is splitted in chunks of batch_size (by default the
+        CSV_IMPORT_BATCH_SIZE constant from texo.settings).
+
+        For each chunk, the producers, studios and movies are deduplicated in memory, then
+        the ones that are already in database are loaded with one query per model and only
+        the missing ones are inserted with bulk_create. So the number of queries depends on
+        the quantity of chunks and not on the quantity of prizes.
+
+        As the create method, it will not duplicate a prize that is already in database. The
+        rows inserted at the same time by another process are ignored by the natural keys
+        unique constraints of the models."""
+
+        batch_size = batch_size or CSV_IMPORT_BATCH_SIZE
+        created_winners = []
+        with transaction.atomic():
+            for start in range(0, len(batch), batch_size):
+                created_winners.extend(self.__bulk_create_chunk(
+                    batch[start:start + batch_size], batch_size))
+        self.__written(created_winners)
+
+    def __written(self, created_winners: List[Tuple[str, int]]):
+        """After each write, the dataset version is bumped with the transaction (see the
+        ResultCache.bump_version_on_commit), so the results are never computed from uncommitted data
+        and cached with the new version. If the interval index was in sync with the previous version,
+        the created (producer, year) winners are added to it when the transaction commits, or else it
+        will be rebuilt when it is requested. If the transaction is rolled back, nothing changes."""
+        self.result_cache.bump_version_on_commit(
+            lambda previous, version: self.__committed(created_winners, previous, version))
+
+    def __committed(self, created_winners: List[Tuple[str, int]], previous: int, version: int):
+        if self.interval_index.version == previous:
+            self.interval_index.add_many(created_winners, version)
+
+    def __bulk_create_chunk(self, chunk: List[PrizeInputDTO], batch_size: int) -> List[Tuple[str, int]]:
+        producers = self.__get_or_bulk_create_by_name(
+            Producer, (item.movie.producer_name for item in chunk), batch_size)
+        studios = self.__get_or_bulk_create_by_name(
+            Studios, (item.movie.studio_name for item in chunk), batch_size)
+
+        movie_keys = dict.fromkeys(
+            (item.movie.name,
+             producers[item.movie.producer_name],
+             studios[item.movie.studio_name]) for item in chunk)
+        movies = self.__get_or_bulk_create_movies(movie_keys, batch_size)
+
+        prize_keys: Dict[tuple, PrizeInputDTO] = dict()
+        for item in chunk:
+            prize_keys.setdefault((
+                item.year,
+                movies[(item.movie.name,
+                        producers[item.movie.producer_name],
+                        studios[item.movie.studio_name])],
+                item.winner), item)
+        existing_prizes = set(Prize.objects.filter(
+            movie_id__in={movie_id for _, movie_id, _ in prize_keys}
+        ).values_list("year", "movie_id", "winner"))
+        new_prize_keys = [
+            key for key in prize_keys if key not in existing_prizes]
+        Prize.objects.bulk_create(
+            [Prize(year=year, movie_id=movie_id, winner=winner, source_path=prize_keys[year, movie_id, winner].source)
+             for year, movie_id, winner in new_prize_keys],
+            batch_size=batch_size, ignore_conflicts=True)
+        return [(prize_keys[key].movie.producer_name, key[0]) for key in new_prize_keys if key[2]]
+
+    def __get_or_bulk_create_by_name(self, model, names: Iterable[str], batch_size: int) -> Dict[str, int]:
+        """Returns a dict of name -> id for the given model (Producer or Studios),
+        inserting the names that are not in database yet."""
+        names = list(dict.fromkeys(names))
+        ids = self.__ids_by_name(model, names)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            model.objects.bulk_create(
+                [model(name=name) for name in missing], batch_size=batch_size, ignore_conflicts=True)
+            ids.update(self.__ids_by_name(model, missing))
+        return ids
+
+    def __ids_by_name(self, model, names: List[str]) -> Dict[str, int]:
+        ids = {}
+        for _id, name in model.objects.filter(name__in=names).order_by("id").values_list("id", "name"):
+            ids.setdefault(name, _id)
+        return ids
+
+    def __get_or_bulk_create_movies(self, movie_keys: Iterable[tuple], batch_size: int) -> Dict[tuple, int]:
+        """Returns a dict of (name, producer_id, studios_id) -> id, inserting the movies
+        that are not in database yet."""
+        movie_keys = list(movie_keys)
+        ids = self.__movie_ids(movie_keys)
+        missing = [key for key in movie_keys if key not in ids]
+        if missing:
+            Movie.objects.bulk_create(
+                [Movie(name=name, producer_id=producer_id, studios_id=studios_id)
+                 for name, producer_id, studios_id in missing],
+                batch_size=batch_size, ignore_conflicts=True)
+            ids.update(self.__movie_ids(missing))
+        return ids
+
+    def __movie_ids(self, movie_keys: List[tuple]) -> Dict[tuple, int]:
+        keys = set(movie_keys)
+        ids = {}
+        queryset = Movie.objects.filter(
+            name__in={name for name, _, _ in keys}
+        ).order_by("id").values_list("id", "name", "producer_id", "studios_id")
+        for _id, name, producer_id, studios_id in queryset:
+            key = (name, producer_id, studios_id)
+            if key in keys:
+                ids.setdefault(key, _id)
+        return ids
 
     def all_winners(self) -> List[PrizeOutputDTO]:
+        """It gets all the winners with only one query. Instead of loading the Prize model
+        instances and accessing the movie, producer and studios relations (which runs
+        one query for each relation of each winner), it joins the tables and projects only
+        the needed columns, streaming the rows from the database in chunks of
+        ALL_WINNERS_CHUNK_SIZE."""
 
-        items = []
-        for item in Prize.objects.filter(winner=True):
-            prize_output_dto = PrizeOutputDTO(
-                _id=item.id,
-                year=item.year,
-                name=item.movie.name,
-                producer=item.movie.producer.name,
-                studios=item.movie.studios.name,
-                winner=item.winner)
-            items.append(prize_output_dto)
-        return items
+        queryset = Prize.objects.filter(winner=True).order_by("id").values_list(
+            "id", "year", "movie__name", "movie__producer__name", "movie__studios__name", "winner")
+        return [
+            PrizeOutputDTO(
+                _id=_id,
+                year=year,
+                name=name,
+                producer=producer,
+                studios=studios,
+                winner=winner)
+            for _id, year, name, producer, studios, winner in queryset.iterator(chunk_size=ALL_WINNERS_CHUNK_SIZE)
+        ]
+
+    def winner_columns(self, producers: Iterable[str] = None) -> Tuple[List[str], Sequence[int], Sequence[int]]:
+        """It reads only the producer name and the year of the winners, with one query streamed
+        in chunks of ALL_WINNERS_CHUNK_SIZE, and the producers are coded while the rows are read,
+        so no PrizeOutputDTO is built for each winner. If producers is informed, there is one
+        query for each chunk of QUERY_VALUES_CHUNK_SIZE producers."""
+        producer_codes: Dict[str, int] = dict()
+        codes = array("I")
+        years = array("i")
+        queryset = Prize.objects.filter(winner=True).order_by("id").values_list("movie__producer__name", "year")
+        if producers is None:
+            querysets = [queryset]
+        else:
+            producers = list(producers)
+            querysets = [
+                queryset.filter(movie__producer__name__in=producers[start:start + QUERY_VALUES_CHUNK_SIZE])
+                for start in range(0, len(producers), QUERY_VALUES_CHUNK_SIZE)]
+        for queryset in querysets:
+            for producer, year in queryset.iterator(chunk_size=ALL_WINNERS_CHUNK_SIZE):
+                codes.append(producer_codes.setdefault(producer, len(producer_codes)))
+                years.append(year)
+        return list(producer_codes), codes, years
+
+    def delete_prizes(self, source_path: str, keys: Iterable[Tuple[int, str]]) -> Set[str]:
+        """The prizes are deleted in one transaction, with one query for each chunk of
+        QUERY_VALUES_CHUNK_SIZE keys, after the producers of their winners are read. The
+        producers, studios and movies are kept, as they are only read through the prizes.
+
+        As the interval index can not remove winners, it is not updated, so it will be rebuilt
+        when it is requested after the dataset version is bumped."""
+        keys = list(dict.fromkeys(keys))
+        producers = set()
+        if not keys:
+            return producers
+        with transaction.atomic():
+            for start in range(0, len(keys), QUERY_VALUES_CHUNK_SIZE):
+                prizes = Prize.objects.filter(source_path=source_path).filter(reduce(or_, (
+                    Q(year=year, movie__name=name)
+                    for year, name in keys[start:start + QUERY_VALUES_CHUNK_SIZE])))
+                producers.update(prizes.filter(winner=True).values_list("movie__producer__name", flat=True))
+                prizes.delete()
+        self.result_cache.bump_version_on_commit()
+        return producers
 
     def delete_all(self):
 
@@ -53,3 +225,10 @@ class DjangoPrizeRepository(PrizeRepository):
         Studios.objects.all().delete()
         Movie.objects.all().delete()
         Prize.objects.all().delete()
+        self.result_cache.bump_version_on_commit(
+            lambda previous, version: self.interval_index.clear(version=version))
+
+    def dataset_version(self) -> int:
+        """The dataset version is kept by the ResultCache, and it is bumped when the
+        transactions of the create, bulk_create, delete_prizes and delete_all methods commit."""
+        return self.result_cache.version()
@@ -0,0 +1,93 @@
+from typing import Iterable, List, Optional
+from django.db import connection, transaction
+from django.db.models import Q
+from app.models import ProducerGap
+from repository.producer_gap_repository import ProducerGapDTO, ProducerGapRepository
+from texo.settings import CSV_IMPORT_BATCH_SIZE, QUERY_VALUES_CHUNK_SIZE
+
+
+class DjangoProducerGapRepository(ProducerGapRepository):
+    """The gaps are written in the transaction of the caller (e.g. the transaction of the import that
+    wrote the prizes), and the writes of the gaps are serialized until it ends (see __lock)."""
+
+    def replace_all(self, gaps: Iterable[ProducerGapDTO]):
+        """Deletes the saved gaps and saves the informed ones in the same transaction, so the
+        pages are never read with half of the gaps."""
+        with transaction.atomic():
+            self.__lock()
+            ProducerGap.objects.all().delete()
+            self.__bulk_create(gaps)
+
+    def replace_producers(self, producers: Iterable[str], gaps: Iterable[ProducerGapDTO]):
+        """Deletes the gaps of the producers, with one query for each chunk of QUERY_VALUES_CHUNK_SIZE
+        producers, and saves the informed ones in the same transaction."""
+        producers = list(producers)
+        with transaction.atomic():
+            self.__lock()
+            for start in range(0, len(producers), QUERY_VALUES_CHUNK_SIZE):
+                ProducerGap.objects.filter(
+                    producer__in=producers[start:start + QUERY_VALUES_CHUNK_SIZE]).delete()
+            self.__bulk_create(gaps)
+
+    def __bulk_create(self, gaps: Iterable[ProducerGapDTO]):
+        ProducerGap.objects.bulk_create((
+            ProducerGap(
+                producer=gap.producer,
+                previous_win=gap.previous_win,
+                following_win=gap.following_win,
+                interval=gap.interval)
+            for gap in gaps), batch_size=CSV_IMPORT_BATCH_SIZE)
+
+    def __lock(self):
+        """Locks the gaps table against the writes of the other transactions until the transaction ends, so
+        two rebuilds do not delete the same gaps and both insert the new ones. The reads are not blocked. In
+        SQLite, the database only has one writer at a time, so the table does not need to be locked."""
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"LOCK TABLE {connection.ops.quote_name(ProducerGap._meta.db_table)} IN SHARE ROW EXCLUSIVE MODE")
+
+    def page(self,
+             ordering: str,
+             limit: int,
+             after: Optional[tuple] = None,
+             min_year: int = None,
+             max_year: int = None,
+             min_interval: int = None,
+             max_interval: int = None) -> List[ProducerGapDTO]:
+        """The gaps are read in the order of the indexes of the ProducerGap model, and the next
+        pages are filtered by the key of the last item (keyset pagination), so the database does
+        not need to skip the items of the previous pages."""
+        fields = ["id" if field == "_id" else field for field in self.ORDERINGS[ordering]]
+        descending = ordering.startswith("-")
+        queryset = ProducerGap.objects.all()
+        if min_year is not None:
+            queryset = queryset.filter(previous_win__gte=min_year)
+        if max_year is not None:
+            queryset = queryset.filter(following_win__lte=max_year)
+        if min_interval is not None:
+            queryset = queryset.filter(interval__gte=min_interval)
+        if max_interval is not None:
+            queryset = queryset.filter(interval__lte=max_interval)
+        if after is not None:
+            queryset = queryset.filter(self.__after(fields, after, descending))
+        queryset = queryset.order_by(*[f"-{field}" if descending else field for field in fields])
+        return [
+            ProducerGapDTO(
+                _id=_id,
+                producer=producer,
+                previous_win=previous_win,
+                following_win=following_win)
+            for _id, producer, previous_win, following_win in queryset.values_list(
+                "id", "producer", "previous_win", "following_win")[:limit]
+        ]
+
+    def __after(self, fields: List[str], key: tuple, descending: bool) -> Q:
+        """Returns the condition of the items after the key: (a, b, c) > (x, y, z) is
+        a > x or (a = x and b > y) or (a = x and b = y and c > z)."""
+        lookup = "lt" if descending else "gt"
+        condition = Q()
+        for position, field in enumerate(fields):
+            equal_fields = {fields[previous]: key[previous] for previous in range(position)}
+            condition |= Q(**equal_fields, **{f"{field}__{lookup}": key[position]})
+        return condition
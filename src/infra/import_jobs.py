@@ -0,0 +1,98 @@
+from collections import OrderedDict
+import time
+from threading import Lock
+from typing import Optional
+import uuid
+from app.models import ImportJob as ImportJobModel
+
+
+class ImportJob:
+    """The state of the import of an uploaded CSV file (see scripts.import_csv_upload):
+
+    - 'running': the file is being read, and the stats are the counts of the rows already read;
+    - 'completed' or 'failed': the import finished.
+
+    The stats (a scripts.csv_file_parser.CSVFileStats) and the rejects (a RejectsReport) are updated by
+    the import while it runs."""
+
+    # Quantity of rejected rows that are returned by the dict, so the response has a bounded size.
+    MAX_REJECTED_ROWS = 100
+
+    def __init__(self, stats, rejects):
+        self.id = uuid.uuid4().hex
+        self.stats = stats
+        self.rejects = rejects
+        self.state = "running"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def finish(self, error: str = None):
+        self.state = "failed" if error else "completed"
+        self.error = error
+        self.finished_at = time.time()
+
+    def dict(self) -> dict:
+        """The rowCount includes the header row, as the counts of the import of the folder (see
+        scripts.csv_file_parser.CSVFileStats), and the failedCount is the quantity of producers that were
+        not imported because their rows are not valid."""
+        return {
+            "jobId": self.id,
+            "state": self.state,
+            "rowCount": self.stats.row_count,
+            "producersCount": self.stats.producers_count,
+            "failedCount": self.stats.producers_failed_count,
+            "rejectedRows": [
+                {"row": row.row_number, "message": row.message}
+                for row in self.rejects.rows[:self.MAX_REJECTED_ROWS]],
+            "error": self.error,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+
+
+class ImportJobs:
+    """It keeps the import jobs of this process, so their state can be requested by their id. Only the
+    last max_jobs jobs are kept.
+
+    The jobs are also saved in the database (see app.models.ImportJob) when they are created and when they
+    finish, so the processes that share the database answer the state of the jobs of the other processes
+    too. The counts of a running job are only updated by the process that imports it, as the rows are
+    imported in a transaction; the other processes answer the counts when it finishes."""
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self.__lock = Lock()
+        self.__jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+
+    def create(self, stats, rejects) -> ImportJob:
+        job = ImportJob(stats, rejects)
+        with self.__lock:
+            self.__jobs[job.id] = job
+            while len(self.__jobs) > self.max_jobs:
+                self.__jobs.popitem(last=False)
+        ImportJobModel.objects.create(job_id=job.id, state=job.state, data=job.dict(), started_at=job.started_at)
+        ImportJobModel.objects.filter(
+            pk__in=ImportJobModel.objects.order_by("-started_at").values("pk")[self.max_jobs:]).delete()
+        return job
+
+    def finish(self, job: ImportJob, error: str = None):
+        """Finishes the job and saves its state."""
+        job.finish(error)
+        ImportJobModel.objects.filter(job_id=job.id).update(state=job.state, data=job.dict())
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """Returns the job of this process."""
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def find(self, job_id: str) -> Optional[dict]:
+        """Returns the dict of the job of this process or, if it is not one of them, the saved dict of the
+        job of another process."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.dict()
+        return ImportJobModel.objects.filter(job_id=job_id).values_list("data", flat=True).first()
+
+
+import_jobs = ImportJobs()
@@ -0,0 +1,46 @@
+import os
+from threading import Lock
+from typing import Dict, IO
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class ImportLock:
+    """It is an exclusive lock of a file held by one process until it finishes, so only one of the
+    processes that share the database (e.g. the workers of a server) imports and watches the CSV
+    files (see scripts.background_import). The lock is released by the operating system when the
+    process finishes, even if it is killed.
+
+    The files are locked by fcntl.flock, so the lock is only shared by the processes of the same
+    host. If fcntl is not available (e.g. on Windows), the lock is always acquired."""
+
+    __lock = Lock()
+    __files: Dict[str, IO] = dict()
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+
+    def acquire(self) -> bool:
+        """Acquires the lock without waiting. It returns False if it is held by another process, or
+        True if it was acquired (or if it was already held by this process)."""
+        with ImportLock.__lock:
+            if self.path in ImportLock.__files:
+                return True
+            lock_file = open(self.path, "a")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return False
+            ImportLock.__files[self.path] = lock_file
+            return True
+
+    def release(self):
+        with ImportLock.__lock:
+            lock_file = ImportLock.__files.pop(self.path, None)
+            if lock_file is not None:
+                lock_file.close()
@@ -0,0 +1,89 @@
+import os
+import time
+from threading import Lock
+from typing import Dict, Iterable, Optional
+
+
+class ImportProgress:
+    """It keeps the state of the CSV import of this process, so the application can serve the
+    liveness and readiness endpoints while the data is imported in the background:
+
+    - 'idle': no import was started by this process (e.g. the management commands and the tests),
+      so the data that is in the database is served;
+    - 'running': the import was started and the progress is the position of the rows already read,
+      from the quantity of lines of the CSV files;
+    - 'completed' or 'failed': the import finished.
+
+    The application is ready when it is idle or after the first import completed. If a later import
+    is running (or failed), the data of the previous one is still served."""
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.state = "idle"
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.__completed_once = False
+        self.__file_rows: Dict[str, int] = dict()
+        self.__file_positions: Dict[str, int] = dict()
+
+    def start(self, csv_files: Iterable[str]):
+        """Starts the progress of the import of the files, counting their lines."""
+        file_rows = {os.path.abspath(csv_file): _count_lines(csv_file) for csv_file in csv_files}
+        with self.__lock:
+            self.state = "running"
+            self.error = None
+            self.started_at = time.time()
+            self.finished_at = None
+            self.__file_rows = file_rows
+            self.__file_positions = dict()
+
+    def advance(self, csv_file: str, row_number: int = None):
+        """Sets the position of the rows already read of the file. If the row number is None, all
+        the file was read. The files that were not informed to the start are ignored."""
+        path = os.path.abspath(csv_file)
+        with self.__lock:
+            if self.state != "running" or path not in self.__file_rows:
+                return
+            rows = self.__file_rows[path]
+            self.__file_positions[path] = rows if row_number is None else min(row_number, rows)
+
+    def finish(self, error: str = None):
+        with self.__lock:
+            self.state = "failed" if error else "completed"
+            self.error = error
+            self.finished_at = time.time()
+            self.__completed_once = self.__completed_once or error is None
+
+    def is_ready(self) -> bool:
+        return self.state == "idle" or self.__completed_once
+
+    def percent(self) -> float:
+        with self.__lock:
+            if self.state == "completed":
+                return 100.0
+            total = sum(self.__file_rows.values())
+            if not total:
+                return 0.0
+            return round(100 * sum(self.__file_positions.values()) / total, 1)
+
+    def dict(self) -> dict:
+        return {
+            "state": self.state,
+            "ready": self.is_ready(),
+            "progress": self.percent(),
+            "error": self.error,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+
+
+def _count_lines(csv_file: str) -> int:
+    lines = 0
+    with open(csv_file, "rb") as opened_file:
+        for chunk in iter(lambda: opened_file.read(1024 * 1024), b""):
+            lines += chunk.count(b"\n")
+    return max(lines, 1)
+
+
+import_progress = ImportProgress()
@@ -0,0 +1,225 @@
+from array import array
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from repository.prize_repository import MovieInputDTO, PrizeInputDTO, PrizeOutputDTO, PrizeRepository
+from repository.interval_index import PrizeIntervalIndex, interval_index as default_interval_index
+from infra.result_cache import ResultCache, result_cache as default_result_cache
+
+
+class StringTable:
+    """It keeps each distinct string once, so a column only keeps the integer id of the string."""
+
+    def __init__(self):
+        self.values: List[str] = list()
+        self.__ids: Dict[str, int] = dict()
+
+    def copy(self) -> 'StringTable':
+        table = StringTable()
+        table.values = list(self.values)
+        table.__ids = dict(self.__ids)
+        return table
+
+    def intern(self, value: str) -> int:
+        _id = self.__ids.get(value)
+        if _id is None:
+            _id = self.__ids[value] = len(self.values)
+            self.values.append(value)
+        return _id
+
+    def find(self, value: str) -> Optional[int]:
+        """Returns the id of the string, or None if it was never interned."""
+        return self.__ids.get(value)
+
+    def __getitem__(self, _id: int) -> str:
+        return self.values[_id]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class InMemoryColumnarPrizeRepository(PrizeRepository):
+    """This repository keeps the prizes in the process memory instead of the database. Each
+    field of the prizes is a column backed by an array: the years are kept as array('H') and
+    the movie, producer and studios names are interned in string tables, so their columns are
+    arrays of integer ids. The winners are also kept in their own producer and year columns,
+    so the interval filters can read them without building one object per winner (see the
+    winner_columns method). The path of the CSV file of each prize (see the source of the
+    PrizeInputDTO) is kept in a column too, so the delta import can delete the prizes of its rows.
+
+    As the Django models, a prize is not duplicated when the same (year, movie, producer,
+    studios, winner) is created twice.
+
+    The data is lost when the process finishes, so the CSV files are imported on every start.
+    """
+
+    persistent = False
+
+    def __init__(self, result_cache: ResultCache = None, interval_index: PrizeIntervalIndex = None):
+        self.result_cache = default_result_cache if result_cache is None else result_cache
+        self.interval_index = default_interval_index if interval_index is None else interval_index
+        self.__lock = RLock()
+        self.__clear()
+
+    def __clear(self):
+        self.__movie_names = StringTable()
+        self.__producer_names = StringTable()
+        self.__studio_names = StringTable()
+        self.__source_paths = StringTable()
+        self.__years = array("H")
+        self.__movies = array("I")
+        self.__producers = array("I")
+        self.__studios = array("I")
+        self.__winners = array("B")
+        self.__sources = array("I")
+        self.__winner_rows = array("I")
+        self.__winner_producers = array("I")
+        self.__winner_years = array("H")
+        self.__prize_keys = set()
+
+    def create(self, year: int, movie: MovieInputDTO, winner: bool):
+        self.bulk_create([PrizeInputDTO(year=year, movie=movie, winner=winner)])
+
+    def bulk_create(self, batch: List[PrizeInputDTO], batch_size: int = None):
+        """It appends the prizes to the columns. The batch_size is ignored, as there is no
+        round trip to a database. If a year does not fit in the array (0 to 65535), an
+        OverflowError is raised and the prizes of the batch before it are kept."""
+        created_winners = []
+        with self.__lock:
+            try:
+                for item in batch:
+                    movie = self.__movie_names.intern(item.movie.name)
+                    producer = self.__producer_names.intern(item.movie.producer_name)
+                    studios = self.__studio_names.intern(item.movie.studio_name)
+                    winner = bool(item.winner)
+                    key = (item.year, movie, producer, studios, winner)
+                    if key in self.__prize_keys:
+                        continue
+
+                    self.__years.append(item.year)
+                    self.__prize_keys.add(key)
+                    self.__movies.append(movie)
+                    self.__producers.append(producer)
+                    self.__studios.append(studios)
+                    self.__winners.append(winner)
+                    self.__sources.append(self.__source_paths.intern(item.source))
+                    if winner:
+                        self.__winner_rows.append(len(self.__years) - 1)
+                        self.__winner_producers.append(producer)
+                        self.__winner_years.append(item.year)
+                        created_winners.append((item.movie.producer_name, item.year))
+            finally:
+                self.__written(created_winners)
+
+    def __written(self, created_winners: List[Tuple[str, int]]):
+        """The same of the DjangoPrizeRepository: after each write, the dataset version is
+        bumped and, if the interval index was in sync, the created winners are added to it."""
+        index_in_sync = self.interval_index.version == self.result_cache.version()
+        version = self.result_cache.bump_version()
+        if index_in_sync:
+            self.interval_index.add_many(created_winners, version)
+
+    def all_winners(self) -> List[PrizeOutputDTO]:
+        """The winners are returned in the order they were created, and the _id is the
+        position of the prize in the columns plus one."""
+        with self.__lock:
+            return [
+                PrizeOutputDTO(
+                    _id=row + 1,
+                    year=self.__years[row],
+                    name=self.__movie_names[self.__movies[row]],
+                    producer=self.__producer_names[self.__producers[row]],
+                    studios=self.__studio_names[self.__studios[row]],
+                    winner=True)
+                for row in self.__winner_rows
+            ]
+
+    def winner_columns(self, producers: Iterable[str] = None) -> Tuple[List[str], Sequence[int], Sequence[int]]:
+        """Returns copies of the winners columns, so they are not changed by the next writes. If
+        producers is informed, only the positions of their winners are copied."""
+        with self.__lock:
+            if producers is None:
+                return (list(self.__producer_names.values),
+                        array("I", self.__winner_producers),
+                        array("H", self.__winner_years))
+            producer_ids = {self.__producer_names.find(producer) for producer in producers} - {None}
+            positions = [position for position, producer in enumerate(self.__winner_producers)
+                         if producer in producer_ids]
+            return (list(self.__producer_names.values),
+                    array("I", (self.__winner_producers[position] for position in positions)),
+                    array("H", (self.__winner_years[position] for position in positions)))
+
+    def delete_prizes(self, source_path: str, keys: Iterable[Tuple[int, str]]) -> Set[str]:
+        """The columns are rebuilt without the rows of the deleted prizes, so the _id of the
+        following prizes changes. The interval index is cleared, as it can not remove winners."""
+        producers = set()
+        with self.__lock:
+            source = self.__source_paths.find(source_path)
+            keys = {(year, self.__movie_names.find(name)) for year, name in keys}
+            if source is None or not keys:
+                return producers
+            rows = [row for row in range(len(self.__years))
+                    if self.__sources[row] == source and (self.__years[row], self.__movies[row]) in keys]
+            if not rows:
+                return producers
+            kept = sorted(set(range(len(self.__years))) - set(rows))
+            producers = {self.__producer_names[self.__producers[row]] for row in rows if self.__winners[row]}
+            self.__years = array("H", (self.__years[row] for row in kept))
+            self.__movies = array("I", (self.__movies[row] for row in kept))
+            self.__producers = array("I", (self.__producers[row] for row in kept))
+            self.__studios = array("I", (self.__studios[row] for row in kept))
+            self.__winners = array("B", (self.__winners[row] for row in kept))
+            self.__sources = array("I", (self.__sources[row] for row in kept))
+            self.__winner_rows = array("I", (row for row in range(len(kept)) if self.__winners[row]))
+            self.__winner_producers = array("I", (self.__producers[row] for row in self.__winner_rows))
+            self.__winner_years = array("H", (self.__years[row] for row in self.__winner_rows))
+            self.__prize_keys = {
+                (self.__years[row], self.__movies[row], self.__producers[row], self.__studios[row],
+                 bool(self.__winners[row])) for row in range(len(kept))}
+            self.interval_index.clear(version=self.result_cache.bump_version())
+        return producers
+
+    def delete_all(self):
+        with self.__lock:
+            self.__clear()
+            self.interval_index.clear(version=self.result_cache.bump_version())
+
+    def copy(self, result_cache: ResultCache = None,
+             interval_index: PrizeIntervalIndex = None) -> 'InMemoryColumnarPrizeRepository':
+        """Returns a repository with copies of the columns, so the changes of the watched CSV folder
+        can be written to it while this one is read, before it replaces this one (see the
+        replace_with method). Only the repositories that are not persistent have this method."""
+        other = InMemoryColumnarPrizeRepository(result_cache=result_cache, interval_index=interval_index)
+        with self.__lock:
+            other.__movie_names, other.__producer_names = self.__movie_names.copy(), self.__producer_names.copy()
+            other.__studio_names, other.__source_paths = self.__studio_names.copy(), self.__source_paths.copy()
+            other.__years, other.__movies, other.__producers = \
+                array("H", self.__years), array("I", self.__movies), array("I", self.__producers)
+            other.__studios, other.__winners, other.__sources = \
+                array("I", self.__studios), array("B", self.__winners), array("I", self.__sources)
+            other.__winner_rows, other.__winner_producers, other.__winner_years = \
+                array("I", self.__winner_rows), array("I", self.__winner_producers), array("H", self.__winner_years)
+            other.__prize_keys = set(self.__prize_keys)
+        return other
+
+    def replace_with(self, other: 'InMemoryColumnarPrizeRepository'):
+        """Replaces all the data by the data of the other repository at once, so the readers see all
+        the old data or all the new data. It is used by the ingestion of the watched CSV folder (see
+        scripts.watch_csv_folder), as this repository is not persistent, so it can not write the new
+        data in a transaction. Only the repositories that are not persistent have this method.
+
+        The columns of the other repository are moved to this one while the lock is held, and the
+        other one is cleared, as its columns are not copied."""
+        with self.__lock, other.__lock:
+            self.__movie_names, self.__producer_names, self.__studio_names, self.__source_paths = \
+                other.__movie_names, other.__producer_names, other.__studio_names, other.__source_paths
+            self.__years, self.__movies, self.__producers, self.__studios, self.__winners, self.__sources = \
+                other.__years, other.__movies, other.__producers, other.__studios, other.__winners, \
+                other.__sources
+            self.__winner_rows, self.__winner_producers, self.__winner_years = \
+                other.__winner_rows, other.__winner_producers, other.__winner_years
+            self.__prize_keys = other.__prize_keys
+            other.__clear()
+            self.interval_index.clear(version=self.result_cache.bump_version())
+
+    def dataset_version(self) -> int:
+        return self.result_cache.version()
@@ -0,0 +1,73 @@
+from bisect import bisect_left, bisect_right
+from itertools import count
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+from repository.producer_gap_repository import ProducerGapDTO, ProducerGapRepository
+
+
+class InMemoryProducerGapRepository(ProducerGapRepository):
+    """This repository keeps the producer gaps in the process memory, for the InMemoryColumnarPrizeRepository
+    (see PRIZE_REPOSITORY at texo.settings), whose data is not in the database either.
+
+    The gaps are sorted once for each ordering, when it is requested for the first time after they
+    change, so each page is found by a binary search of the key after which it starts."""
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__ids = count(1)
+        self.__gaps: List[ProducerGapDTO] = list()
+        self.__sorted: Dict[str, tuple] = dict()
+
+    def replace_all(self, gaps: Iterable[ProducerGapDTO]):
+        gaps = self.__with_ids(gaps)
+        with self.__lock:
+            self.__gaps = gaps
+            self.__sorted = dict()
+
+    def replace_producers(self, producers: Iterable[str], gaps: Iterable[ProducerGapDTO]):
+        producers = set(producers)
+        gaps = self.__with_ids(gaps)
+        with self.__lock:
+            self.__gaps = [gap for gap in self.__gaps if gap.producer not in producers] + gaps
+            self.__sorted = dict()
+
+    def page(self,
+             ordering: str,
+             limit: int,
+             after: Optional[tuple] = None,
+             min_year: int = None,
+             max_year: int = None,
+             min_interval: int = None,
+             max_interval: int = None) -> List[ProducerGapDTO]:
+        gaps, keys = self.__sorted_gaps(ordering)
+        descending = ordering.startswith("-")
+        start = 0
+        if after is not None:
+            # The keys are sorted in the ascending order, so a descending page starts before the key.
+            start = len(keys) - bisect_left(keys, tuple(after)) if descending else bisect_right(keys, tuple(after))
+        page = []
+        for position in range(start, len(gaps)):
+            gap = gaps[len(gaps) - 1 - position] if descending else gaps[position]
+            if (min_year is not None and gap.previous_win < min_year) or \
+                    (max_year is not None and gap.following_win > max_year) or \
+                    (min_interval is not None and gap.interval < min_interval) or \
+                    (max_interval is not None and gap.interval > max_interval):
+                continue
+            page.append(gap)
+            if len(page) == limit:
+                break
+        return page
+
+    def __sorted_gaps(self, ordering: str) -> tuple:
+        with self.__lock:
+            sorted_gaps = self.__sorted.get(ordering)
+            if sorted_gaps is None:
+                gaps = sorted(self.__gaps, key=lambda gap: gap.key(ordering))
+                sorted_gaps = self.__sorted[ordering] = (gaps, [gap.key(ordering) for gap in gaps])
+            return sorted_gaps
+
+    def __with_ids(self, gaps: Iterable[ProducerGapDTO]) -> List[ProducerGapDTO]:
+        gaps = list(gaps)
+        for gap in gaps:
+            gap._id = next(self.__ids)
+        return gaps
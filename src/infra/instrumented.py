@@ -0,0 +1,72 @@
+from typing import Iterable, List, Sequence, Set, Tuple
+from repository.filters import Filter
+from repository.prize_repository import MovieInputDTO, PrizeInputDTO, PrizeOutputDTO, PrizeRepository
+from infra.metrics import instrument
+
+
+class InstrumentedPrizeRepository(PrizeRepository):
+    """It sends the calls to the informed repository, recording the duration and the database
+    queries of the create, bulk_create, all_winners, winner_columns, delete_prizes, delete_all, copy
+    and replace_with methods in the infra.metrics registry (see the /metrics endpoint)."""
+
+    def __init__(self, repository: PrizeRepository):
+        self.repository = repository
+
+    @property
+    def persistent(self) -> bool:
+        return self.repository.persistent
+
+    def create(self, year: int, movie: MovieInputDTO, winner: bool):
+        with instrument("prize_repository.create"):
+            return self.repository.create(year=year, movie=movie, winner=winner)
+
+    def bulk_create(self, batch: List[PrizeInputDTO], batch_size: int = None):
+        with instrument("prize_repository.bulk_create"):
+            return self.repository.bulk_create(batch, batch_size=batch_size)
+
+    def all_winners(self) -> List[PrizeOutputDTO]:
+        with instrument("prize_repository.all_winners"):
+            return self.repository.all_winners()
+
+    def winner_columns(self, producers: Iterable[str] = None) -> Tuple[List[str], Sequence[int], Sequence[int]]:
+        with instrument("prize_repository.winner_columns"):
+            return self.repository.winner_columns(producers)
+
+    def delete_prizes(self, source_path: str, keys: Iterable[Tuple[int, str]]) -> Set[str]:
+        with instrument("prize_repository.delete_prizes"):
+            return self.repository.delete_prizes(source_path, keys)
+
+    def delete_all(self):
+        with instrument("prize_repository.delete_all"):
+            return self.repository.delete_all()
+
+    def copy(self, result_cache=None, interval_index=None) -> PrizeRepository:
+        """Only the repositories that are not persistent can be copied (see the
+        InMemoryColumnarPrizeRepository.copy). The copy is not instrumented."""
+        with instrument("prize_repository.copy"):
+            return self.repository.copy(result_cache=result_cache, interval_index=interval_index)
+
+    def replace_with(self, other: PrizeRepository):
+        """Only the repositories that are not persistent can be replaced (see the
+        InMemoryColumnarPrizeRepository.replace_with)."""
+        with instrument("prize_repository.replace_with"):
+            return self.repository.replace_with(other)
+
+    def dataset_version(self) -> int:
+        return self.repository.dataset_version()
+
+
+class InstrumentedFilter(Filter):
+    """It records the duration and the database queries of the execute method of the informed
+    filter, labeled with the engine name."""
+
+    def __init__(self, interval_filter: Filter, engine: str):
+        self.interval_filter = interval_filter
+        self.engine = engine
+
+    def execute(self):
+        with instrument(f"prize_interval_filter.{self.engine}.execute"):
+            return self.interval_filter.execute()
+
+    def get_schema(self):
+        return self.interval_filter.get_schema()
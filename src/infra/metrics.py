@@ -0,0 +1,144 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterator, List, Sequence, Tuple
+from django.db import connection
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names: Sequence[str], label_values: Tuple[str, ...], extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A value that only increases, for each combination of the label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.__lock = Lock()
+        self.__values: Dict[Tuple[str, ...], float] = dict()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self.__lock:
+            self.__values[key] = self.__values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self.__values.get(tuple(labels[name] for name in self.label_names), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.__lock:
+            for key, value in sorted(self.__values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """It counts the observed values in cumulative buckets (the quantity of values lower than or
+    equal to each bucket upper bound), keeping also their sum and quantity, for each combination
+    of the label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = Lock()
+        self.__values: Dict[Tuple[str, ...], list] = dict()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        position = bisect_left(self.buckets, value)
+        with self.__lock:
+            counts, total = self.__values.get(key) or ([0] * (len(self.buckets) + 1), [0.0])
+            counts[position] += 1
+            total[0] += value
+            self.__values[key] = (counts, total)
+
+    def count(self, **labels) -> int:
+        values = self.__values.get(tuple(labels[name] for name in self.label_names))
+        return sum(values[0]) if values else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.__lock:
+            for key, (counts, total) in sorted(self.__values.items()):
+                cumulative = 0
+                for upper_bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    le = f'le="{upper_bound}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """It keeps the metrics of this process and renders them in the Prometheus text format. When
+    the application runs in many processes (e.g. many ASGI workers), each one has its own metrics."""
+
+    def __init__(self):
+        self.__metrics: Dict[str, object] = dict()
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.__metrics.setdefault(name, Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.__metrics.setdefault(name, Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.__metrics.values() for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+operation_duration_seconds = registry.histogram(
+    "texo_operation_duration_seconds", "Duration of the instrumented operations.", ["operation"])
+operation_queries_total = registry.counter(
+    "texo_operation_queries_total", "Database queries run by the instrumented operations.", ["operation"])
+operation_errors_total = registry.counter(
+    "texo_operation_errors_total", "Instrumented operations that raised an exception.", ["operation"])
+import_rows_total = registry.counter(
+    "texo_import_rows_total", "Rows read from the CSV files by the import, including the headers.")
+import_producers_total = registry.counter(
+    "texo_import_producers_total", "Producers read from the CSV files by the import.", ["result"])
+
+
+@contextmanager
+def instrument(operation: str) -> Iterator[None]:
+    """Records the duration of the block and the quantity of database queries that it runs on the
+    connection of the current thread. If the block raises an exception, it is also counted."""
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    try:
+        with connection.execute_wrapper(count_query):
+            yield
+    except BaseException:
+        operation_errors_total.inc(operation=operation)
+        raise
+    finally:
+        operation_duration_seconds.observe(perf_counter() - start, operation=operation)
+        operation_queries_total.inc(queries, operation=operation)
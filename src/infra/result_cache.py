@@ -0,0 +1,154 @@
+from threading import Lock
+from time import time, time_ns
+from typing import Any, Callable, Dict, Tuple
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from texo.settings import DATASET_VERSION_STORE, RESULT_CACHE_ALIAS
+
+
+class ResultCache:
+    """This cache keeps the results that are computed from the whole dataset (like the prize
+    interval summary), so they are only computed again after the dataset changes.
+
+    Each result is saved with the dataset version that was used to compute it. The repository
+    bumps the dataset version on every write, so a result saved with an older version is
+    never returned.
+
+    If the alias is None, the results are kept in this process memory. Otherwise they are kept
+    in the Django cache backend with the informed alias (configured in texo.settings CACHES), so
+    they can be shared between workers.
+
+    The dataset version is kept where the version_store says:
+
+    - 'cache': with the results (in this process memory or in the cache backend of the alias);
+    - 'database': in the DatasetVersion row (see app.models), which is bumped in the same transaction
+      of the writes, so all the processes that share the database read the same version, and it is
+      kept when they restart.
+
+    It also keeps when the dataset version was bumped for the last time, so the responses can be
+    sent with the Last-Modified header.
+    """
+
+    VERSION_KEY = "dataset_version"
+    MODIFIED_AT_KEY = "dataset_modified_at"
+
+    def __init__(self, alias: str = None, prefix: str = "texo", version_store: str = "cache"):
+        self.alias = alias
+        self.prefix = prefix
+        self.version_store = version_store
+        self.__lock = Lock()
+        self.__version = 0
+        self.__modified_at = time()
+        self.__results: Dict[str, Tuple[int, Any]] = dict()
+
+    def version(self) -> int:
+        return self.dataset_state()[0]
+
+    def modified_at(self) -> float:
+        """Returns the timestamp of the last bump of the dataset version. If it was never bumped,
+        it is the time that the version was requested (or created in the database) for the first time."""
+        return self.dataset_state()[1]
+
+    def dataset_state(self) -> Tuple[int, float]:
+        """Returns the dataset version and the timestamp of its last bump, read at once."""
+        if self.version_store == "database":
+            from app.models import DatasetVersion
+            state = DatasetVersion.objects.filter(id=DatasetVersion.SINGLETON_ID).values_list(
+                "version", "modified_at").first()
+            return (0, self.__modified_at) if state is None else (state[0], state[1].timestamp())
+        if self.alias is None:
+            return self.__version, self.__modified_at
+        backend = self.__backend()
+        key = self.__key(self.MODIFIED_AT_KEY)
+        backend.add(key, time(), timeout=None)
+        state = backend.get_many([self.__key(self.VERSION_KEY), key])
+        return state.get(self.__key(self.VERSION_KEY), 0), state[key]
+
+    def bump_version(self) -> int:
+        """Increments the dataset version, invalidating all the saved results. With the 'database'
+        store, the version is bumped in the current transaction (if there is one)."""
+        if self.version_store == "database":
+            return self.__bump_database_version()[1]
+        if self.alias is None:
+            with self.__lock:
+                self.__version += 1
+                self.__modified_at = time()
+                self.__results.clear()
+                return self.__version
+        backend = self.__backend()
+        key = self.__key(self.VERSION_KEY)
+        backend.add(key, 0, timeout=None)
+        version = backend.incr(key)
+        backend.set(self.__key(self.MODIFIED_AT_KEY), time(), timeout=None)
+        return version
+
+    def bump_version_on_commit(self, on_bumped: Callable[[int, int], None] = None):
+        """Bumps the dataset version for the writes of the current transaction:
+
+        - With the 'database' store, it is bumped in the transaction, so the other processes read the new
+          version with the new data;
+        - Or else, it is bumped when the transaction commits, so the results are never computed from
+          uncommitted data and saved with the new version.
+
+        After the commit, on_bumped is called with the previous and the new version. If the transaction is
+        rolled back, nothing changes."""
+        if self.version_store == "database":
+            previous, version = self.__bump_database_version()
+            if on_bumped is not None:
+                transaction.on_commit(lambda: on_bumped(previous, version))
+            return
+
+        def bump():
+            previous = self.version()
+            version = self.bump_version()
+            if on_bumped is not None:
+                on_bumped(previous, version)
+        transaction.on_commit(bump)
+
+    def get_or_compute(self, name: str, version: int, compute: Callable[[], Any]) -> Any:
+        """Returns the result saved for the name and dataset version. If there is not one,
+        it calls compute and saves its result before returning it."""
+        if self.alias is None:
+            saved = self.__results.get(name)
+            if saved is not None and saved[0] == version:
+                return saved[1]
+            result = compute()
+            with self.__lock:
+                # The version of the database is bumped by the other processes too, so this process
+                # does not know the current one.
+                if version == self.__version or self.version_store == "database":
+                    self.__results[name] = (version, result)
+            return result
+
+        backend = self.__backend()
+        key = self.__key(f"{name}:{version}")
+        result = backend.get(key)
+        if result is None:
+            result = compute()
+            backend.set(key, result)
+        return result
+
+    def __bump_database_version(self) -> Tuple[int, int]:
+        """Returns the previous and the new version. The row is locked by the update until the transaction
+        ends, so the previous version is the one that the new version replaced."""
+        from app.models import DatasetVersion
+        now = timezone.now()
+        with transaction.atomic():
+            rows = DatasetVersion.objects.filter(id=DatasetVersion.SINGLETON_ID)
+            if not rows.update(previous_version=F("version"), modified_at=now,
+                               version=Greatest(F("version") + 1, Value(time_ns()))):
+                DatasetVersion.objects.create(
+                    id=DatasetVersion.SINGLETON_ID, version=time_ns(), previous_version=0, modified_at=now)
+            return rows.values_list("previous_version", "version").get()
+
+    def __backend(self):
+        return caches[self.alias]
+
+    def __key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+
+result_cache = ResultCache(alias=RESULT_CACHE_ALIAS, version_store=DATASET_VERSION_STORE)
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
 from collections import defaultdict
 import logging
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
+import numpy
 from repository.prize_repository import PrizeRepository
+from repository.interval_index import PrizeIntervalIndex, interval_index
 
 
 logger = logging.getLogger(__name__)
@@ -20,6 +22,7 @@ class Filter(ABC):
 
 
 class FilterSchema:
+    __slots__ = ()
 
     @abstractmethod
     def dict(self) -> dict:
@@ -33,7 +36,10 @@ class IntervalCannotBeCalculatedException(Exception):
 
 class ProducerPreviousFollowingWinFilterSchema(FilterSchema):
     """This Filter Schema responsible to return the information of the interval 
-    and the previous and following win from the producer."""
+    and the previous and following win from the producer.
+
+    One schema is created for each producer, so it uses __slots__."""
+    __slots__ = ("producer", "previous_win", "following_win", "__year")
 
     def __init__(self, producer: str, year: int):
         self.producer = producer
@@ -41,6 +47,13 @@ class ProducerPreviousFollowingWinFilterSchema(FilterSchema):
         self.following_win = None
         self.__year = year
 
+    @classmethod
+    def from_gap(cls, producer: str, previous_win: int, following_win: int) -> 'ProducerPreviousFollowingWinFilterSchema':
+        """Creates the schema of a gap that was already calculated."""
+        schema = cls(producer=producer, year=previous_win)
+        schema.update(following_win)
+        return schema
+
     def get_interval(self):
         """Calculates the interval of the previous and following wins. 
         If at least one of them are None, it  will return None or else it returns the 
@@ -173,3 +186,104 @@ class PrizeIntervalFilter:
                 producers_interval_dict[min_producer_index], key=lambda x: x.previous_win))
             self.__max_interval_producers = list(sorted(
                 producers_interval_dict[max_producer_index], key=lambda x: x.previous_win))
+
+
+class IndexedPrizeIntervalFilter(Filter):
+    """It returns the same schema of the PrizeIntervalFilter, but the intervals are read from
+    the PrizeIntervalIndex, which is updated by the repository on each write, instead of
+    iterating all the prize winners on each execution.
+
+    If the index is not in sync with the repository dataset version (e.g. when the application
+    starts with data that was not written by this process), it is rebuilt from the repository
+    winners once, and the next executions only read the smallest and largest intervals.
+
+    As the index keeps all the consecutive wins of each producer, all the producers (and gaps)
+    that are tied with the smallest or the largest interval are returned.
+    """
+
+    def __init__(self, repo: PrizeRepository, index: PrizeIntervalIndex = interval_index):
+        self.repo = repo
+        self.index = index
+        self.__min_interval_producers: List[ProducerPreviousFollowingWinFilterSchema] = list(
+        )
+        self.__max_interval_producers: List[ProducerPreviousFollowingWinFilterSchema] = list(
+        )
+
+    def get_schema(self) -> PrizeIntervalFilterSchema:
+        return PrizeIntervalFilterSchema(
+            _min=self.__min_interval_producers,
+            _max=self.__max_interval_producers)
+
+    def execute(self):
+        version = self.repo.dataset_version()
+        if self.index.version != version:
+            self.index.rebuild(
+                ((item.producer, item.year) for item in self.repo.all_winners()), version)
+
+        self.__min_interval_producers = [
+            ProducerPreviousFollowingWinFilterSchema.from_gap(*gap) for gap in self.index.min_gaps()]
+        self.__max_interval_producers = [
+            ProducerPreviousFollowingWinFilterSchema.from_gap(*gap) for gap in self.index.max_gaps()]
+
+
+class VectorizedPrizeIntervalFilter(Filter):
+    """It returns the same schema of the PrizeIntervalFilter, but instead of updating one
+    ProducerPreviousFollowingWinFilterSchema for each prize winner, the winning years are
+    sorted once by producer and year and all the consecutive gaps are calculated at once
+    with numpy.diff. So every gap of the producers that won three or more times is
+    considered, and the order that the winners are returned by the repository does not
+    change the result.
+
+    All the gaps that are tied with the smallest or the largest interval are returned,
+    sorted by the previous win.
+
+    The winners are read with the winner_columns method of the repository, so when the
+    repository keeps them as arrays, numpy reads the arrays without copying them to lists.
+    """
+
+    def __init__(self, repo: PrizeRepository):
+        self.repo = repo
+        self.__min_interval_producers: List[ProducerPreviousFollowingWinFilterSchema] = list(
+        )
+        self.__max_interval_producers: List[ProducerPreviousFollowingWinFilterSchema] = list(
+        )
+
+    def get_schema(self) -> PrizeIntervalFilterSchema:
+        return PrizeIntervalFilterSchema(
+            _min=self.__min_interval_producers,
+            _max=self.__max_interval_producers)
+
+    def execute(self):
+        producers, codes, years = self.repo.winner_columns()
+        min_gaps, max_gaps = self.__gaps(codes, years)
+
+        def by_previous_win(gap):
+            return (gap[1], producers[gap[0]])
+
+        self.__min_interval_producers = [
+            ProducerPreviousFollowingWinFilterSchema.from_gap(producers[code], previous_win, following_win)
+            for code, previous_win, following_win in sorted(min_gaps, key=by_previous_win)]
+        self.__max_interval_producers = [
+            ProducerPreviousFollowingWinFilterSchema.from_gap(producers[code], previous_win, following_win)
+            for code, previous_win, following_win in sorted(max_gaps, key=by_previous_win)]
+
+    def __gaps(self, codes: Sequence[int], years: Sequence[int]) -> Tuple[list, list]:
+        """Returns the (producer code, previous win, following win) gaps with the smallest and
+        the largest intervals."""
+        codes = numpy.asarray(codes, dtype=numpy.int64)
+        years = numpy.asarray(years, dtype=numpy.int64)
+        order = numpy.lexsort((years, codes))
+        codes = codes[order]
+        years = years[order]
+
+        same_producer = codes[1:] == codes[:-1]
+        intervals = numpy.diff(years)[same_producer]
+        if intervals.size == 0:
+            return [], []
+        previous_positions = numpy.flatnonzero(same_producer)
+
+        def tied_with(interval):
+            positions = previous_positions[intervals == interval]
+            return list(zip(codes[positions].tolist(), years[positions].tolist(), years[positions + 1].tolist()))
+
+        return tied_with(intervals.min()), tied_with(intervals.max())
@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class ImportManifestRepository(ABC):
+    """The import manifest repository keeps the fingerprints of the CSV files from the last
+    import that finished successfully."""
+    @abstractmethod
+    def all(self) -> List['FileFingerprintDTO']:
+        ...
+
+    @abstractmethod
+    def replace_all(self, fingerprints: List['FileFingerprintDTO']):
+        ...
+
+    @abstractmethod
+    def save(self, fingerprint: 'FileFingerprintDTO'):
+        """Saves the fingerprint, replacing the saved one of the same path."""
+        ...
+
+
+class FileFingerprintDTO:
+    """The path, size, modification time and content hash of a CSV file. If the content hash
+    is None, it was not calculated yet. The row count is only informed by the delta import,
+    and the size is the byte offset of the rows that it imported."""
+
+    def __init__(self,
+                 path: str,
+                 size: int,
+                 mtime_ns: int,
+                 content_hash: str = None,
+                 row_count: int = None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+        self.row_count = row_count
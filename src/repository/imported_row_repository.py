@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Tuple
+
+# The (year, title) of a CSV row, as they are written in the file (without the spaces around them).
+RowKey = Tuple[str, str]
+
+
+class ImportedRowRepository(ABC):
+    """The imported row repository keeps, for each CSV file imported by the delta import, the
+    hash of the rows of each (year, title) key. If many rows have the same key, the hash is the
+    sum of their hashes."""
+
+    @abstractmethod
+    def paths(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def hashes(self, path: str, keys: Iterable[RowKey] = None) -> Dict[RowKey, int]:
+        """Returns the saved hashes of the file, only of the informed keys if they are informed."""
+        ...
+
+    @abstractmethod
+    def key_paths(self, keys: Iterable[RowKey]) -> Dict[str, List[RowKey]]:
+        """Returns the paths of the files that have rows of the informed keys, with their keys."""
+        ...
+
+    @abstractmethod
+    def save(self, path: str, hashes: Dict[RowKey, int], removed: Iterable[RowKey] = ()):
+        """Saves the hashes of the informed keys (replacing the saved ones) and deletes the
+        removed keys of the file."""
+        ...
+
+    @abstractmethod
+    def delete_paths(self, paths: Iterable[str]):
+        ...
+
+    @abstractmethod
+    def delete_all(self):
+        ...
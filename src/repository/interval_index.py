@@ -0,0 +1,101 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from threading import RLock
+from typing import Dict, Iterable, List, Tuple
+
+
+Gap = Tuple[str, int, int]
+
+
+class PrizeIntervalIndex:
+    """This index keeps the intervals between consecutive wins updated on each write, so the
+    min and max intervals can be retrieved without reading all the winners again.
+
+    For each producer, it keeps a sorted list of the winning years. All the gaps between two
+    consecutive years are kept in a multiset (a dict of interval -> gaps) and the distinct
+    intervals are kept sorted, so the smallest and the largest ones are the first and the last
+    items of the list.
+
+    As the index is kept in the process memory, it saves the dataset version of the repository
+    that it reflects. If the version is different from the repository one, the index is out
+    of sync and it must be rebuilt from the repository winners.
+    """
+
+    def __init__(self):
+        self.__lock = RLock()
+        self.version = None
+        self.__years: Dict[str, List[int]] = defaultdict(list)
+        self.__gaps: Dict[int, Counter[Gap]] = defaultdict(Counter)
+        self.__intervals: List[int] = list()
+
+    def add(self, producer: str, year: int):
+        """Adds the winning year to the producer. If it is between two years that the producer
+        already won, the gap between them is replaced by the two new gaps."""
+        with self.__lock:
+            years = self.__years[producer]
+            position = bisect_right(years, year)
+            if position > 0 and position < len(years):
+                self.__remove_gap(
+                    (producer, years[position - 1], years[position]))
+            if position > 0:
+                self.__add_gap((producer, years[position - 1], year))
+            if position < len(years):
+                self.__add_gap((producer, year, years[position]))
+            years.insert(position, year)
+
+    def add_many(self, winners: Iterable[Tuple[str, int]], version: int):
+        """Adds all the (producer, year) winners and marks the index with the dataset version."""
+        with self.__lock:
+            for producer, year in winners:
+                self.add(producer, year)
+            self.version = version
+
+    def rebuild(self, winners: Iterable[Tuple[str, int]], version: int):
+        """Clears the index and adds all the (producer, year) winners."""
+        with self.__lock:
+            self.clear(version=None)
+            self.add_many(winners, version)
+
+    def clear(self, version: int = None):
+        with self.__lock:
+            self.__years.clear()
+            self.__gaps.clear()
+            self.__intervals.clear()
+            self.version = version
+
+    def min_gaps(self) -> List[Gap]:
+        """Returns the (producer, previous_win, following_win) gaps with the smallest interval,
+        sorted by the previous win. A gap that repeats (the producer won twice in the same
+        years) is returned once for each time, as the other engines do."""
+        with self.__lock:
+            if not self.__intervals:
+                return []
+            return sorted(self.__gaps[self.__intervals[0]].elements(), key=lambda gap: (gap[1], gap[0]))
+
+    def max_gaps(self) -> List[Gap]:
+        """Returns the (producer, previous_win, following_win) gaps with the largest interval,
+        sorted by the previous win. A gap that repeats (the producer won twice in the same
+        years) is returned once for each time, as the other engines do."""
+        with self.__lock:
+            if not self.__intervals:
+                return []
+            return sorted(self.__gaps[self.__intervals[-1]].elements(), key=lambda gap: (gap[1], gap[0]))
+
+    def __add_gap(self, gap: Gap):
+        interval = gap[2] - gap[1]
+        if not self.__gaps[interval]:
+            insort(self.__intervals, interval)
+        self.__gaps[interval][gap] += 1
+
+    def __remove_gap(self, gap: Gap):
+        interval = gap[2] - gap[1]
+        gaps = self.__gaps[interval]
+        gaps[gap] -= 1
+        if gaps[gap] <= 0:
+            del gaps[gap]
+        if not gaps:
+            del self.__gaps[interval]
+            del self.__intervals[bisect_left(self.__intervals, interval)]
+
+
+interval_index = PrizeIntervalIndex()
@@ -1,13 +1,22 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
 
 
 class PrizeRepository(ABC):
     """The prize repository is the repository from the Prize Entity"""
+
+    # If it is False, the data is lost when the process finishes, so the CSV files must be
+    # imported again even if they did not change since the last import.
+    persistent = True
+
     @abstractmethod
     def create(self, year: int, movie: 'MovieInputDTO', winner: bool):
         ...
 
+    @abstractmethod
+    def bulk_create(self, batch: List['PrizeInputDTO'], batch_size: int = None):
+        ...
+
     @abstractmethod
     def all_winners(self) -> List['PrizeOutputDTO']:
         ...
@@ -16,10 +25,42 @@ class PrizeRepository(ABC):
     def delete_all(self):
         ...
 
+    @abstractmethod
+    def dataset_version(self) -> int:
+        """It must return a number that changes every time the data is written, so the
+        results computed from the data can be cached until the next write."""
+        ...
+
+    @abstractmethod
+    def delete_prizes(self, source_path: str, keys: Iterable[Tuple[int, str]]) -> Set[str]:
+        """Deletes the prizes that were imported from the rows of the source_path file (see the
+        source of the PrizeInputDTO) with the (year, movie name) keys, whatever their producers and
+        studios are, and returns the producers of the deleted winners. It is used by the delta
+        import to replace the prizes of the changed rows."""
+        ...
+
+    def winner_columns(self, producers: Iterable[str] = None) -> Tuple[List[str], Sequence[int], Sequence[int]]:
+        """Returns the winners as columns: the producer names, and for each winner the position
+        of its producer in the names and the winning year. If producers is informed, only their
+        winners are returned. By default they are built from the all_winners, but a repository
+        that already keeps the data as columns can return them directly."""
+        producers = None if producers is None else set(producers)
+        producer_codes: Dict[str, int] = dict()
+        codes = []
+        years = []
+        for item in self.all_winners():
+            if producers is not None and item.producer not in producers:
+                continue
+            codes.append(producer_codes.setdefault(
+                item.producer, len(producer_codes)))
+            years.append(item.year)
+        return list(producer_codes), codes, years
+
 
 class MovieInputDTO:
     """To avoid passing the Entity to repository, it will be passed a MovieInputDTO in
     case of the system requirements may change """
+    __slots__ = ("_id", "name", "producer_name", "studio_name")
 
     def __init__(self,
                  _id: str,
@@ -32,9 +73,27 @@ class MovieInputDTO:
         self.studio_name = studio_name
 
 
+class PrizeInputDTO:
+    """It groups the same arguments of the PrizeRepository.create method, so a batch of
+    prizes can be sent to the repository at once by the bulk_create method. The source is the
+    path of the CSV file of the row, when it is imported by the delta import."""
+    __slots__ = ("year", "movie", "winner", "source")
+
+    def __init__(self,
+                 year: int,
+                 movie: MovieInputDTO,
+                 winner: bool,
+                 source: str = None):
+        self.year = year
+        self.movie = movie
+        self.winner = winner
+        self.source = source
+
+
 class PrizeOutputDTO:
     """To avoid passing the Entity to repository, it will be passed a PrizeOutputDTO in
     case of the system requirements may change """
+    __slots__ = ("_id", "year", "name", "producer", "studios", "winner")
 
     def __init__(self,
                  _id: str,
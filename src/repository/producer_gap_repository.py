@@ -0,0 +1,64 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+
+class ProducerGapRepository(ABC):
+    """The producer gap repository keeps every interval between two consecutive wins of each
+    producer, so they can be listed page by page without reading all the winners."""
+
+    # The orderings supported by the page method. The key of each item of a page is made of the
+    # ordering fields followed by the id, so the next page starts after the key of the last item.
+    ORDERINGS = {
+        "interval": ("interval", "_id"),
+        "-interval": ("interval", "_id"),
+        "producer": ("producer", "previous_win", "_id"),
+    }
+
+    @abstractmethod
+    def replace_all(self, gaps: Iterable['ProducerGapDTO']):
+        ...
+
+    @abstractmethod
+    def replace_producers(self, producers: Iterable[str], gaps: Iterable['ProducerGapDTO']):
+        """Replaces only the gaps of the informed producers by the informed gaps (which must be
+        of these producers), keeping the gaps of the other producers."""
+        ...
+
+    @abstractmethod
+    def page(self,
+             ordering: str,
+             limit: int,
+             after: Optional[tuple] = None,
+             min_year: int = None,
+             max_year: int = None,
+             min_interval: int = None,
+             max_interval: int = None) -> List['ProducerGapDTO']:
+        """Returns up to limit gaps in the ordering, starting after the informed key. The years
+        range filters the gaps with both wins inside it, and the interval range is inclusive."""
+        ...
+
+
+class ProducerGapDTO:
+    __slots__ = ("_id", "producer", "previous_win", "following_win", "interval")
+
+    def __init__(self,
+                 producer: str,
+                 previous_win: int,
+                 following_win: int,
+                 _id: int = None):
+        self._id = _id
+        self.producer = producer
+        self.previous_win = previous_win
+        self.following_win = following_win
+        self.interval = following_win - previous_win
+
+    def key(self, ordering: str) -> tuple:
+        return tuple(getattr(self, field) for field in ProducerGapRepository.ORDERINGS[ordering])
+
+    def dict(self) -> dict:
+        return {
+            "producer": self.producer,
+            "interval": self.interval,
+            "previousWin": self.previous_win,
+            "followingWin": self.following_win
+        }
@@ -0,0 +1,116 @@
+from functools import partial
+from glob import glob
+import logging
+from threading import Thread
+from typing import Callable, Optional
+from dependency_injector.wiring import inject, Provide
+from django.core import management
+from django.db import connection
+from infra.csv_folder_watcher import CSVFolderWatcher
+from infra.import_lock import ImportLock
+from scripts.csv_file_parser import RejectsReport
+from scripts.upload_csv_file_from_filesystem import import_csv_from_filesystem_if_changed
+from scripts.watch_csv_folder import ingest_csv_folder
+from texo.containers import ApplicationContainer
+from texo.settings import (
+    CSV_IMPORT_IN_BACKGROUND, CSV_IMPORT_LOCK_PATH, CSV_IMPORT_REJECTS_REPORT_PATH, CSV_WATCH_FOLDER,
+    CSV_WATCH_INTERVAL, MIGRATE_ON_START, PATH_CSV_FILES_FOLDER_PRODUCTION)
+
+logger = logging.getLogger(__name__)
+
+
+@inject
+def start_import(
+        import_progress=Provide[ApplicationContainer.import_progress],
+        folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION,
+        background=CSV_IMPORT_IN_BACKGROUND,
+        watch=CSV_WATCH_FOLDER,
+        migrate=MIGRATE_ON_START,
+        lock_path=CSV_IMPORT_LOCK_PATH) -> Optional[Thread]:
+    """This script starts the 'import_csv_from_filesystem_if_changed' script, which imports the data
+    from the CSV files inside the folder pointed on texo.settings.py file in the constant
+    PATH_CSV_FILES_FOLDER_PRODUCTION. It is called by the WSGI and ASGI applications (see texo.wsgi and
+    texo.asgi) if CSV_IMPORT_ON_START is True, or else by the 'import_csv' management command.
+
+    If the lock_path is informed (by default the CSV_IMPORT_LOCK_PATH constant from texo.settings), only the
+    process that acquires its lock (see infra.import_lock) imports and watches the files, so the workers that
+    share the database do not import the same files. The other processes return at once, and they are ready
+    (see infra.import_progress), serving the data of the database.
+
+    If background is True (by default the CSV_IMPORT_IN_BACKGROUND constant from texo.settings), the
+    import runs in a daemon thread, and the server accepts the requests meanwhile: the /health endpoint
+    answers at once, and the /ready endpoint and the interval endpoints answer 503 (Service Unavailable)
+    until the first import completes. The progress of the import is kept in the ImportProgress of the
+    container (see infra.import_progress). If background is False, the import runs before it returns.
+
+    If watch is True (by default the CSV_WATCH_FOLDER constant from texo.settings), after the import the
+    folder is watched by a CSVFolderWatcher in the daemon thread, and each change is ingested by the
+    'ingest_csv_folder' script (see scripts.watch_csv_folder).
+
+    If migrate is True (by default the MIGRATE_ON_START constant from texo.settings), the database is
+    migrated before the import starts.
+
+    If the CSV_IMPORT_REJECTS_REPORT_PATH is informed, the invalid rows are skipped and saved in this report.
+
+    It returns the thread of the import (or of the watcher), or None if there is not one.
+    """
+    logger.info("Server listening, please follow the README.md instructions.")
+    if lock_path is not None and not ImportLock(lock_path).acquire():
+        logger.info("The CSV files are imported by another process, which holds the lock %s.", lock_path)
+        return None
+    if migrate:
+        management.call_command("migrate", verbosity=0)
+    # The watcher is created before the import, so the files changed during the import are ingested after it.
+    watcher = CSVFolderWatcher(
+        folder_path, partial(_ingest_changes, import_progress, folder_path), CSV_WATCH_INTERVAL) if watch else None
+    import_progress.start(glob(f"{folder_path}/*.csv"))
+    if not background:
+        run_import(import_progress, folder_path)
+        if watcher is None:
+            return None
+    thread = Thread(target=_run_in_thread, args=(import_progress, folder_path, background, watcher),
+                    name="csv-import", daemon=True)
+    thread.start()
+    return thread
+
+
+def _run_in_thread(import_progress, folder_path, run_first_import: bool, watcher: Optional[CSVFolderWatcher]):
+    try:
+        if run_first_import:
+            run_import(import_progress, folder_path)
+        if watcher is not None:
+            watcher.run()
+    finally:
+        # The connections of the requests threads are closed after each request, but this thread
+        # has its own connection. The connections of the 'memory' profile are never closed (see
+        # the DATABASE_PROFILES at texo.settings), so the in memory database is not lost.
+        connection.close()
+
+
+def _ingest_changes(import_progress, folder_path):
+    import_progress.start(glob(f"{folder_path}/*.csv"))
+    run_import(import_progress, folder_path, import_csv=ingest_csv_folder)
+
+
+def run_import(import_progress, folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION,
+               import_csv: Callable = import_csv_from_filesystem_if_changed):
+    """Runs the import (by default the import_csv_from_filesystem_if_changed), finishing the progress
+    with the error of the import if it fails."""
+    try:
+        rejects = None if CSV_IMPORT_REJECTS_REPORT_PATH is None else RejectsReport()
+        output = import_csv(folder_path=folder_path, rejects=rejects)
+        if rejects:
+            rejects.write_csv(CSV_IMPORT_REJECTS_REPORT_PATH)
+            logger.warning("%s invalid rows were not imported. See %s", len(rejects), CSV_IMPORT_REJECTS_REPORT_PATH)
+    except Exception as ex:
+        import_progress.finish(error=str(ex) or type(ex).__name__)
+        logger.error("The CSV files were not imported: %s", ex)
+        return
+
+    import_progress.finish()
+    if output is None:
+        logger.info("The CSV files did not change since the last import, so the database was kept.")
+        return
+    failed_count, producers_count, row_count, _ = output
+    logger.info("%s of %s producers data imported to database in %s rows checked.",
+                producers_count - failed_count, producers_count, row_count)
@@ -0,0 +1,461 @@
+"""The CSV files are parsed by a pipeline of generators, so only the current row (and the
+current batch) is kept in memory, whatever the file size:
+
+    read_rows -> map_columns -> split_producers -> validate_rows -> batch_items -> sink
+
+The read_rows and map_columns stages can be replaced by the read_mapped_rows_mmap stage,
+which is faster for large files.
+
+The sink is the import_csv_from_filesystem script, which sends the batches to the database.
+
+The delta import (import_csv_from_filesystem_delta) replaces the read_rows stage by the
+read_lines and read_line_rows stages, so only the lines after a byte offset (or only some
+rows, which are counted by the count_rows stage) are sent to the next stages, and the rows are
+identified by the row_key and row_hash.
+
+The import of the uploaded files (import_csv_from_stream) replaces the read_rows stage by the
+read_file_lines and read_line_rows stages, so the rows are parsed while the file is read.
+
+When a row is not valid, the pipeline raises an ImportCSVFromFileSystemException. If a
+RejectsReport is informed, the invalid row is added to it instead and the pipeline continues
+with the next row.
+"""
+import csv
+import hashlib
+import mmap
+import os
+from operator import itemgetter
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+from repository.imported_row_repository import RowKey
+from repository.prize_repository import MovieInputDTO, PrizeInputDTO
+from usecases.usecases import PopulatePrizeData
+
+
+COLUMNS = ['year', 'title', 'studios', 'producers', 'winner']
+
+# Quantity of rows validated at once by the validate_rows stage.
+VALIDATE_ROWS_CHUNK_SIZE = 1000
+
+# Bytes of the memory-mapped file that are decoded at once by the read_mapped_rows_mmap stage.
+MMAP_BLOCK_SIZE = 1024 * 1024
+
+
+class ImportCSVFromFileSystemException(Exception):
+    ...
+
+
+class CSVFileStats:
+    """The counters of one CSV file. The row_count includes the header row."""
+
+    def __init__(self):
+        self.producers_failed_count = 0
+        self.producers_count = 0
+        self.row_count = 0
+
+
+class RejectedRow:
+    def __init__(self, csv_file_name: str, row_number: int, message: str):
+        self.csv_file_name = csv_file_name
+        self.row_number = row_number
+        self.message = message
+
+
+class RejectsReport:
+    """It collects the rows that were not imported because they are not valid."""
+
+    def __init__(self):
+        self.rows: List[RejectedRow] = list()
+
+    def add(self, csv_file_name: str, row_number: int, message: str):
+        self.rows.append(RejectedRow(csv_file_name, row_number, message))
+
+    def extend(self, rows: Iterable[RejectedRow]):
+        self.rows.extend(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def write_csv(self, path: str):
+        """Writes the report as a ';' delimited CSV file with the file, row and message columns."""
+        with open(path, "w", newline="") as report_file:
+            writer = csv.writer(report_file, delimiter=";")
+            writer.writerow(["file", "row", "message"])
+            for row in self.rows:
+                writer.writerow([row.csv_file_name, row.row_number, row.message])
+
+
+OnRowError = Callable[[int, str, Optional[Exception]], None]
+
+
+def row_error_handler(csv_file_name: str, rejects: RejectsReport = None) -> OnRowError:
+    """Returns the function called by the pipeline stages when a row is not valid. It raises
+    an ImportCSVFromFileSystemException or, if a RejectsReport is informed, adds the row to it."""
+    def on_row_error(row_number: int, message: str, cause: Exception = None):
+        if rejects is None:
+            raise ImportCSVFromFileSystemException(message) from cause
+        rejects.add(csv_file_name, row_number, message)
+    return on_row_error
+
+
+def read_rows(csv_file_name: str, stats: CSVFileStats) -> Iterator[Tuple[int, dict]]:
+    """Yields the (row number, row) of the file, including the header row. If the file content
+    is not a valid text, it raises an ImportCSVFromFileSystemException."""
+    try:
+        with open(csv_file_name, "r", encoding="utf-8", newline="") as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=";", fieldnames=COLUMNS):
+                stats.row_count += 1
+                yield stats.row_count, row
+    except UnicodeDecodeError as unicode_error:
+        raise ImportCSVFromFileSystemException(
+            f"It was not possible to read the file {csv_file_name}") from unicode_error
+
+
+def read_lines(csv_file_name: str, start: int = 0, first_row_number: int = 1) -> Iterator[Tuple[int, bytes]]:
+    """Yields the (row number, line) of the not empty lines of the file, starting at the start
+    byte offset, whose row number is the first_row_number. As the read_mapped_rows_mmap stage,
+    each line is a row, so the quoted fields can not have line breaks."""
+    with open(csv_file_name, "rb") as csv_file:
+        csv_file.seek(start)
+        yield from read_file_lines(csv_file, first_row_number)
+
+
+def read_file_lines(csv_file: BinaryIO, first_row_number: int = 1) -> Iterator[Tuple[int, bytes]]:
+    """It does the same of the read_lines stage for a file that is already open in binary mode (e.g. an
+    uploaded file, which may be decompressed while it is read), reading one line at a time."""
+    row_number = first_row_number - 1
+    for line in csv_file:
+        line = line.rstrip(b"\r\n")
+        if not line:
+            continue
+        row_number += 1
+        yield row_number, line
+
+
+def read_line_rows(
+        lines: Iterable[Tuple[int, bytes]], csv_file_name: str, stats: CSVFileStats) -> Iterator[Tuple[int, dict]]:
+    """It does the same of the read_rows stage for the lines yielded by the read_lines stage, so
+    the first line must be the header row. The csv_file_name is only used by the error message."""
+    row_number = 0
+
+    def decoded_lines() -> Iterator[str]:
+        nonlocal row_number
+        for row_number, line in lines:
+            yield line.decode()
+
+    try:
+        for row in csv.DictReader(decoded_lines(), delimiter=";", fieldnames=COLUMNS):
+            stats.row_count += 1
+            yield row_number, row
+    except UnicodeDecodeError as unicode_error:
+        raise ImportCSVFromFileSystemException(
+            f"It was not possible to read the file {csv_file_name}") from unicode_error
+
+
+def count_rows(rows: Iterable[Tuple[int, tuple]], stats: CSVFileStats) -> Iterator[Tuple[int, tuple]]:
+    """Yields the rows, counting them in the stats, for the pipelines whose rows were filtered after
+    the read_line_rows stage (which counts all the rows that were read)."""
+    for row_number, row in rows:
+        stats.row_count += 1
+        yield row_number, row
+
+
+def row_key(row: tuple) -> RowKey:
+    """Returns the (year, title) of a row yielded by the map_columns stage."""
+    year, title = row[0], row[1]
+    return (year or "").strip(), (title or "").strip()
+
+
+def row_hash(row: tuple) -> int:
+    """Returns a signed 64 bits hash of the columns of a row yielded by the map_columns stage,
+    without the spaces around them, so it does not change when the columns are moved."""
+    content = "\x1f".join((value or "").strip() for value in row).encode()
+    return int.from_bytes(hashlib.blake2b(content, digest_size=8).digest(), "big", signed=True)
+
+
+def add_row_hashes(row_hash_a: int, row_hash_b: int) -> int:
+    """Returns the sum of two row hashes as a signed 64 bits integer, so the hash of the rows
+    of a key does not depend on their order."""
+    return (row_hash_a + row_hash_b + 2 ** 63) % 2 ** 64 - 2 ** 63
+
+
+def map_columns(rows: Iterator[Tuple[int, dict]]) -> Iterator[Tuple[int, tuple]]:
+    """It reads the header row to support files with the columns in a different position,
+    making the map of the specs sequence and the file sequence. Then it yields the next rows
+    as (year, title, studios, producers, winner) tuples.
+
+    If a column name is not in the specs, it raises an ImportCSVFromFileSystemException."""
+    column_map = {}
+    for row_number, row in rows:
+        if not column_map:
+            for k, v in row.items():
+                if k != v:
+                    if v in row:
+                        column_map[v] = k
+                        continue
+                    raise ImportCSVFromFileSystemException(
+                        f"not uploaded because '{v}' is an invalid column name. It must be 'year','title','studios','producers' or 'winner'")
+                column_map[k] = v
+            continue
+        yield row_number, tuple(row[column_map[column]] for column in COLUMNS)
+
+
+def read_mapped_rows_mmap(csv_file_name: str, stats: CSVFileStats) -> Iterator[Tuple[int, tuple]]:
+    """It does the same of the read_rows and map_columns stages, but instead of building a dict
+    for each row with the csv module, the file is memory-mapped and read in blocks of about
+    MMAP_BLOCK_SIZE bytes that end at a line break (found with mmap.rfind). Each block is copied
+    and decoded once, and its lines are splitted by ';' only up to the last specs column, which
+    are picked with an itemgetter.
+
+    The lines are not copied nor decoded one by one, as decoding each field (or each line) costs
+    one call for each of them, which is slower than decoding the block at once.
+
+    The lines with quotes are parsed by the csv module, so the quoted fields have the same result.
+    """
+    with open(csv_file_name, "rb") as csv_file:
+        if os.fstat(csv_file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            pick_columns = None
+            max_split = -1
+            width = 0
+            try:
+                for block in _mapped_blocks(mapped_file):
+                    for line in block.decode("utf-8").split("\n"):
+                        line = line.rstrip("\r")
+                        if not line:
+                            continue
+                        if '"' in line:
+                            fields = next(csv.reader([line], delimiter=";"))
+                        else:
+                            fields = line.split(";", max_split)
+
+                        stats.row_count += 1
+                        if pick_columns is None:
+                            positions = _header_positions(fields)
+                            pick_columns = itemgetter(*positions)
+                            width = max(positions) + 1
+                            max_split = width
+                            continue
+                        if len(fields) < width:
+                            fields = fields + [None] * (width - len(fields))
+                        yield stats.row_count, pick_columns(fields)
+            except UnicodeDecodeError as unicode_error:
+                raise ImportCSVFromFileSystemException(
+                    f"It was not possible to read the file {csv_file_name}") from unicode_error
+
+
+def _mapped_blocks(mapped_file: mmap.mmap) -> Iterator[bytes]:
+    """Yields the content of the mapped file in blocks of about MMAP_BLOCK_SIZE bytes, each one
+    ending after a line break (or at the end of the file), so a line is never splitted."""
+    size = len(mapped_file)
+    start = 0
+    while start < size:
+        limit = start + MMAP_BLOCK_SIZE
+        end = size - 1 if limit >= size else mapped_file.rfind(b"\n", start, limit)
+        if end == -1:
+            end = mapped_file.find(b"\n", limit)
+            end = size - 1 if end == -1 else end
+        yield mapped_file[start:end + 1]
+        start = end + 1
+
+
+def _header_positions(header: List[str]) -> List[int]:
+    """Returns the position of each specs column in the file, following the same rules of
+    the map_columns stage."""
+    header = header + [None] * (len(COLUMNS) - len(header))
+    for name in header[:len(COLUMNS)]:
+        if name not in COLUMNS:
+            raise ImportCSVFromFileSystemException(
+                f"not uploaded because '{name}' is an invalid column name. It must be 'year','title','studios','producers' or 'winner'")
+    return [header.index(column) for column in COLUMNS]
+
+
+def split_producers(
+        rows: Iterator[Tuple[int, tuple]],
+        stats: CSVFileStats,
+        on_row_error: OnRowError) -> Iterator[Tuple[int, List[tuple]]]:
+    """As the specification requires to separate the Producers, the row is splitted by ','
+    and it yields the (row number, [(year, title, studios, producer, winner), ...]) of each row.
+    """
+    for row_number, (year, title, studios, producers, winner) in rows:
+        try:
+            splitted_producers = producers.strip().split(",")
+            stats.producers_count += len(splitted_producers)
+            year = int(year)
+            title = title.strip()
+            studios = studios.strip()
+            winner = winner.strip()
+        except Exception as ex:
+            stats.producers_failed_count += 1
+            on_row_error(row_number, f"Unexpected error on row {row_number}", ex)
+            continue
+        yield row_number, [(year, title, studios, producer.strip(), winner) for producer in splitted_producers]
+
+
+def validate_rows(
+        rows: Iterator[Tuple[int, List[tuple]]],
+        stats: CSVFileStats,
+        on_row_error: OnRowError,
+        chunk_size: int = VALIDATE_ROWS_CHUNK_SIZE) -> Iterator[Tuple[int, PrizeInputDTO]]:
+    """The rows are validated in chunks of chunk_size rows by the PopulatePrizeData.prepare_many
+    method, which checks each column of the chunk at once (without sending it to the
+    repository). It only yields the (row number, PrizeInputDTO) items of a row if all its
+    producers are valid."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _validate_chunk(chunk, stats, on_row_error)
+            chunk = []
+    if chunk:
+        yield from _validate_chunk(chunk, stats, on_row_error)
+
+
+def _validate_chunk(
+        chunk: List[Tuple[int, List[tuple]]],
+        stats: CSVFileStats,
+        on_row_error: OnRowError) -> Iterator[Tuple[int, PrizeInputDTO]]:
+    years, titles, studios, producers, winners = [], [], [], [], []
+    for _, row_producers in chunk:
+        for year, title, row_studios, producer, winner in row_producers:
+            years.append(year)
+            titles.append(title)
+            studios.append(row_studios)
+            producers.append(producer)
+            winners.append(winner)
+
+    prize_input_dtos, invalid_items = PopulatePrizeData.prepare_many(
+        producer_names=producers, movie_names=titles, studios_names=studios, years=years, winners=winners)
+    valid_items = iter(prize_input_dtos)
+    position = 0
+    for row_number, row_producers in chunk:
+        row_positions = range(position, position + len(row_producers))
+        position += len(row_producers)
+        invalid_position = next((p for p in row_positions if p in invalid_items), None)
+        if invalid_position is None:
+            for _ in row_positions:
+                yield row_number, next(valid_items)
+            continue
+        for p in row_positions:
+            if p not in invalid_items:
+                next(valid_items)
+        stats.producers_failed_count += len(row_producers)
+        on_row_error(row_number, f"on row {row_number}, {invalid_items[invalid_position].msg}", None)
+
+
+def batch_items(
+        items: Iterable[Tuple[int, PrizeInputDTO]],
+        batch_size: int) -> Iterator[Tuple[int, List[PrizeInputDTO]]]:
+    """Groups the items in lists of batch_size, yielding the (last row number, batch)."""
+    batch = []
+    row_number = 0
+    for row_number, item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield row_number, batch
+            batch = []
+    if batch:
+        yield row_number, batch
+
+
+def csv_file_pipeline(
+        csv_file_name: str,
+        stats: CSVFileStats,
+        rejects: RejectsReport = None,
+        reader: str = "csv") -> Iterator[Tuple[int, PrizeInputDTO]]:
+    """It chains the read_rows, map_columns, split_producers and validate_rows stages. If the
+    reader is 'mmap', the read_mapped_rows_mmap stage is used instead of read_rows and map_columns."""
+    on_row_error = row_error_handler(csv_file_name, rejects)
+    if reader == "mmap":
+        rows = read_mapped_rows_mmap(csv_file_name, stats)
+    else:
+        rows = map_columns(read_rows(csv_file_name, stats))
+    rows = split_producers(rows, stats, on_row_error)
+    return validate_rows(rows, stats, on_row_error)
+
+
+ParsedRow = Tuple[int, int, str, str, str, bool]
+
+
+class ParsedCSVFile:
+    """The result of the parse_csv_file. Each row is a (row number, year, title, studios,
+    producer, winner) tuple already validated, with one row for each producer of the CSV
+    file rows."""
+
+    def __init__(self,
+                 csv_file_name: str,
+                 rows: List[ParsedRow],
+                 stats: CSVFileStats,
+                 rejected_rows: List[RejectedRow]):
+        self.csv_file_name = csv_file_name
+        self.rows = rows
+        self.stats = stats
+        self.rejected_rows = rejected_rows
+
+    def items(self) -> Iterator[Tuple[int, PrizeInputDTO]]:
+        return parsed_row_items(self.rows)
+
+
+def parsed_row_items(rows: Iterable[ParsedRow]) -> Iterator[Tuple[int, PrizeInputDTO]]:
+    """Yields the (row number, PrizeInputDTO) items of the rows of a ParsedCSVFile."""
+    for row_number, year, title, studios, producer, winner in rows:
+        yield row_number, PrizeInputDTO(
+            year=year,
+            movie=MovieInputDTO(
+                _id=None, name=title, producer_name=producer, studio_name=studios),
+            winner=winner)
+
+
+def _parsed_rows(
+        csv_file_name: str,
+        stats: CSVFileStats,
+        rejects: Optional[RejectsReport],
+        reader: str) -> Iterator[ParsedRow]:
+    for row_number, item in csv_file_pipeline(csv_file_name, stats, rejects, reader):
+        yield row_number, item.year, item.movie.name, item.movie.studio_name, item.movie.producer_name, item.winner
+
+
+def parse_csv_file(csv_file_name: str, collect_rejects: bool = False, reader: str = "csv") -> ParsedCSVFile:
+    """It runs the csv_file_pipeline of one file, keeping the valid rows as compact tuples.
+
+    As it does not depend on Django, it can run in a different process, so many files can be
+    parsed at the same time while only one process writes to the database.
+    """
+    stats = CSVFileStats()
+    rejects = RejectsReport() if collect_rejects else None
+    return ParsedCSVFile(
+        csv_file_name=csv_file_name,
+        rows=list(_parsed_rows(csv_file_name, stats, rejects, reader)),
+        stats=stats,
+        rejected_rows=[] if rejects is None else rejects.rows)
+
+
+def stream_csv_file(
+        csv_file_name: str,
+        queue,
+        batch_size: int,
+        collect_rejects: bool = False,
+        reader: str = "csv") -> ParsedCSVFile:
+    """It does the same of the parse_csv_file, but the valid rows are put in the queue (e.g. a
+    multiprocessing queue) in lists of batch_size rows while the file is parsed, followed by None,
+    so they can be written by another process while the next rows are parsed, and only the batches
+    in the queue are kept in memory. It returns the ParsedCSVFile without the rows, with the counts
+    and the rejected rows of the file."""
+    stats = CSVFileStats()
+    rejects = RejectsReport() if collect_rejects else None
+    try:
+        rows = []
+        for row in _parsed_rows(csv_file_name, stats, rejects, reader):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                queue.put(rows)
+                rows = []
+        if rows:
+            queue.put(rows)
+    finally:
+        queue.put(None)
+    return ParsedCSVFile(
+        csv_file_name=csv_file_name,
+        rows=[],
+        stats=stats,
+        rejected_rows=[] if rejects is None else rejects.rows)
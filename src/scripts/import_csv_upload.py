@@ -0,0 +1,107 @@
+import gzip
+import os
+import tempfile
+from threading import Thread
+from typing import BinaryIO
+from dependency_injector.wiring import inject, Provide
+from django.db import connection
+from infra.import_jobs import ImportJob, ImportJobs
+from scripts.csv_file_parser import CSVFileStats, RejectsReport
+from scripts.upload_csv_file_from_filesystem import import_csv_from_stream
+from texo.containers import ApplicationContainer
+from texo.settings import PRIZES_IMPORT_MAX_UPLOAD_SIZE
+
+# Bytes read from the request body at a time, so the upload is not kept in memory.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+
+
+class UploadTooLargeException(Exception):
+    ...
+
+
+@inject
+def start_upload_import(
+        stream: BinaryIO,
+        import_jobs=Provide[ApplicationContainer.import_jobs],
+        background: bool = Provide[ApplicationContainer.config.prizes_import_in_background],
+        max_size: int = PRIZES_IMPORT_MAX_UPLOAD_SIZE) -> ImportJob:
+    """This script imports a CSV file (or a gzip compressed CSV file) that is uploaded to the
+    /api/v1/prizes/import endpoint, with the same rules of the CSV files of the folder.
+
+    The body of the request is copied to a temporary file chunk by chunk, so the worker is only busy while
+    the file is uploaded and the upload is never kept in memory. Then the file is read by the
+    import_csv_from_stream script (see scripts.upload_csv_file_from_filesystem), decompressing it while it
+    is read if it starts with the gzip magic number, and the valid rows are written in batches.
+
+    The invalid rows do not stop the import: they are counted as failed producers and reported in the
+    ImportJob, which is kept in the import jobs of the container (see infra.import_jobs), so its state can
+    be requested by its id from all the processes.
+
+    If background is True (by default the PRIZES_IMPORT_IN_BACKGROUND constant from texo.settings), the file
+    is imported in a daemon thread and the job is returned while it is running. Or else, the job is returned
+    after the import finishes.
+
+    If the upload is larger than max_size bytes (by default the PRIZES_IMPORT_MAX_UPLOAD_SIZE constant from
+    texo.settings), the job fails and it raises an UploadTooLargeException.
+    """
+    job = import_jobs.create(CSVFileStats(), RejectsReport())
+    try:
+        path = spool_upload(stream, max_size)
+    except Exception as ex:
+        import_jobs.finish(job, error=str(ex) or type(ex).__name__)
+        raise
+
+    if not background:
+        run_upload_import(import_jobs, job, path)
+        return job
+    Thread(target=_run_upload_import_in_thread, args=(import_jobs, job, path),
+           name=f"upload-import-{job.id}", daemon=True).start()
+    return job
+
+
+def _run_upload_import_in_thread(import_jobs: ImportJobs, job: ImportJob, path: str):
+    try:
+        run_upload_import(import_jobs, job, path)
+    finally:
+        connection.close()
+
+
+def run_upload_import(import_jobs: ImportJobs, job: ImportJob, path: str):
+    """Imports the uploaded file, finishing the job with the error of the import if it fails, and removes
+    the file."""
+    try:
+        with open_upload(path) as csv_file:
+            import_csv_from_stream(csv_file, job.id, rejects=job.rejects, stats=job.stats)
+    except Exception as ex:
+        import_jobs.finish(job, error=str(ex) or type(ex).__name__)
+        return
+    finally:
+        os.remove(path)
+    import_jobs.finish(job)
+
+
+def spool_upload(stream: BinaryIO, max_size: int = PRIZES_IMPORT_MAX_UPLOAD_SIZE) -> str:
+    """Copies the stream to a temporary file in chunks of UPLOAD_CHUNK_SIZE bytes and returns its path. If
+    the stream has more than max_size bytes, the file is removed and it raises an UploadTooLargeException."""
+    size = 0
+    upload = tempfile.NamedTemporaryFile(prefix="prizes-upload-", delete=False)
+    try:
+        with upload:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeException(f"The upload is larger than {max_size} bytes")
+                upload.write(chunk)
+    except BaseException:
+        os.remove(upload.name)
+        raise
+    return upload.name
+
+
+def open_upload(path: str) -> BinaryIO:
+    """Opens the uploaded file in binary mode. If it is gzip compressed, it is decompressed while it is read."""
+    with open(path, "rb") as upload:
+        compressed = upload.read(len(GZIP_MAGIC_NUMBER)) == GZIP_MAGIC_NUMBER
+    return gzip.open(path, "rb") if compressed else open(path, "rb")
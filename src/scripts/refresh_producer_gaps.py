@@ -0,0 +1,36 @@
+from typing import Iterable
+from dependency_injector.wiring import inject, Provide
+from infra.metrics import instrument
+from usecases.usecases import RebuildProducerGaps
+from texo.containers import ApplicationContainer
+
+
+class RefreshProducerGapsException(Exception):
+    ...
+
+
+@inject
+def refresh_producer_gaps(
+        producers: Iterable[str] = None,
+        repository=Provide[ApplicationContainer.prize_repository],
+        gap_repository=Provide[ApplicationContainer.producer_gap_repository]):
+    """This script rebuilds the producer gaps from the winners by the RebuildProducerGaps usecase.
+
+    It is called by the imports after the prizes are written, in the same transaction of the writes, so
+    the gaps are never read without the prizes that they came from (or the other way around). If producers
+    is informed, only the gaps of these producers are rebuilt (e.g. the producers of the rows written or
+    deleted by the delta import). Or else, all the gaps are rebuilt.
+
+    The gap repository is chosen by the PRIZE_REPOSITORY (see texo.containers.containers), so the gaps of
+    the InMemoryColumnarPrizeRepository are kept in memory, and not in the database.
+
+    If the usecase returns a status different of OK, it will raise a RefreshProducerGapsException.
+    """
+    if producers is not None:
+        producers = set(producers)
+        if not producers:
+            return
+    with instrument("producer_gaps.rebuild"):
+        output = RebuildProducerGaps(repo=repository, gap_repo=gap_repository, producers=producers).execute()
+    if output.status != "OK":
+        raise RefreshProducerGapsException(output.msg)
@@ -1,22 +1,49 @@
-from ast import In
-import csv
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import closing
 from glob import glob
-import time
-from typing import Tuple
+import hashlib
+from itertools import chain
+from multiprocessing import Manager
+import os
+from queue import Empty
+from time import perf_counter
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from dependency_injector.wiring import inject, Provide
-from usecases.usecases import DeleteAllDataUseCase, PopulatePrizeData
+from django.db import transaction
+from usecases.usecases import BulkPopulatePrizeData
+from infra.import_progress import import_progress
+from infra.metrics import (
+    import_producers_total, import_rows_total, instrument, operation_duration_seconds, operation_errors_total)
+from repository.import_manifest_repository import FileFingerprintDTO
+from repository.imported_row_repository import RowKey
+from repository.prize_repository import PrizeInputDTO
+from scripts.refresh_producer_gaps import refresh_producer_gaps
+from scripts.csv_file_parser import (
+    CSVFileStats, ImportCSVFromFileSystemException, RejectsReport, add_row_hashes, batch_items, count_rows,
+    csv_file_pipeline,
+    map_columns, parsed_row_items, read_file_lines, read_line_rows, read_lines, row_error_handler, row_hash, row_key, split_producers,
+    stream_csv_file, validate_rows)
 from texo.containers import ApplicationContainer
-from texo.settings import PATH_CSV_FILES_FOLDER_PRODUCTION
+from texo.settings import (
+    CSV_IMPORT_BATCH_SIZE, CSV_IMPORT_MODE, CSV_IMPORT_READER, CSV_IMPORT_WORKERS, PATH_CSV_FILES_FOLDER_PRODUCTION)
 
+# Quantity of parsed batches of each file that are kept in its queue when the files are parsed by a pool of
+# processes, so the parsers wait when they are ahead of the writes.
+PARSED_BATCHES_QUEUE_SIZE = 4
 
-class ImportCSVFromFileSystemException(Exception):
-    ...
+# Seconds waited for the next parsed batch before checking if the parser process is still running.
+PARSED_BATCHES_QUEUE_TIMEOUT = 1.0
 
 
 @inject
 def import_csv_from_filesystem(
         repository=Provide[ApplicationContainer.prize_repository],
-        folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION) -> Tuple[int, int, int, int, list]:
+        folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION,
+        batch_size=CSV_IMPORT_BATCH_SIZE,
+        workers=CSV_IMPORT_WORKERS,
+        rejects: RejectsReport = None,
+        reader=CSV_IMPORT_READER,
+        gap_repository=Provide[ApplicationContainer.producer_gap_repository]) -> Tuple[int, int, int, list]:
     """This method is the Script that will be resposible to load all the CSV file
     to database.
 
@@ -24,27 +51,46 @@ def import_csv_from_filesystem(
     constant PATH_CSV_FILES_FOLDER_PRODUCTION. It will only get .csv files, event if the folder
     has different extensions.
 
-    Firstly, it creates variables to control the quantity of failures, producers included and rows checked.
-
     If the folder is empty, it will raise a ImportCSVFromFileSystemException.
 
-    for each csv file, it will create a generator, to avoid to load all the file in memory
-    in case the it have a large size.
+    Each csv file is parsed by the pipeline of generators of the scripts.csv_file_parser module
+    (read_rows -> map_columns -> split_producers -> validate_rows -> batch_items), to avoid to
+    load all the file in memory in case the it have a large size, and this script is the sink
+    that sends the validated rows to the database:
+
+    - It has support in case the user change the column position. If the column name is not in the specs,
+    it will raise a ImportCSVFromFileSystemException.
+    - As the specification requires to separate the Producers, the only delimenter considered is ','.
+    - Each producer is validated by the PopulatePrizeData usecase. If the usecase returns a status different
+    of OK, it will raise a ImportCSVFromFileSystemException.
+    - In the case of the file has the correct extension, but not a valid content. For example, a jpg image with
+    the csv extension, it will throw ImportCSVFromFileSystemException from UnicodeDecodeError.
 
-    It has support in case the user change the column position. So it has a column_map dict that is
-    responsible to make the map of the specs sequence and the File Sequence. 
+    If the reader is 'mmap' (by default the CSV_IMPORT_READER constant from texo.settings), the files are
+    memory-mapped and read by the read_mapped_rows_mmap stage, which is faster for large files.
 
-    If the column name is not in the specs, it will raise a ImportCSVFromFileSystemException.
+    If a RejectsReport is informed, the invalid rows are added to it instead of raising the exception, and
+    the import continues with the next rows (they are counted as failed producers).
 
-    As the specification requires to separate the Producers, the only delimenter considered in this
-    script is 'and' and ','.
+    When batch_size is informed (by default the CSV_IMPORT_BATCH_SIZE constant from texo.settings),
+    the valid producers are sent to the database in batches by the BulkPopulatePrizeData usecase.
+    If batch_size is None, each producer is sent to the database one by one.
 
-    For each producer, it will be populated the database tables using the PopulatePrizeData usecase.
+    When workers is greater than 1 (by default the CSV_IMPORT_WORKERS constant from texo.settings) and there
+    are many files, the files are parsed and validated at the same time in a pool of processes by the
+    scripts.csv_file_parser.stream_csv_file, which sends the rows back in batches while the file is parsed,
+    and this process only sends their rows to the database in batches. The counts of each file are
+    reported when its last batch is written.
 
-    If the usecase returns a status different of OK, it will raise a ImportCSVFromFileSystemException.
+    The duration and the database queries of the import, the parse of each file and the write of each batch
+    are recorded in the infra.metrics registry, with the quantity of rows and producers read.
 
-    In the case of the file has the correct extension, but not a valid content. For example, a jpg image with 
-    the csv extension, it will throw ImportCSVFromFileSystemException from UnicodeDecodeError.
+    All the import runs in one transaction, so if a file or a batch fails, the rows of the previous batches
+    are not kept either (the repositories that are not persistent are not transactional, so they keep the
+    rows written before the failure).
+
+    After the import, all the producer gaps are rebuilt from the winners by the refresh_producer_gaps script,
+    in the same transaction.
 
     Finally, it will return a tuple for control:
     (global_producers_failed_count, global_producers_count, global_row_count, csv_files)
@@ -60,76 +106,534 @@ def import_csv_from_filesystem(
         raise ImportCSVFromFileSystemException(
             "no csv file uploaded. folder is empty")
 
-    for csv_file_name in csv_files:
-        try:
-            producers_count = -1
-            producers_failed_count = 0
-            row_count = 0
-            with open(csv_file_name, "r") as csv_file:
-                generator = (x for x in csv.DictReader(
-                    csv_file,
-                    delimiter=";",
-                    fieldnames=['year', 'title', 'studios', 'producers', 'winner']))
-
-                column_map = {}
-                for row in generator:
-
-                    if producers_count == -1:
-                        for k, v in row.items():
-                            if k != v:
-                                if v in row:
-                                    column_map[v] = k
-                                    continue
-                                raise ImportCSVFromFileSystemException(
-                                    f"not uploaded because '{v}' is an invalid column name. It must be 'year','title','studios','producers' or 'winner'")
-                            column_map[k] = v
-                        producers_count += 1
-                        row_count += 1
-                        continue
-
-                    try:
-                        row_count += 1
-                        producers = row[column_map['producers']].strip()
-                        producers.replace(" and ", ",")
-                        splitted_producers = producers.split(",")
-
-                        for producer in splitted_producers:
-                            producers_count += 1
-                            year = int(row[column_map['year']])
-                            title = row[column_map['title']].strip()
-                            studios = row[column_map['studios']].strip()
-                            winner = row[column_map['winner']].strip()
-                            producer = producer.strip()
-
-                            output = PopulatePrizeData(
-                                repo=repository,
-                                producer_name=producer,
-                                movie_name=title,
-                                studios_name=studios,
-                                year=year,
-                                winner=winner).execute()
-
-                            if output.status != "OK":
-                                producers_failed_count += 1
-                                DeleteAllDataUseCase(repo=repository)
-                                raise ImportCSVFromFileSystemException(
-                                    f"on row {row_count}, {output.msg}")
-
-                    except ImportCSVFromFileSystemException as import_csv_error:
-                        raise ImportCSVFromFileSystemException(
-                            str(import_csv_error)) from import_csv_error
-                    except Exception as ex:
-                        producers_failed_count += 1
-                        DeleteAllDataUseCase(repo=repository)
-                        raise ImportCSVFromFileSystemException(
-                            f"Unexpected error on row {row_count}") from ex
-
-                    global_producers_failed_count += producers_failed_count
-                    global_producers_count += producers_count
-                    global_row_count += row_count
-
-        except UnicodeDecodeError as unicode_error:
-            raise ImportCSVFromFileSystemException(
-                f"It was not possible to read the file {csv_file_name}") from unicode_error
+    # The parsed files are closed when the import stops, even if it fails, so the parser processes are
+    # shut down at once instead of when the generator is garbage collected.
+    with instrument("import"), transaction.atomic(), \
+            closing(_parse_csv_files(csv_files, workers, rejects, reader, batch_size)) as parsed_files:
+        for csv_file_name, (stats, items) in zip(csv_files, parsed_files):
+            _write_items(repository, _timed_items(items, "import.parse"), batch_size, csv_file_name)
+            import_progress.advance(csv_file_name)
+
+            global_producers_failed_count += stats.producers_failed_count
+            global_producers_count += stats.producers_count
+            global_row_count += stats.row_count
+            _count_stats(stats)
+
+        refresh_producer_gaps(repository=repository, gap_repository=gap_repository)
 
     return global_producers_failed_count, global_producers_count, global_row_count, csv_files
+
+
+@inject
+def import_csv_from_stream(
+        csv_file: BinaryIO,
+        csv_file_name: str,
+        repository=Provide[ApplicationContainer.prize_repository],
+        batch_size=CSV_IMPORT_BATCH_SIZE,
+        rejects: RejectsReport = None,
+        stats: CSVFileStats = None,
+        gap_repository=Provide[ApplicationContainer.producer_gap_repository]) -> CSVFileStats:
+    """This method imports one CSV file that is read from a binary stream (e.g. an uploaded file, see
+    scripts.import_csv_upload), with the same rules of the import_csv_from_filesystem. The csv_file_name
+    is only used to report the invalid rows.
+
+    The lines are read by the read_file_lines stage and sent through the same pipeline of generators, so
+    only the current line and the current batch are kept in memory, and the valid producers are sent to
+    the database in batches of batch_size by the BulkPopulatePrizeData usecase.
+
+    The stats are updated while the file is read, so the caller can report the progress of the import.
+    If a RejectsReport is informed, the invalid rows are added to it instead of raising the
+    ImportCSVFromFileSystemException.
+
+    All the import runs in one transaction, as the import_csv_from_filesystem, and after the rows are
+    written, the gaps of the producers of the written winners are rebuilt by the refresh_producer_gaps
+    script in the same transaction.
+
+    It returns the stats of the file.
+    """
+    stats = CSVFileStats() if stats is None else stats
+    on_row_error = row_error_handler(csv_file_name, rejects)
+    producers = set()
+    with instrument("import"), transaction.atomic():
+        rows = map_columns(read_line_rows(read_file_lines(csv_file), csv_file_name, stats))
+        items = validate_rows(split_producers(rows, stats, on_row_error), stats, on_row_error)
+        _write_items(repository, _timed_items(items, "import.parse"), batch_size, csv_file_name, producers)
+        refresh_producer_gaps(producers, repository=repository, gap_repository=gap_repository)
+        _count_stats(stats)
+    return stats
+
+
+def _parse_csv_files(
+        csv_files: list,
+        workers: int,
+        rejects: RejectsReport = None,
+        reader: str = "csv",
+        batch_size: int = None) -> Iterator[Tuple[CSVFileStats, Iterator[Tuple[int, PrizeInputDTO]]]]:
+    """Yields the stats and the validated items of each file, in the same order of csv_files. The
+    stats are only complete after the items are consumed.
+
+    With one worker, the items are generated by the csv_file_pipeline while they are written. With
+    many workers, the files are parsed by a pool of processes by the stream_csv_file, which sends the
+    rows back in batches through a queue of each file with up to PARSED_BATCHES_QUEUE_SIZE batches,
+    so only this process writes to the database, and it writes the first batches of a file while the
+    next ones are parsed. If a file is not valid, the ImportCSVFromFileSystemException raised by the
+    parser is raised here when its turn comes."""
+    if not workers or workers <= 1 or len(csv_files) <= 1:
+        for csv_file_name in csv_files:
+            stats = CSVFileStats()
+            yield stats, csv_file_pipeline(csv_file_name, stats, rejects, reader)
+        return
+
+    with Manager() as manager:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(csv_files)))
+        try:
+            parsing_files = []
+            for csv_file_name in csv_files:
+                queue = manager.Queue(maxsize=PARSED_BATCHES_QUEUE_SIZE)
+                parsing_files.append((queue, executor.submit(
+                    stream_csv_file, csv_file_name, queue, batch_size or CSV_IMPORT_BATCH_SIZE,
+                    collect_rejects=rejects is not None, reader=reader)))
+            for queue, parsing_file in parsing_files:
+                stats = CSVFileStats()
+                yield stats, _streamed_items(queue, parsing_file, stats, rejects)
+        finally:
+            # If the import stops before all the files are parsed, the pending files are cancelled, and
+            # the running parsers stop when the manager that keeps the queues is shut down.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _streamed_items(
+        queue,
+        parsing_file: Future,
+        stats: CSVFileStats,
+        rejects: RejectsReport = None) -> Iterator[Tuple[int, PrizeInputDTO]]:
+    """Yields the items of the batches that the stream_csv_file puts in the queue until it puts None.
+    Then the stats and the rejected rows of the file are copied from its result."""
+    while True:
+        try:
+            rows = queue.get(timeout=PARSED_BATCHES_QUEUE_TIMEOUT)
+        except Empty:
+            if parsing_file.done() and queue.empty():
+                # The parser process stopped without putting the None (e.g. it was killed).
+                break
+            continue
+        if rows is None:
+            break
+        yield from parsed_row_items(rows)
+
+    parsed_csv_file = parsing_file.result()
+    stats.row_count = parsed_csv_file.stats.row_count
+    stats.producers_count = parsed_csv_file.stats.producers_count
+    stats.producers_failed_count = parsed_csv_file.stats.producers_failed_count
+    if rejects is not None:
+        rejects.extend(parsed_csv_file.rejected_rows)
+
+
+def _timed_items(items: Iterable, operation: str) -> Iterator:
+    """Yields the items, recording the time spent to produce them (reading, parsing and validating
+    the rows, or waiting for the parser processes) as one observation of the operation."""
+    elapsed = 0.0
+    items = iter(items)
+    while True:
+        start = perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            operation_duration_seconds.observe(elapsed + perf_counter() - start, operation=operation)
+            return
+        except Exception:
+            operation_errors_total.inc(operation=operation)
+            raise
+        elapsed += perf_counter() - start
+        yield item
+
+
+def _write_items(
+        repository,
+        items: Iterable[Tuple[int, PrizeInputDTO]],
+        batch_size: int,
+        csv_file_name: str,
+        producers: Set[str] = None,
+        source: str = None):
+    """Sends the items to the database in batches of batch_size or, if it is None, one by one,
+    advancing the import progress (see infra.import_progress) of the file after each write. If
+    producers is informed, the producers of the winners are added to it. If source is informed,
+    it is set as the source of the items (see PrizeInputDTO)."""
+    if producers is not None:
+        items = _with_winner_producers(items, producers)
+    if source is not None:
+        items = _with_source(items, source)
+    if batch_size:
+        for row_number, batch in batch_items(items, batch_size):
+            _flush_batch(repository, batch, batch_size, row_number)
+            import_progress.advance(csv_file_name, row_number)
+    else:
+        for row_number, item in items:
+            _create_one(repository, item, row_number)
+            import_progress.advance(csv_file_name, row_number)
+
+
+def _with_winner_producers(
+        items: Iterable[Tuple[int, PrizeInputDTO]], producers: Set[str]) -> Iterator[Tuple[int, PrizeInputDTO]]:
+    for row_number, item in items:
+        if item.winner:
+            producers.add(item.movie.producer_name)
+        yield row_number, item
+
+
+def _with_source(items: Iterable[Tuple[int, PrizeInputDTO]], source: str) -> Iterator[Tuple[int, PrizeInputDTO]]:
+    for row_number, item in items:
+        item.source = source
+        yield row_number, item
+
+
+def _count_stats(stats: CSVFileStats):
+    import_rows_total.inc(stats.row_count)
+    import_producers_total.inc(
+        stats.producers_count - stats.producers_failed_count, result="imported")
+    import_producers_total.inc(stats.producers_failed_count, result="failed")
+
+
+def _create_one(repository, item: PrizeInputDTO, row_number: int):
+    """Sends one producer to the database. If it fails, it will raise a
+    ImportCSVFromFileSystemException."""
+    try:
+        repository.create(year=item.year, movie=item.movie, winner=item.winner)
+    except Exception as ex:
+        raise ImportCSVFromFileSystemException(
+            f"Unexpected error on row {row_number}") from ex
+
+
+def _flush_batch(repository, batch: list, batch_size: int, row_count: int):
+    """Sends the pending batch to the database with the BulkPopulatePrizeData usecase and
+    empties it. If the usecase returns a status different of OK, it will raise a
+    ImportCSVFromFileSystemException."""
+    with instrument("import.write_batch"):
+        output = BulkPopulatePrizeData(
+            repo=repository, batch=batch, batch_size=batch_size).execute()
+    batch.clear()
+    if output.status != "OK":
+        raise ImportCSVFromFileSystemException(
+            f"on row {row_count}, {output.msg}")
+
+
+@inject
+def import_csv_from_filesystem_if_changed(
+        repository=Provide[ApplicationContainer.prize_repository],
+        manifest_repository=Provide[ApplicationContainer.import_manifest_repository],
+        imported_row_repository=Provide[ApplicationContainer.imported_row_repository],
+        folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION,
+        batch_size=CSV_IMPORT_BATCH_SIZE,
+        rejects: RejectsReport = None,
+        mode=CSV_IMPORT_MODE,
+        gap_repository=Provide[ApplicationContainer.producer_gap_repository]) -> Optional[Tuple[int, int, int, list]]:
+    """This method runs the import_csv_from_filesystem only if the CSV files changed since the
+    last import, which matters when the database is persisted (see DATABASE_PROFILE at
+    texo.settings), so the application does not import the same data on every start.
+
+    The files are compared with the fingerprints saved in the manifest repository (path, size,
+    modification time and content hash). The content hash is only calculated when the other
+    fields are the same, because otherwise the file already changed.
+
+    If the repository is not persistent, the files are always imported, as its data was lost with the
+    previous process. If the mode is 'delta', the saved manifest and row hashes are deleted, and all the
+    files are imported by the import_csv_from_filesystem_delta, which saves them again, so the next changes
+    of the watched folder are ingested by it (see scripts.watch_csv_folder).
+
+    If nothing changed, it returns None. Or else, if the mode is 'delta' (by default the CSV_IMPORT_MODE
+    constant from texo.settings), only the rows that changed are imported by the
+    import_csv_from_filesystem_delta. If the mode is 'full', all the data is deleted and imported
+    again, in one transaction with the manifest, so if the import fails the previous data and manifest are
+    kept. Both return the same tuple of the import_csv_from_filesystem.
+    """
+    fingerprints = fingerprint_csv_files(folder_path)
+    saved_fingerprints = {
+        fingerprint.path: fingerprint for fingerprint in manifest_repository.all()}
+
+    if repository.persistent and fingerprints and len(fingerprints) == len(saved_fingerprints) and all(
+            _is_unchanged(fingerprint, saved_fingerprints.get(fingerprint.path)) for fingerprint in fingerprints):
+        return None
+
+    if mode == "delta":
+        if not repository.persistent:
+            manifest_repository.replace_all([])
+            imported_row_repository.delete_all()
+        return import_csv_from_filesystem_delta(
+            repository=repository, manifest_repository=manifest_repository,
+            imported_row_repository=imported_row_repository, folder_path=folder_path,
+            batch_size=batch_size, rejects=rejects, gap_repository=gap_repository)
+
+    with transaction.atomic():
+        manifest_repository.replace_all([])
+        repository.delete_all()
+        output = import_csv_from_filesystem(
+            repository=repository, folder_path=folder_path, batch_size=batch_size, rejects=rejects,
+            gap_repository=gap_repository)
+        for fingerprint in fingerprints:
+            if fingerprint.content_hash is None:
+                fingerprint.content_hash = _content_hash(fingerprint.path)
+        manifest_repository.replace_all(fingerprints)
+    return output
+
+
+@inject
+def import_csv_from_filesystem_delta(
+        repository=Provide[ApplicationContainer.prize_repository],
+        manifest_repository=Provide[ApplicationContainer.import_manifest_repository],
+        imported_row_repository=Provide[ApplicationContainer.imported_row_repository],
+        folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION,
+        batch_size=CSV_IMPORT_BATCH_SIZE,
+        rejects: RejectsReport = None,
+        gap_repository=Provide[ApplicationContainer.producer_gap_repository]) -> Tuple[int, int, int, list]:
+    """This method imports only the rows of the CSV files that changed since the last import, with the
+    same rules of the import_csv_from_filesystem.
+
+    The rows are identified by their (year, title) key. For each file, the hash of the rows of each key
+    is saved in the imported row repository (see the row_key and row_hash at scripts.csv_file_parser),
+    and its size (the byte offset of the imported rows) and row count are saved in the manifest
+    repository. Then, for each file:
+
+    - If it did not change, it is skipped.
+    - If the bytes before the saved offset did not change (the rows were only appended), the file is
+      read from the offset, and only the appended rows are parsed, validated and sent to the database.
+    - Or else, the keys of all the rows are hashed (without validating them) and compared with the saved
+      hashes. The prizes of the changed and removed keys that were imported from the file are deleted,
+      and only the rows of the changed and new keys are validated and sent to the database (an upsert
+      of the changed rows).
+
+    The prizes of the files that were removed from the folder are also deleted. Each prize keeps the path
+    of the file it was imported from (see PrizeInputDTO), so only the prizes of the file are deleted. As the
+    prizes are not duplicated, a prize of a row that is in many files is only kept for the first file, so
+    after its prizes are deleted the rows of the same keys of the other files are written again.
+
+    If the last import was done by the full import (the files rows were not hashed), all the data is
+    deleted and all the files are imported again, saving the hashes of their rows.
+
+    All the import runs in one transaction, with the manifest and the producer gaps, so if it fails,
+    nothing changes and the next one starts again from the same files.
+
+    After the import, only the gaps of the producers of the written and deleted winners are rebuilt by the
+    refresh_producer_gaps script (or all of them, if all the data was imported again).
+
+    It returns the same tuple of the import_csv_from_filesystem, but the counts are only of the rows
+    that were sent to the database (including the header of each file that changed).
+    """
+    global_producers_failed_count = 0
+    global_producers_count = 0
+    global_row_count = 0
+
+    fingerprints = fingerprint_csv_files(folder_path)
+    if not fingerprints:
+        raise ImportCSVFromFileSystemException(
+            "no csv file uploaded. folder is empty")
+
+    saved_fingerprints = {
+        fingerprint.path: fingerprint for fingerprint in manifest_repository.all()}
+    producers = set()
+    with instrument("import"), transaction.atomic():
+        if any(fingerprint.row_count is None for fingerprint in saved_fingerprints.values()):
+            saved_fingerprints = {}
+            producers = None
+            manifest_repository.replace_all([])
+            imported_row_repository.delete_all()
+            repository.delete_all()
+
+        removed_paths = set(imported_row_repository.paths()) - {fingerprint.path for fingerprint in fingerprints}
+        removed_keys = dict()
+        for path in removed_paths:
+            removed_keys[path] = list(imported_row_repository.hashes(path))
+            deleted_producers = repository.delete_prizes(path, _prize_keys(removed_keys[path]))
+            if producers is not None:
+                producers.update(deleted_producers)
+        imported_row_repository.delete_paths(removed_paths)
+        for path, keys in removed_keys.items():
+            _restore_shared_rows(repository, imported_row_repository, path, keys, batch_size, producers)
+
+        for fingerprint in fingerprints:
+            saved_fingerprint = saved_fingerprints.get(fingerprint.path)
+            if _is_unchanged(fingerprint, saved_fingerprint):
+                fingerprint.row_count = saved_fingerprint.row_count
+                import_progress.advance(fingerprint.path)
+                continue
+            stats = _import_csv_file_delta(
+                repository, imported_row_repository, fingerprint, saved_fingerprint, batch_size, rejects, producers)
+            import_progress.advance(fingerprint.path)
+
+            global_producers_failed_count += stats.producers_failed_count
+            global_producers_count += stats.producers_count
+            global_row_count += stats.row_count
+            _count_stats(stats)
+        manifest_repository.replace_all(fingerprints)
+        refresh_producer_gaps(producers, repository=repository, gap_repository=gap_repository)
+
+    return global_producers_failed_count, global_producers_count, global_row_count, [
+        fingerprint.path for fingerprint in fingerprints]
+
+
+def _import_csv_file_delta(
+        repository,
+        imported_row_repository,
+        fingerprint: FileFingerprintDTO,
+        saved_fingerprint: Optional[FileFingerprintDTO],
+        batch_size: int,
+        rejects: RejectsReport = None,
+        producers: Set[str] = None) -> CSVFileStats:
+    """Imports the rows of the file that changed since the saved fingerprint (see the
+    import_csv_from_filesystem_delta), saving their hashes and updating the fingerprint. If
+    producers is informed, the producers of the written and deleted winners are added to it."""
+    path = fingerprint.path
+    stats = CSVFileStats()
+    on_row_error = row_error_handler(path, rejects)
+    header = next(read_lines(path), None)
+
+    if header is not None and saved_fingerprint is not None and _is_appended(fingerprint, saved_fingerprint):
+        appended_hashes: Dict[RowKey, int] = dict()
+
+        def hash_rows(rows: Iterator[Tuple[int, tuple]]) -> Iterator[Tuple[int, tuple]]:
+            for row_number, row in rows:
+                key = row_key(row)
+                appended_hashes[key] = add_row_hashes(appended_hashes.get(key, 0), row_hash(row))
+                yield row_number, row
+
+        lines = chain([header], read_lines(
+            path, start=saved_fingerprint.size, first_row_number=saved_fingerprint.row_count + 1))
+        rows = hash_rows(map_columns(read_line_rows(lines, path, stats)))
+        items = validate_rows(split_producers(rows, stats, on_row_error), stats, on_row_error)
+        _write_items(repository, _timed_items(items, "import.parse"), batch_size, path, producers, source=path)
+
+        saved_hashes = imported_row_repository.hashes(path, appended_hashes)
+        imported_row_repository.save(path, {
+            key: add_row_hashes(saved_hashes.get(key, 0), appended_hash)
+            for key, appended_hash in appended_hashes.items()})
+        fingerprint.row_count = saved_fingerprint.row_count + stats.row_count - 1
+        return stats
+
+    hashes: Dict[RowKey, int] = dict()
+    row_count = 0
+    if header is not None:
+        for row_count, row in map_columns(read_line_rows(read_lines(path), path, CSVFileStats())):
+            key = row_key(row)
+            hashes[key] = add_row_hashes(hashes.get(key, 0), row_hash(row))
+    saved_hashes = imported_row_repository.hashes(path)
+    changed_keys = {key for key, key_hash in hashes.items() if saved_hashes.get(key) != key_hash}
+    removed_keys = [key for key in saved_hashes if key not in hashes]
+    deleted_keys = [key for key in changed_keys if key in saved_hashes] + removed_keys
+    deleted_producers = repository.delete_prizes(path, _prize_keys(deleted_keys))
+    if producers is not None:
+        producers.update(deleted_producers)
+    _restore_shared_rows(repository, imported_row_repository, path, deleted_keys, batch_size, producers)
+
+    # The header row is counted, as the read_line_rows stage does.
+    stats.row_count = 1 if header is not None else 0
+    if changed_keys:
+        rows = count_rows((
+            (row_number, row)
+            for row_number, row in map_columns(read_line_rows(read_lines(path), path, CSVFileStats()))
+            if row_key(row) in changed_keys), stats)
+        items = validate_rows(split_producers(rows, stats, on_row_error), stats, on_row_error)
+        _write_items(repository, _timed_items(items, "import.parse"), batch_size, path, producers, source=path)
+
+    imported_row_repository.save(path, {key: hashes[key] for key in changed_keys}, removed_keys)
+    fingerprint.row_count = max(row_count, 1)
+    if fingerprint.content_hash is None:
+        fingerprint.content_hash = _content_hash(path)
+    return stats
+
+
+def _restore_shared_rows(
+        repository,
+        imported_row_repository,
+        path: str,
+        keys: List[RowKey],
+        batch_size: int,
+        producers: Set[str] = None):
+    """Writes again the rows of the keys whose prizes were deleted from the file of the path that are
+    in the other files, as their prizes may have been kept only for the deleted file. The rows that
+    are already in the database are not duplicated, and the invalid rows are ignored, as they were
+    already rejected when their files were imported."""
+    if not keys:
+        return
+    for other_path, other_keys in imported_row_repository.key_paths(keys).items():
+        if other_path == path or not os.path.exists(other_path):
+            continue
+        other_keys = set(other_keys)
+        stats = CSVFileStats()
+        on_row_error = row_error_handler(other_path, RejectsReport())
+        rows = (
+            (row_number, row)
+            for row_number, row in map_columns(read_line_rows(read_lines(other_path), other_path, CSVFileStats()))
+            if row_key(row) in other_keys)
+        items = validate_rows(split_producers(rows, stats, on_row_error), stats, on_row_error)
+        _write_items(repository, items, batch_size, other_path, producers, source=other_path)
+
+
+def _is_appended(fingerprint: FileFingerprintDTO, saved_fingerprint: FileFingerprintDTO) -> bool:
+    """Returns if the file only has more rows after the saved offset (the saved size): the bytes
+    before it did not change and the last saved row ended with a line break. It also calculates
+    the content hash of the fingerprint, reading the file once."""
+    if saved_fingerprint.row_count is None or fingerprint.size < saved_fingerprint.size:
+        return False
+    prefix_hash, fingerprint.content_hash, last_byte = _prefix_and_content_hash(
+        fingerprint.path, saved_fingerprint.size)
+    return prefix_hash == saved_fingerprint.content_hash and last_byte in (b"", b"\n")
+
+
+def _prize_keys(keys: Iterable[RowKey]) -> List[Tuple[int, str]]:
+    """Returns the (year, movie name) of the prizes of the row keys. The keys with an invalid year
+    are ignored, as their rows were not imported."""
+    prize_keys = []
+    for year, title in keys:
+        try:
+            prize_keys.append((int(year), title))
+        except ValueError:
+            continue
+    return prize_keys
+
+
+def fingerprint_csv_files(folder_path) -> List[FileFingerprintDTO]:
+    """Returns the fingerprint of each CSV file of the folder, without the content hash."""
+    fingerprints = []
+    for csv_file_name in sorted(glob(f"{folder_path}/*.csv")):
+        stat = os.stat(csv_file_name)
+        fingerprints.append(FileFingerprintDTO(
+            path=os.path.abspath(csv_file_name),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns))
+    return fingerprints
+
+
+def _is_unchanged(fingerprint: FileFingerprintDTO, saved_fingerprint: Optional[FileFingerprintDTO]) -> bool:
+    if saved_fingerprint is None or \
+            fingerprint.size != saved_fingerprint.size or \
+            fingerprint.mtime_ns != saved_fingerprint.mtime_ns:
+        return False
+    fingerprint.content_hash = _content_hash(fingerprint.path)
+    return fingerprint.content_hash == saved_fingerprint.content_hash
+
+
+def _content_hash(path: str) -> str:
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as csv_file:
+        for chunk in iter(lambda: csv_file.read(1024 * 1024), b""):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def _prefix_and_content_hash(path: str, prefix_size: int) -> Tuple[str, str, bytes]:
+    """Returns the hash of the first prefix_size bytes of the file, the hash of all the file
+    and the last byte of the prefix (empty if the prefix is empty)."""
+    content_hash = hashlib.sha256()
+    last_byte = b""
+    with open(path, "rb") as csv_file:
+        remaining = prefix_size
+        while remaining:
+            chunk = csv_file.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            content_hash.update(chunk)
+            remaining -= len(chunk)
+            last_byte = chunk[-1:]
+        prefix_hash = content_hash.hexdigest()
+        for chunk in iter(lambda: csv_file.read(1024 * 1024), b""):
+            content_hash.update(chunk)
+    return prefix_hash, content_hash.hexdigest(), last_byte
@@ -0,0 +1,82 @@
+from functools import partial
+from typing import Optional, Tuple
+from dependency_injector.wiring import inject, Provide
+from django.db import transaction
+from infra.metrics import instrument
+from infra.result_cache import ResultCache
+from repository.interval_index import PrizeIntervalIndex
+from scripts.csv_file_parser import RejectsReport
+from scripts.refresh_producer_gaps import refresh_producer_gaps
+from scripts.upload_csv_file_from_filesystem import (
+    import_csv_from_filesystem_delta, import_csv_from_filesystem_if_changed)
+from texo.containers import ApplicationContainer
+from texo.settings import CSV_IMPORT_BATCH_SIZE, CSV_IMPORT_MODE, PATH_CSV_FILES_FOLDER_PRODUCTION
+
+
+@inject
+def ingest_csv_folder(
+        repository=Provide[ApplicationContainer.prize_repository],
+        staged_repository_factory=Provide[ApplicationContainer.staged_prize_repository.provider],
+        gap_repository=Provide[ApplicationContainer.producer_gap_repository],
+        staged_gap_repository=Provide[ApplicationContainer.staged_producer_gap_repository],
+        result_cache=Provide[ApplicationContainer.result_cache],
+        interval_index=Provide[ApplicationContainer.interval_index],
+        folder_path=PATH_CSV_FILES_FOLDER_PRODUCTION,
+        batch_size=CSV_IMPORT_BATCH_SIZE,
+        rejects: RejectsReport = None,
+        mode=CSV_IMPORT_MODE) -> Optional[Tuple[int, int, int, list]]:
+    """This script ingests the changes of the CSV files of the folder while the application is running.
+    It is called by the CSVFolderWatcher (see infra.csv_folder_watcher) started by the
+    scripts.background_import after the first import.
+
+    The changes are imported by the import_csv_from_filesystem_if_changed script, so only the changed
+    rows are written in bulk (see CSV_IMPORT_MODE at texo.settings), to a staged repository that has its
+    own ResultCache and PrizeIntervalIndex. So the writes of the ingestion do not invalidate the results
+    that are being served, and the requests are answered from the cached results of the previous data:
+
+    - If the repository is persistent, all the ingestion runs in one transaction (with the producer gaps,
+      which are in the same database), so the readers see the previous data until it commits, and nothing
+      changes if it fails.
+    - Or else, the staged repository is a copy of the data of the repository (see the copy method of the
+      repositories that are not persistent), with the rows uploaded to the /api/v1/prizes/import endpoint,
+      and only the changed rows are ingested into it by the import_csv_from_filesystem_delta. Then it
+      replaces the data of the repository at once (see the replace_with method), and the producer gaps of
+      the gap repository, which are kept in memory too, are rebuilt. If the mode is 'full' (see
+      CSV_IMPORT_MODE at texo.settings), the staged repository is filled with the data of all the files
+      instead, so the uploaded rows are lost. The rows uploaded while the changes are ingested are lost too,
+      as they are not written to the copy.
+
+    After that, the results are swapped at once: the dataset version of the result_cache is bumped with the
+    transaction (see ResultCache.bump_version_on_commit) and the interval index is rebuilt, so the first
+    requests of the new data do not wait for it.
+
+    It returns the same of the import_csv_from_filesystem_if_changed.
+    """
+    staged_result_cache = ResultCache()
+    if repository.persistent or mode != "delta":
+        staged_repository = staged_repository_factory(
+            result_cache=staged_result_cache, interval_index=PrizeIntervalIndex())
+        import_csv = partial(import_csv_from_filesystem_if_changed, mode=mode)
+    else:
+        staged_repository = repository.copy(result_cache=staged_result_cache, interval_index=PrizeIntervalIndex())
+        import_csv = import_csv_from_filesystem_delta
+
+    def swap_results(version: int):
+        winners = [(item.producer, item.year) for item in repository.all_winners()]
+        interval_index.rebuild(winners, version)
+
+    with instrument("import.ingest"):
+        with transaction.atomic():
+            output = import_csv(
+                repository=staged_repository, folder_path=folder_path, batch_size=batch_size,
+                rejects=rejects, gap_repository=staged_gap_repository)
+            # The version of the database store is bumped by the writes of all the processes, so it is only
+            # bumped if the files changed. The other stores are bumped even if nothing changed, as the files
+            # may have been imported by another process that shares the database.
+            if staged_repository.persistent and (output is not None or result_cache.version_store != "database"):
+                result_cache.bump_version_on_commit(lambda previous, version: swap_results(version))
+        if not staged_repository.persistent:
+            repository.replace_with(staged_repository)
+            refresh_producer_gaps(repository=repository, gap_repository=gap_repository)
+            swap_results(result_cache.version())
+    return output
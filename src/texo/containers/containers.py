@@ -1,6 +1,73 @@
 from dependency_injector import containers, providers
+from infra.django_prize_interval_filter import DjangoWindowPrizeIntervalFilter
 from infra.django_prize_repository import DjangoPrizeRepository
+from infra.django_import_manifest_repository import DjangoImportManifestRepository
+from infra.django_imported_row_repository import DjangoImportedRowRepository
+from infra.django_producer_gap_repository import DjangoProducerGapRepository
+from infra.in_memory_columnar_prize_repository import InMemoryColumnarPrizeRepository
+from infra.in_memory_producer_gap_repository import InMemoryProducerGapRepository
+from infra.import_jobs import import_jobs
+from infra.import_progress import import_progress
+from infra.instrumented import InstrumentedFilter, InstrumentedPrizeRepository
+from infra.result_cache import result_cache
+from repository.filters import IndexedPrizeIntervalFilter, PrizeIntervalFilter, VectorizedPrizeIntervalFilter
+from repository.interval_index import interval_index
+from texo.settings import (
+    PRIZE_INTERVAL_FILTER_ENGINE, PRIZE_INTERVAL_RESPONSE_RENDERING, PRIZE_REPOSITORY, PRIZES_IMPORT_IN_BACKGROUND,
+    PRIZES_IMPORT_TOKEN, WRITES_WHILE_SERVING)
 
 
 class ApplicationContainer(containers.DeclarativeContainer):
-    prize_repository = providers.Factory(DjangoPrizeRepository)
+    config = providers.Configuration(default={
+        "prize_interval_filter_engine": PRIZE_INTERVAL_FILTER_ENGINE,
+        "prize_repository": PRIZE_REPOSITORY,
+        "prize_interval_response_rendering": PRIZE_INTERVAL_RESPONSE_RENDERING,
+        "prizes_import_in_background": PRIZES_IMPORT_IN_BACKGROUND,
+        "prizes_import_token": PRIZES_IMPORT_TOKEN,
+        "writes_while_serving": WRITES_WHILE_SERVING
+    })
+    result_cache = providers.Object(result_cache)
+    interval_index = providers.Object(interval_index)
+    import_progress = providers.Object(import_progress)
+    import_jobs = providers.Object(import_jobs)
+    prize_repository = providers.Factory(
+        InstrumentedPrizeRepository,
+        repository=providers.Selector(
+            config.prize_repository,
+            django=providers.Factory(
+                DjangoPrizeRepository, result_cache=result_cache, interval_index=interval_index),
+            columnar=providers.Singleton(
+                InMemoryColumnarPrizeRepository, result_cache=result_cache, interval_index=interval_index)))
+    # The repository that the watched CSV folder changes are written to (see scripts.watch_csv_folder). It is
+    # called with its own result_cache and interval_index, so the results of the prize_repository are only
+    # invalidated after the ingestion commits.
+    staged_prize_repository = providers.Selector(
+        config.prize_repository,
+        django=providers.Factory(DjangoPrizeRepository),
+        columnar=providers.Factory(InMemoryColumnarPrizeRepository))
+    import_manifest_repository = providers.Factory(
+        DjangoImportManifestRepository)
+    imported_row_repository = providers.Factory(
+        DjangoImportedRowRepository)
+    # The gaps of the 'columnar' repository are kept in memory too, so the database is not written.
+    producer_gap_repository = providers.Selector(
+        config.prize_repository,
+        django=providers.Factory(DjangoProducerGapRepository),
+        columnar=providers.Singleton(InMemoryProducerGapRepository))
+    # The gap repository that the staged_prize_repository gaps are written to.
+    staged_producer_gap_repository = providers.Selector(
+        config.prize_repository,
+        django=providers.Factory(DjangoProducerGapRepository),
+        columnar=providers.Factory(InMemoryProducerGapRepository))
+    prize_interval_filter = providers.Factory(
+        InstrumentedFilter,
+        interval_filter=providers.Selector(
+            config.prize_interval_filter_engine,
+            rolling=providers.Factory(
+                PrizeIntervalFilter, repo=prize_repository),
+            indexed=providers.Factory(
+                IndexedPrizeIntervalFilter, repo=prize_repository, index=interval_index),
+            vectorized=providers.Factory(
+                VectorizedPrizeIntervalFilter, repo=prize_repository),
+            database=providers.Factory(DjangoWindowPrizeIntervalFilter)),
+        engine=config.prize_interval_filter_engine)
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -75,15 +77,98 @@ WSGI_APPLICATION = 'texo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Database profile (see the DATABASE_PROFILES below), selected by the DATABASE_PROFILE environment variable:
+# - 'memory': SQLite in memory, so the CSV files are imported on every start. The database is shared by the
+#   threads of the process (mode=memory), so the connections are kept open and the data is not lost when
+#   they are closed, e.g. by the runserver command after it checks the migrations.
+# - 'sqlite': SQLite file (DATABASE_NAME, by default BASE_DIR / 'db.sqlite3') in WAL mode, so the readers
+#   do not wait for the writer, and the import is skipped when the CSV files did not change.
+# - 'postgresql': PostgreSQL (DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST and DATABASE_PORT)
+#   with persistent connections. It needs the psycopg package.
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "memory")
+
+# Pragmas of each connection of the 'sqlite' profile. The synchronous=NORMAL is safe in WAL mode (a power loss
+# can only lose the last transactions), the mmap_size is in bytes and the negative cache_size is in KiB.
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -64 * 1024))
+
+# Seconds that each connection of the 'postgresql' profile is kept open to be reused by the next requests
+# of the same thread (0 closes it after each request). The connections are checked before being reused.
+DATABASE_CONN_MAX_AGE = int(os.environ.get("DATABASE_CONN_MAX_AGE", 60))
+
+# Connection pooler of the 'postgresql' profile:
+# - 'none': each thread keeps its own persistent connection (DATABASE_CONN_MAX_AGE).
+# - 'local': the connections are shared by the threads of the process in a psycopg_pool pool, with
+#   DATABASE_POOL_MIN_SIZE and DATABASE_POOL_MAX_SIZE connections. It needs the psycopg[pool] package.
+# - 'pgbouncer': the DATABASE_HOST is a PgBouncer in transaction mode, so the server side cursors are disabled.
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "none")
+DATABASE_POOL_MIN_SIZE = int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2))
+DATABASE_POOL_MAX_SIZE = int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10))
+
+# The requests run in a transaction (ATOMIC_REQUESTS), except the views that only read the data, which are
+# decorated with transaction.non_atomic_requests (see app.views).
+DATABASE_PROFILES = {
+    'memory': {
         'ENGINE': 'django.db.backends.sqlite3',
-        # 'NAME': BASE_DIR / 'db.sqlite3',
-        'NAME': 'file::memory:?cache=shared',
+        'NAME': os.environ.get("DATABASE_NAME", 'file:memorydb?mode=memory&cache=shared'),
         'ATOMIC_REQUESTS': True
-    }
+    },
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get("DATABASE_NAME", BASE_DIR / 'db.sqlite3'),
+        'ATOMIC_REQUESTS': True,
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE};'
+                f'PRAGMA cache_size={SQLITE_CACHE_SIZE};'
+                'PRAGMA temp_store=MEMORY'
+            ),
+            # The write transactions take the lock when they begin, so a reader that becomes a writer
+            # does not fail with "database is locked", and the writers wait up to the timeout seconds.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get("DATABASE_NAME", 'texo'),
+        'USER': os.environ.get("DATABASE_USER", 'texo'),
+        'PASSWORD': os.environ.get("DATABASE_PASSWORD", ''),
+        'HOST': os.environ.get("DATABASE_HOST", 'localhost'),
+        'PORT': os.environ.get("DATABASE_PORT", '5432'),
+        'ATOMIC_REQUESTS': True,
+        # The pool of the 'local' pooler keeps the connections, so Django must close them after each request.
+        'CONN_MAX_AGE': 0 if DATABASE_POOL == 'local' else DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DATABASE_POOL == 'pgbouncer',
+        'OPTIONS': {
+            'pool': {
+                'min_size': DATABASE_POOL_MIN_SIZE,
+                'max_size': DATABASE_POOL_MAX_SIZE,
+            },
+        } if DATABASE_POOL == 'local' else {},
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DATABASE_PROFILE]
 }
 
+# Storage of the prizes (see texo.containers.containers.ApplicationContainer):
+# - 'django': DjangoPrizeRepository, the prizes are saved in the database.
+# - 'columnar': InMemoryColumnarPrizeRepository, the prizes are kept as arrays in the process memory.
+#   The 'database' PRIZE_INTERVAL_FILTER_ENGINE reads the database, so it must not be used with it.
+PRIZE_REPOSITORY = os.environ.get("PRIZE_REPOSITORY", "django")
+
+# The 'memory' profile shares one in-memory database between the threads (SQLite shared cache), whose readers
+# do not wait for a write transaction: they fail at once with "database table is locked". So, when the prizes
+# are kept in it (the 'django' PRIZE_REPOSITORY), the data is only written before the requests are answered:
+# the CSV files folder is not watched (CSV_WATCH_FOLDER) and the uploaded files are refused (see app.views).
+# The readers of the 'sqlite' (WAL) and 'postgresql' profiles are not blocked by the writes.
+WRITES_WHILE_SERVING = not (DATABASE_PROFILE == "memory" and PRIZE_REPOSITORY == "django")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -128,3 +213,118 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 PATH_CSV_FILES_FOLDER_PRODUCTION = BASE_DIR.parent / 'csv/production'
 PATH_CSV_FILES_FOLDER_TESTS = BASE_DIR.parent / 'csv/tests'
+
+# Quantity of prizes sent to the database on each bulk_create call during the CSV import.
+CSV_IMPORT_BATCH_SIZE = 1000
+
+# Quantity of processes that parse the CSV files at the same time during the import. If it is 1,
+# the files are parsed one by one by the same process that writes to the database.
+CSV_IMPORT_WORKERS = int(os.environ.get("CSV_IMPORT_WORKERS", 1))
+
+# If it is True, the processes that serve the requests migrate the database before the import (see
+# scripts.background_import). By default it is only True for the 'memory' profile, whose schema is lost
+# when the process finishes. For the other profiles, run 'python manage.py migrate' before the server.
+MIGRATE_ON_START = os.environ.get(
+    "MIGRATE_ON_START", str(DATABASE_PROFILE == "memory")).lower() in ("true", "1", "yes")
+
+# Reader of the CSV files: 'csv' (csv.DictReader) or 'mmap' (memory-mapped file decoded in blocks, faster for large files).
+CSV_IMPORT_READER = os.environ.get("CSV_IMPORT_READER", "csv")
+
+# Import of the CSV files that changed since the last import (see scripts.upload_csv_file_from_filesystem):
+# - 'full': all the data is deleted and all the files are imported again.
+# - 'delta': only the rows appended to the files, or changed since the last import, are imported.
+CSV_IMPORT_MODE = os.environ.get("CSV_IMPORT_MODE", "delta")
+
+# If it is False, the WSGI and ASGI applications do not import nor watch the CSV files, so they must be imported
+# by the 'python manage.py import_csv' command (e.g. a single process for many servers that share the database).
+CSV_IMPORT_ON_START = os.environ.get("CSV_IMPORT_ON_START", "true").lower() in ("true", "1", "yes")
+
+# If it is True, the WSGI and ASGI applications import the CSV files in a background thread, so the server
+# accepts the requests during the import (see scripts.background_import). The interval endpoints answer 503
+# (Service Unavailable), with a Retry-After of IMPORT_RETRY_AFTER seconds, until the first import completes.
+CSV_IMPORT_IN_BACKGROUND = os.environ.get("CSV_IMPORT_IN_BACKGROUND", "true").lower() in ("true", "1", "yes")
+IMPORT_RETRY_AFTER = int(os.environ.get("IMPORT_RETRY_AFTER", 5))
+
+# If it is True, after the first import the CSV files folder is watched (polled every CSV_WATCH_INTERVAL seconds,
+# see infra.csv_folder_watcher), and the added, modified or removed files are ingested while the application
+# is running (see scripts.watch_csv_folder). It is always False if WRITES_WHILE_SERVING is False.
+CSV_WATCH_FOLDER = WRITES_WHILE_SERVING and \
+    os.environ.get("CSV_WATCH_FOLDER", "true").lower() in ("true", "1", "yes")
+CSV_WATCH_INTERVAL = float(os.environ.get("CSV_WATCH_INTERVAL", 2.0))
+
+# If it is True, the CSV files uploaded to the /api/v1/prizes/import endpoint are imported in a background thread,
+# and the endpoint answers 202 (Accepted) with the id of the import job (see scripts.import_csv_upload). The
+# uploads larger than PRIZES_IMPORT_MAX_UPLOAD_SIZE bytes (compressed, if they are gzip files) are refused.
+PRIZES_IMPORT_IN_BACKGROUND = os.environ.get("PRIZES_IMPORT_IN_BACKGROUND", "true").lower() in ("true", "1", "yes")
+PRIZES_IMPORT_MAX_UPLOAD_SIZE = int(os.environ.get("PRIZES_IMPORT_MAX_UPLOAD_SIZE", 64 * 1024 * 1024))
+
+# Token sent as 'Authorization: Bearer <token>' to the /api/v1/prizes/import endpoints (see app.views). If it is
+# None, the uploads are disabled and the endpoints answer 403 (Forbidden).
+PRIZES_IMPORT_TOKEN = os.environ.get("PRIZES_IMPORT_TOKEN")
+
+# If it is informed, the invalid rows of the CSV files do not stop the import on startup. They are
+# skipped and reported in a CSV file saved in this path.
+CSV_IMPORT_REJECTS_REPORT_PATH = os.environ.get("CSV_IMPORT_REJECTS_REPORT_PATH")
+
+# Quantity of winners fetched from the database on each round trip by the DjangoPrizeRepository.all_winners.
+ALL_WINNERS_CHUNK_SIZE = 2000
+
+# Quantity of values (e.g. keys of rows or names of producers) of each query of the Django repositories
+# that filters by a list of values, so the parameters of the query are below the limits of the database.
+QUERY_VALUES_CHUNK_SIZE = 200
+
+# Django cache alias used to keep the results computed from the whole dataset (e.g. the prize
+# interval summary). If it is None, the results are kept in the memory of each process.
+RESULT_CACHE_ALIAS = None
+
+# Engine used to calculate the prize intervals (see texo.containers.containers.ApplicationContainer):
+# - 'rolling': PrizeIntervalFilter, reads all the winners and keeps the last gap of each producer.
+# - 'indexed': IndexedPrizeIntervalFilter, reads the gaps from an index updated on each write.
+# - 'vectorized': VectorizedPrizeIntervalFilter, reads all the winners and calculates the gaps with numpy.
+# - 'database': DjangoWindowPrizeIntervalFilter, the gaps are calculated by the database with window functions.
+# The other engines return every gap tied with the min or max interval (so a producer may be
+# returned more than once), while 'rolling' keeps the original response, so it is the default.
+PRIZE_INTERVAL_FILTER_ENGINE = os.environ.get(
+    "PRIZE_INTERVAL_FILTER_ENGINE", "rolling")
+
+# Where the dataset version (used by the ETag and Last-Modified headers and to invalidate the results) is kept
+# (see infra.result_cache.ResultCache):
+# - 'database': in a row bumped with the writes, shared by all the processes and kept when they restart.
+# - 'cache': with the results of RESULT_CACHE_ALIAS (the memory of each process, if it is None).
+# The 'memory' profile and the 'columnar' PRIZE_REPOSITORY use 'cache', as their data is not shared nor kept either.
+DATASET_VERSION_STORE = os.environ.get(
+    "DATASET_VERSION_STORE", "cache" if DATABASE_PROFILE == "memory" or PRIZE_REPOSITORY == "columnar" else "database")
+
+# Path of the file locked by the process that imports and watches the CSV files (see infra.import_lock), so
+# only one of the processes of the host that share the data does it. If it is None, every process does it,
+# which is the default when the data is not shared (DATASET_VERSION_STORE is 'cache').
+CSV_IMPORT_LOCK_PATH = os.environ.get(
+    "CSV_IMPORT_LOCK_PATH",
+    os.path.join(tempfile.gettempdir(), "texo_csv_import.lock") if DATASET_VERSION_STORE == "database" else None)
+
+# The messages of the scripts (e.g. the result of the CSV import) are logged to the console.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "scripts": {"handlers": ["console"], "level": os.environ.get("SCRIPTS_LOG_LEVEL", "INFO")},
+    },
+}
+
+# Rendering of the prize interval summary response (see app.views.get_prize_interval_summary):
+# - 'serializer': the response data is validated by the PrizeIntervalSerializer on each computation.
+# - 'precomputed': the response data built from the filter is returned without the serializer validation.
+# - 'encoded': the same of 'precomputed', but encoded to JSON once for each dataset version and sent with an ETag.
+PRIZE_INTERVAL_RESPONSE_RENDERING = os.environ.get(
+    "PRIZE_INTERVAL_RESPONSE_RENDERING", "precomputed")
+
+# Seconds that the clients and CDNs can keep the prize interval summary without asking again (Cache-Control
+# max-age). After it, they can revalidate it with the ETag or the Last-Modified of the response.
+PRIZE_INTERVAL_CACHE_MAX_AGE = int(os.environ.get("PRIZE_INTERVAL_CACHE_MAX_AGE", 60))
+
+# Default and maximum quantity of intervals of each page of the producer intervals list.
+PRODUCER_GAPS_PAGE_SIZE = 100
+PRODUCER_GAPS_MAX_PAGE_SIZE = 1000
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'texo.settings')
 
 application = get_wsgi_application()
+
+# The CSV files are imported by one of the processes that serve the requests (see scripts.background_import),
+# unless they are imported by the 'import_csv' management command (see CSV_IMPORT_ON_START at texo.settings).
+from texo.settings import CSV_IMPORT_ON_START  # noqa: E402
+
+if CSV_IMPORT_ON_START:
+    from scripts.background_import import start_import
+
+    start_import()
@@ -1,9 +1,14 @@
 from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import List, Tuple
-from repository.prize_repository import PrizeRepository, MovieInputDTO
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from repository.prize_repository import PrizeRepository, MovieInputDTO, PrizeInputDTO
+from repository.producer_gap_repository import ProducerGapDTO, ProducerGapRepository
 from domain.prize.entity import Producer, Prize, Studios, Movie
-from repository.filters import PrizeIntervalFilter
+from repository.filters import Filter, PrizeIntervalFilter
+
+
+logger = logging.getLogger(__name__)
 
 
 class UseCase(ABC):
@@ -47,6 +52,24 @@ class PopulatePrizeData(UseCase):
         If everything works fine, then it will return a 'OK' status, or else it will
         return an error, informing which field is invalid.
         """
+        try:
+            output, prize_input_dto = self.prepare()
+            if prize_input_dto is not None:
+                self.repo.create(
+                    year=prize_input_dto.year, movie=prize_input_dto.movie, winner=prize_input_dto.winner)
+                return PopulatePrizeData.DTOOutput(status="OK", msg="Object created")
+            return output
+        except Exception as ex:
+            return PopulatePrizeData.DTOOutput(status="ERROR", msg=f"Unexpected Error on PopulatePrizeDataUseCase - {ex}")
+
+    def prepare(self) -> Tuple[DTOOutput, Optional[PrizeInputDTO]]:
+        """It does the same validation of the execute method, but instead of sending the data
+        to the repository, it returns the PrizeInputDTO, so it can be sent later in a batch
+        by the BulkPopulatePrizeData usecase.
+
+        If the data is not valid, the PrizeInputDTO will be None and the DTOOutput will
+        inform which field is invalid.
+        """
         try:
             if self.winner in ["yes", ""]:
                 self.winner = self.winner == "yes"
@@ -60,20 +83,94 @@ class PopulatePrizeData(UseCase):
                 is_valid, invalid_items = self.__all_entities_are_valid(
                     producer, studios, movie, prize)
                 if is_valid:
+                    # The repositories do not use the id of the entities, so it is
+                    # not sent to avoid generating an UUID for each row.
                     movie_input_dto = MovieInputDTO(
-                        _id=movie._id,
+                        _id=None,
                         name=movie.name,
                         producer_name=movie.producer.name,
                         studio_name=movie.studios.name
                     )
-
-                    self.repo.create(
+                    prize_input_dto = PrizeInputDTO(
                         year=self.year, movie=movie_input_dto, winner=self.winner)
-                    return PopulatePrizeData.DTOOutput(status="OK", msg="Object created")
-                return PopulatePrizeData.DTOOutput(status="FAILED", msg=f"Object not Created the fields {','.join(invalid_items)} are invalid")
-            return PopulatePrizeData.DTOOutput(status="FAILED", msg=f"Object not Created winner field is invalid. Must be 'yes' or ''")
+                    return PopulatePrizeData.DTOOutput(status="OK", msg="Object is valid"), prize_input_dto
+                return PopulatePrizeData.DTOOutput(status="FAILED", msg=f"Object not Created the fields {','.join(invalid_items)} are invalid"), None
+            return PopulatePrizeData.DTOOutput(status="FAILED", msg=f"Object not Created winner field is invalid. Must be 'yes' or ''"), None
         except Exception as ex:
-            return PopulatePrizeData.DTOOutput(status="ERROR", msg=f"Unexpected Error on PopulatePrizeDataUseCase - {ex}")
+            return PopulatePrizeData.DTOOutput(status="ERROR", msg=f"Unexpected Error on PopulatePrizeDataUseCase - {ex}"), None
+
+    @staticmethod
+    def prepare_many(
+            producer_names: Sequence[str],
+            movie_names: Sequence[str],
+            studios_names: Sequence[str],
+            years: Sequence[int],
+            winners: Sequence[str]) -> Tuple[List[PrizeInputDTO], Dict[int, DTOOutput]]:
+        """It does the same validation of the prepare method for a whole batch, but instead of
+        creating the entities of each item, each rule of the entities is checked for the whole
+        column at once. The batch is informed as columns, so the item i is
+        (producer_names[i], movie_names[i], studios_names[i], years[i], winners[i]).
+
+        It returns the PrizeInputDTO of the valid items, and a dict of the position -> DTOOutput
+        of the invalid ones, with the same messages of the prepare method.
+        """
+        valid_winners = [winner in ("yes", "") for winner in winners]
+        valid_producers = [isinstance(name, str) and name != "" for name in producer_names]
+        valid_studios = [isinstance(name, str) and name != "" for name in studios_names]
+        valid_movies = [name != "" for name in movie_names]
+        valid_years = [isinstance(year, int) and year > 1900 and year < 2099 for year in years]
+
+        prize_input_dtos = []
+        invalid_items = dict()
+        for position, checks in enumerate(zip(valid_winners, valid_producers, valid_studios, valid_movies, valid_years)):
+            if all(checks):
+                prize_input_dtos.append(PrizeInputDTO(
+                    year=years[position],
+                    movie=MovieInputDTO(
+                        _id=None,
+                        name=movie_names[position],
+                        producer_name=producer_names[position],
+                        studio_name=studios_names[position]),
+                    winner=winners[position] == "yes"))
+            elif not checks[0]:
+                invalid_items[position] = PopulatePrizeData.DTOOutput(
+                    status="FAILED", msg=f"Object not Created winner field is invalid. Must be 'yes' or ''")
+            else:
+                fields = [entity for entity, valid in zip(
+                    ["Producer", "Studios", "Movie", "Prize"], checks[1:]) if not valid]
+                invalid_items[position] = PopulatePrizeData.DTOOutput(
+                    status="FAILED", msg=f"Object not Created the fields {','.join(fields)} are invalid")
+        return prize_input_dtos, invalid_items
+
+    @staticmethod
+    def execute_many(
+            repo: PrizeRepository,
+            producer_names: Sequence[str],
+            movie_names: Sequence[str],
+            studios_names: Sequence[str],
+            years: Sequence[int],
+            winners: Sequence[str],
+            batch_size: int = None) -> DTOOutput:
+        """It validates the batch with the prepare_many method and sends the valid items to the
+        repository at once, by the BulkPopulatePrizeData usecase.
+
+        If all the items are valid, it returns an 'OK' status. If some of them are not, the valid
+        ones are still created and it returns a 'FAILED' status, with the DTOOutput of each invalid
+        item in the data (position -> DTOOutput).
+        """
+        prize_input_dtos, invalid_items = PopulatePrizeData.prepare_many(
+            producer_names, movie_names, studios_names, years, winners)
+        if prize_input_dtos:
+            output = BulkPopulatePrizeData(
+                repo=repo, batch=prize_input_dtos, batch_size=batch_size).execute()
+            if output.status != "OK":
+                return PopulatePrizeData.DTOOutput(status=output.status, msg=output.msg)
+        if invalid_items:
+            return PopulatePrizeData.DTOOutput(
+                status="FAILED",
+                msg=f"{len(prize_input_dtos)} objects created, {len(invalid_items)} objects are invalid",
+                data=invalid_items)
+        return PopulatePrizeData.DTOOutput(status="OK", msg=f"{len(prize_input_dtos)} objects created")
 
     def __all_entities_are_valid(self, *args) -> Tuple[bool, list]:
         not_valid = []
@@ -84,6 +181,33 @@ class PopulatePrizeData(UseCase):
         return (True, []) if not_valid == [] else (False, not_valid)
 
 
+class BulkPopulatePrizeData(UseCase):
+    """This use case is responsible to populate the prize data in batches. The items must be
+    already validated, which is done by the PopulatePrizeData.prepare method."""
+    class DTOOutput:
+        def __init__(self, status: str, msg: str, data: dict = dict()):
+            self.status = status
+            self.msg = msg
+            self.data = data
+
+    def __init__(
+            self,
+            repo: PrizeRepository,
+            batch: List[PrizeInputDTO],
+            batch_size: int = None):
+
+        self.repo = repo
+        self.batch = batch
+        self.batch_size = batch_size
+
+    def execute(self) -> DTOOutput:
+        try:
+            self.repo.bulk_create(self.batch, batch_size=self.batch_size)
+            return BulkPopulatePrizeData.DTOOutput(status="OK", msg=f"{len(self.batch)} objects created")
+        except Exception as ex:
+            return BulkPopulatePrizeData.DTOOutput(status="ERROR", msg=f"Unexpected Error on BulkPopulatePrizeDataUseCase - {ex}")
+
+
 class DeleteAllDataUseCase(UseCase):
     """This use case is responsible to delete all the items from the database."""
     class DTOOutput:
@@ -137,14 +261,18 @@ class ShowHighestAndLowestPrizeIntervals(UseCase):
 
     def __init__(
             self,
-            repo: PrizeRepository):
+            repo: PrizeRepository,
+            interval_filter: Filter = None):
 
         self.repo = repo
+        self.interval_filter = interval_filter
 
     def execute(self) -> DTOOutput:
-        """It creates the filter, and then get its schema to return the min and max producers lists."""
+        """It executes the filter (by default the PrizeIntervalFilter), and then get its schema
+        to return the min and max producers lists."""
         try:
-            interval_filter = PrizeIntervalFilter(self.repo)
+            interval_filter = PrizeIntervalFilter(
+                self.repo) if self.interval_filter is None else self.interval_filter
             interval_filter.execute()
             elements = interval_filter.get_schema()
             self._min = elements._min
@@ -152,6 +280,84 @@ class ShowHighestAndLowestPrizeIntervals(UseCase):
 
             return ShowHighestAndLowestPrizeIntervals.DTOOutput(msg="OK", status="Prize Intervals retrieved successfully", _min=self._min, _max=self._max)
         except Exception as ex:
+            logger.exception("It was not possible to retrieve the prize intervals")
             return ShowHighestAndLowestPrizeIntervals.DTOOutput(
                 msg="ERROR",
                 status="An Unexpected error has ocurred when it was retrieving prize intervals data.")
+
+
+class RebuildProducerGaps(UseCase):
+    """It calculates every interval between two consecutive wins of each producer from the prize
+    repository winners, and replaces the gaps of the producer gap repository with them. If producers
+    is informed, only the gaps of these producers are calculated and replaced."""
+    class DTOOutput:
+        def __init__(self, status: str, msg: str, data: dict = dict()):
+            self.status = status
+            self.msg = msg
+            self.data = data
+
+    def __init__(self, repo: PrizeRepository, gap_repo: ProducerGapRepository, producers: Iterable[str] = None):
+        self.repo = repo
+        self.gap_repo = gap_repo
+        self.producers = None if producers is None else set(producers)
+
+    def execute(self) -> DTOOutput:
+        try:
+            producers, codes, years = self.repo.winner_columns(self.producers)
+            winners = sorted(zip(codes, years), key=lambda winner: (producers[winner[0]], winner[1]))
+            gaps = [
+                ProducerGapDTO(producer=producers[previous[0]], previous_win=previous[1], following_win=following[1])
+                for previous, following in zip(winners, winners[1:]) if previous[0] == following[0]]
+            if self.producers is None:
+                self.gap_repo.replace_all(gaps)
+            else:
+                self.gap_repo.replace_producers(self.producers, gaps)
+            return RebuildProducerGaps.DTOOutput(status="OK", msg=f"{len(gaps)} gaps saved")
+        except Exception as ex:
+            return RebuildProducerGaps.DTOOutput(status="ERROR", msg=f"Unexpected Error on RebuildProducerGapsUseCase - {ex}")
+
+
+class ListProducerGaps(UseCase):
+    """It returns one page of the producer gaps. The after is the key of the last gap of the previous
+    page, and the next of the output is the key to request the next page (None if it is the last one)."""
+    class DTOOutput:
+        def __init__(self, status: str, msg: str, gaps: List[ProducerGapDTO] = list(), next: Optional[tuple] = None):
+            self.status = status
+            self.msg = msg
+            self.gaps = gaps
+            self.next = next
+
+    def __init__(
+            self,
+            gap_repo: ProducerGapRepository,
+            ordering: str,
+            limit: int,
+            after: Optional[tuple] = None,
+            min_year: int = None,
+            max_year: int = None,
+            min_interval: int = None,
+            max_interval: int = None):
+
+        self.gap_repo = gap_repo
+        self.ordering = ordering
+        self.limit = limit
+        self.after = after
+        self.filters = dict(min_year=min_year, max_year=max_year,
+                            min_interval=min_interval, max_interval=max_interval)
+
+    def execute(self) -> DTOOutput:
+        try:
+            if self.ordering not in ProducerGapRepository.ORDERINGS:
+                return ListProducerGaps.DTOOutput(
+                    status="FAILED",
+                    msg=f"The ordering must be {','.join(repr(ordering) for ordering in ProducerGapRepository.ORDERINGS)}")
+            # One more gap is requested to know if there is a next page.
+            gaps = self.gap_repo.page(
+                ordering=self.ordering, limit=self.limit + 1, after=self.after, **self.filters)
+            next_key = gaps[self.limit - 1].key(self.ordering) if len(gaps) > self.limit else None
+            return ListProducerGaps.DTOOutput(
+                status="OK", msg="Producer gaps retrieved successfully", gaps=gaps[:self.limit], next=next_key)
+        except Exception as ex:
+            logger.exception("It was not possible to retrieve the producer gaps")
+            return ListProducerGaps.DTOOutput(
+                status="ERROR", msg="An Unexpected error has ocurred when it was retrieving producer gaps data.")